@@ -0,0 +1,133 @@
+import os
+import pickle
+import numpy as np
+
+# Eingabeformate des Benchmark-Korpus (Ordnername = Loader-Format, siehe data/loader.py)
+FORMATS = ("json", "csv", "dingo", "npz", "pt")
+TOPOLOGIES = ("radial", "meshed")
+# Anteil zusätzlicher Leitungen (bezogen auf die Busanzahl) in vermaschten Netzen
+MESH_RATIO = 0.1
+# Neue Busse werden an einen der letzten BRANCH_WINDOW Busse angehängt (Tiefe ~ n / BRANCH_WINDOW)
+BRANCH_WINDOW = 30
+
+
+def make_grid(n_buses: int, meshed: bool = False, seed: int = 0):
+    """
+    Erzeugt reproduzierbar ein NS-Netz mit n_buses Bussen: ein 10-kV-Slackbus
+    mit Trafo und ein radialer Baum aus Leitungen, bei meshed=True zusätzlich
+    MESH_RATIO * n_buses Querverbindungen zwischen nahe beieinander liegenden
+    Bussen. Lasten an 60 % und PV-Anlagen an 10 % der Busse, Koordinaten entlang
+    des Baums, damit auch die Systemmetriken Werte liefern.
+    """
+    import pandapower as pp
+    rng = np.random.default_rng(seed + 7919 * n_buses + (1 if meshed else 0))
+    net = pp.create_empty_network(name=f"{'meshed' if meshed else 'radial'}-{n_buses}")
+    n_lv = max(n_buses - 1, 2)
+
+    # Baum: Bus i hängt an einem zufälligen der vorherigen BRANCH_WINDOW Busse
+    parent = np.array([rng.integers(max(0, i - BRANCH_WINDOW), i) for i in range(1, n_lv)], dtype=np.int64)
+    length = rng.uniform(0.01, 0.08, size=n_lv - 1)
+    xy = np.zeros((n_lv, 2))
+    angle = rng.uniform(0, 2 * np.pi, size=n_lv - 1)
+    for i in range(1, n_lv):
+        xy[i] = xy[parent[i - 1]] + length[i - 1] * np.array([np.cos(angle[i - 1]), np.sin(angle[i - 1])])
+
+    hv = pp.create_bus(net, vn_kv=10.0, name="slack", geodata=(0.0, 0.0))
+    lv = pp.create_buses(net, nr_buses=n_lv, vn_kv=0.4, geodata=[tuple(p) for p in xy])
+    pp.create_ext_grid(net, hv)
+    pp.create_transformer(net, hv, lv[0], std_type="0.4 MVA 10/0.4 kV")
+
+    from_bus, to_bus, lengths = lv[parent], lv[1:], length
+    if meshed:
+        # Querverbindungen zwischen Bussen mit nahem Index (kurze Maschen)
+        extra = int(MESH_RATIO * n_buses)
+        a = rng.integers(0, n_lv, size=extra)
+        b = np.clip(a + rng.integers(2, 2 * BRANCH_WINDOW, size=extra), 0, n_lv - 1)
+        keep = a != b
+        from_bus = np.concatenate([from_bus, lv[a[keep]]])
+        to_bus = np.concatenate([to_bus, lv[b[keep]]])
+        lengths = np.concatenate([lengths, rng.uniform(0.02, 0.1, size=int(keep.sum()))])
+    pp.create_lines(net, from_bus, to_bus, length_km=lengths, std_type="NAYY 4x150 SE")
+
+    loads = lv[rng.random(n_lv) < 0.6]
+    pp.create_loads(net, loads, p_mw=rng.uniform(0.002, 0.01, size=len(loads)), q_mvar=0.001)
+    pv = lv[rng.random(n_lv) < 0.1]
+    if len(pv):
+        pp.create_gens(net, pv, p_mw=rng.uniform(0.003, 0.03, size=len(pv)), type="PV")
+
+    # Spalten im DINGO-Stil, die die Systemmetriken auswerten
+    net.bus["x"] = np.concatenate([[0.0], xy[:, 0]])
+    net.bus["y"] = np.concatenate([[0.0], xy[:, 1]])
+    net.line["type"] = np.where(rng.random(len(net.line)) < 0.3, "overhead", "cable")
+    net.trafo["rating_kva"] = 400.0
+    net.trafo["r_ohm"], net.trafo["x_ohm"] = 0.0048, 0.0164
+    net.gen["p_kw"] = net.gen["p_mw"] * 1000
+    return net
+
+
+def _write_csv_folder(net, folder):
+    """Schreibt alle nicht leeren Tabellen als <tabelle>.csv in einen Ordner (CsvLoader-Layout)."""
+    import pandas as pd
+    os.makedirs(folder, exist_ok=True)
+    for name, df in net.items():
+        if isinstance(df, pd.DataFrame) and not name.startswith("_") and not df.empty:
+            df.to_csv(os.path.join(folder, f"{name}.csv"))
+
+
+def _write_pt(net, path):
+    """Kantenliste (Leitungen und Trafos) als .pt-Datei im Format {'edge_index', 'num_nodes'}."""
+    import torch
+    buses = {b: i for i, b in enumerate(net.bus.index)}
+    edges = [(buses[f], buses[t]) for f, t in zip(net.line.from_bus, net.line.to_bus)]
+    edges += [(buses[h], buses[l]) for h, l in zip(net.trafo.hv_bus, net.trafo.lv_bus)]
+    torch.save({"edge_index": torch.tensor(np.array(edges, dtype=np.int64).T), "num_nodes": len(buses)}, path)
+
+
+def write_grid_file(net, fmt: str, folder: str, name: str):
+    """Schreibt ein Netz im Format fmt nach folder (CSV: Unterordner name/)."""
+    os.makedirs(folder, exist_ok=True)
+    if fmt == "json":
+        import pandapower as pp
+        pp.to_json(net, os.path.join(folder, f"{name}.json"))
+    elif fmt == "csv":
+        _write_csv_folder(net, os.path.join(folder, name))
+    elif fmt == "dingo":
+        with open(os.path.join(folder, f"{name}.pkl"), "wb") as f:
+            pickle.dump(net, f)
+    elif fmt == "npz":
+        from real_vs_synth.data.grid_cache import write_grid
+        write_grid(net, os.path.join(folder, f"{name}.npz"))
+    elif fmt == "pt":
+        _write_pt(net, os.path.join(folder, f"{name}.pt"))
+    else:
+        raise ValueError(f"Unbekanntes Format: {fmt}")
+
+
+def case_folder(data_dir: str, fmt: str, topology: str, n_buses: int) -> str:
+    return os.path.join(data_dir, fmt, f"{topology}-{n_buses}")
+
+
+def write_corpus(data_dir: str, sizes, topologies=TOPOLOGIES, formats=FORMATS, grids_per_case: int = 2):
+    """
+    Legt den Benchmark-Korpus an: je Format, Topologie und Größe ein Ordner
+    mit grids_per_case Netzen (Seeds 0..grids_per_case-1). Vorhandene Ordner
+    werden wiederverwendet. Formate, deren Abhängigkeit fehlt (z. B. torch für
+    .pt), werden übersprungen. Rückgabe: {(format, topology, n_buses): Ordner}.
+    """
+    cases = {}
+    for topology in topologies:
+        for n_buses in sizes:
+            nets = None
+            for fmt in formats:
+                folder = case_folder(data_dir, fmt, topology, n_buses)
+                if not (os.path.isdir(folder) and os.listdir(folder)):
+                    if nets is None:
+                        nets = [make_grid(n_buses, topology == "meshed", seed) for seed in range(grids_per_case)]
+                    try:
+                        for seed, net in enumerate(nets):
+                            write_grid_file(net, fmt, folder, f"{topology}-{n_buses}-{seed}")
+                    except ImportError as e:
+                        print(f"Format {fmt} übersprungen: {e}")
+                        continue
+                cases[(fmt, topology, n_buses)] = folder
+    return cases
@@ -0,0 +1,280 @@
+import argparse
+import contextlib
+import gc
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.grids import FORMATS, TOPOLOGIES, write_corpus
+from real_vs_synth.data.loader import loader_class
+from real_vs_synth.model.network import Network
+from real_vs_synth.metrics import topological_characteristics, system_characteristics
+from real_vs_synth.metrics.network_metrics import compute_topological_record
+from real_vs_synth.metrics.system_characteristics import compute_system_metrics_batch
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+DEFAULT_DATA_DIR = os.path.join(".benchmarks", "data")
+DEFAULT_RESULTS_DIR = os.path.join(".benchmarks", "results")
+# Ab dieser Busanzahl werden Pfadmetriken vermaschter Netze über Stichproben geschätzt
+EXACT_PATH_LIMIT = 2000
+# Nur exakt berechenbare Pfadmetriken, die oberhalb von EXACT_PATH_LIMIT bei vermaschten Netzen entfallen
+EXACT_ONLY = ("topological_characteristics.compute_graph_diameter",)
+# Abweichung des Medians, ab der --compare eine Änderung markiert
+COMPARE_THRESHOLD = 0.10
+
+
+def _metric_functions(module):
+    """Öffentliche Metrikfunktionen eines Moduls mit `network` als erstem Parameter."""
+    functions = []
+    for name, func in inspect.getmembers(module, inspect.isfunction):
+        if func.__module__ != module.__name__ or name.startswith("_"):
+            continue
+        params = list(inspect.signature(func).parameters)
+        if params and params[0] == "network":
+            functions.append((f"{module.__name__.rsplit('.', 1)[-1]}.{name}", func))
+    return functions
+
+
+def _fresh(network):
+    """Kopie ohne zwischengespeicherte Topologie-Kennzahlen, damit jede Wiederholung alles neu berechnet."""
+    copy = Network()
+    copy.bus_index, copy.adjacency, copy.pp_net = network.bus_index, network.adjacency, network.pp_net
+    copy.name, copy._content_hash = network.name, network._content_hash
+    return copy
+
+
+def measure(func, repeat=3, memory=True):
+    """
+    Führt func() `repeat`-mal aus und misst die Laufzeit; anschließend optional ein
+    weiterer Lauf unter tracemalloc für den Spitzenwert des Speichers (Python- und
+    NumPy-Allokationen des Hauptprozesses). Ausgaben der Funktion werden unterdrückt.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        peak = None
+        if memory:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                func()
+                peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            finally:
+                tracemalloc.stop()
+    return {"wall_s": times, "min_s": min(times), "median_s": statistics.median(times), "peak_mb": peak}
+
+
+def _record(results, case, func, repeat, memory):
+    """Misst einen Fall und hängt das Ergebnis (oder den Fehler) an results an."""
+    label = f"{case['group']:8s} {case['name']:62s} {case.get('format') or '':6s} " \
+            f"{case['topology']:7s} {case['buses']:>6d}"
+    try:
+        case.update(measure(func, repeat, memory))
+        case["error"] = None
+        print(f"{label} {case['median_s']:10.4f} s" +
+              (f" {case['peak_mb']:9.1f} MB" if case["peak_mb"] is not None else ""))
+    except Exception as e:
+        case.update({"wall_s": [], "min_s": None, "median_s": None, "peak_mb": None, "error": repr(e)})
+        print(f"{label}     Fehler: {e!r}")
+    results.append(case)
+
+
+def bench_metrics(results, networks, topology, buses, repeat, memory):
+    """Alle Metrikfunktionen je Netz (über alle Netze eines Falls), dazu Datensatz und Batch-Systemmetriken."""
+    large_mesh = topology == "meshed" and buses > EXACT_PATH_LIMIT
+    functions = _metric_functions(topological_characteristics) + _metric_functions(system_characteristics)
+    functions.append(("network_metrics.compute_topological_record", compute_topological_record))
+    for name, func in functions:
+        params = inspect.signature(func).parameters
+        kwargs = {"approx": True} if large_mesh and "approx" in params else {}
+        if large_mesh and name in EXACT_ONLY:
+            continue
+        case = {"group": "metric", "name": name, "format": None, "topology": topology, "buses": buses,
+                "grids": len(networks), "variant": "approx" if kwargs else "exact", "repeat": repeat}
+        _record(results, case, lambda: [func(_fresh(n), **kwargs) for n in networks], repeat, memory)
+    case = {"group": "metric", "name": "system_characteristics.compute_system_metrics_batch", "format": None,
+            "topology": topology, "buses": buses, "grids": len(networks), "variant": "exact", "repeat": repeat}
+    _record(results, case, lambda: compute_system_metrics_batch(networks), repeat, memory)
+
+
+def bench_loader(results, fmt, folder, topology, buses, repeat, memory):
+    """Lädt den Ordner eines Falls mit dem Loader des Formats (load = alle Netze je Ebene)."""
+    cls = loader_class(fmt)
+    loaded = {}
+
+    def run():
+        networks = cls(folder).load(folder)
+        loaded["grids"] = sum(len(v) for v in networks.values())
+        if loaded["grids"] == 0:
+            # Loader fangen Lesefehler je Datei ab; ohne geladene Netze ist die Zeit nicht aussagekräftig
+            raise RuntimeError("keine Netze geladen")
+
+    case = {"group": "loader", "name": cls.__name__, "format": fmt, "topology": topology, "buses": buses,
+            "variant": "exact", "repeat": repeat}
+    _record(results, case, run, repeat, memory)
+    case["grids"] = loaded.get("grids", 0)
+
+
+def bench_compare(results, real, synth, buses, repeat, memory, workers):
+    """
+    Comparer.compare und die Systemmetriken beider Seiten: radiale (real) gegen
+    vermaschte Netze (synth), je einmal pro Netz und im Batch-Modus (blockdiagonal).
+    """
+    from real_vs_synth.analysis.comparer import Comparer
+    approx = buses > EXACT_PATH_LIMIT
+    for batched in (False, True):
+        comparer = Comparer(approx=approx, workers=workers, batched=batched)
+
+        def run():
+            real_nets = {"LV": [_fresh(n) for n in real]}
+            synth_nets = {"LV": [_fresh(n) for n in synth]}
+            comparer.compare(real_nets, synth_nets)
+            comparer.compare_system_metrics(real_nets, "Real")
+            comparer.compare_system_metrics(synth_nets, "Synthetic")
+
+        case = {"group": "compare", "name": "Comparer.compare" + (" (batched)" if batched else ""), "format": None,
+                "topology": "radial/meshed", "buses": buses, "grids": len(real) + len(synth),
+                "variant": "approx" if approx else "exact", "repeat": repeat, "workers": comparer.workers}
+        _record(results, case, run, repeat, memory)
+
+
+def _git_commit():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def _environment():
+    import numpy, pandas, scipy
+    commit, dirty = _git_commit()
+    versions = {"python": platform.python_version(), "numpy": numpy.__version__, "pandas": pandas.__version__,
+                "scipy": scipy.__version__}
+    try:
+        import pandapower
+        versions["pandapower"] = pandapower.__version__
+    except ImportError:
+        pass
+    return {"commit": commit, "dirty": dirty, "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "platform": platform.platform(), "processor": platform.processor(), "cpu_count": os.cpu_count(),
+            "versions": versions}
+
+
+def run_suite(sizes, topologies, formats, groups, data_dir, repeat, memory, grids_per_case, workers):
+    """Erzeugt bzw. verwendet den Korpus und misst alle gewählten Gruppen. Rückgabe: Ergebnisliste."""
+    cases = write_corpus(data_dir, sizes, topologies, formats, grids_per_case)
+    results = []
+    for buses in sizes:
+        loaded = {}
+        for topology in topologies:
+            if ("npz", topology, buses) in cases:
+                # Metriken und Vergleich auf Netzen aus dem kompakten Format, damit das Laden nicht mitzählt
+                with contextlib.redirect_stdout(io.StringIO()):
+                    nets = loader_class("npz")(cases[("npz", topology, buses)]).load(None)
+                loaded[topology] = [n for level in nets.values() for n in level]
+            if "metrics" in groups and topology in loaded:
+                bench_metrics(results, loaded[topology], topology, buses, repeat, memory)
+            if "loaders" in groups:
+                for fmt in formats:
+                    if (fmt, topology, buses) in cases:
+                        bench_loader(results, fmt, cases[(fmt, topology, buses)], topology, buses, repeat, memory)
+        if "compare" in groups and {"radial", "meshed"} <= set(loaded):
+            bench_compare(results, loaded["radial"], loaded["meshed"], buses, repeat, memory, workers)
+    return results
+
+
+def _key(result):
+    return (result["group"], result["name"], result.get("format"), result["topology"], result["buses"],
+            result.get("variant"))
+
+
+def compare_runs(old_path, new_path, threshold=COMPARE_THRESHOLD):
+    """Vergleicht zwei Ergebnisdateien (Median je Fall) und gibt eine Tabelle mit Faktoren aus."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    old_results = {_key(r): r for r in old["results"]}
+    print(f"alt: {old['environment'].get('commit')}  neu: {new['environment'].get('commit')}")
+    print(f"{'Gruppe':8s} {'Name':62s} {'Format':6s} {'Topo':13s} {'Busse':>6s} {'alt [s]':>10s} "
+          f"{'neu [s]':>10s} {'Faktor':>7s}")
+    for result in new["results"]:
+        before = old_results.get(_key(result))
+        if before is None or before["median_s"] is None or result["median_s"] is None:
+            continue
+        ratio = result["median_s"] / before["median_s"] if before["median_s"] > 0 else float("inf")
+        flag = "  langsamer" if ratio > 1 + threshold else "  schneller" if ratio < 1 - threshold else ""
+        print(f"{result['group']:8s} {result['name']:62s} {result.get('format') or '':6s} "
+              f"{result['topology']:13s} {result['buses']:>6d} {before['median_s']:10.4f} "
+              f"{result['median_s']:10.4f} {ratio:7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark suite: metric functions, loaders and Comparer.compare on generated grids"
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Busanzahlen der erzeugten Netze")
+    parser.add_argument('--topologies', nargs='+', choices=TOPOLOGIES, default=list(TOPOLOGIES))
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS),
+                        help="Eingabeformate für die Loader-Benchmarks (npz wird immer für die Metriken erzeugt)")
+    parser.add_argument('--groups', nargs='+', choices=["metrics", "loaders", "compare"],
+                        default=["metrics", "loaders", "compare"])
+    parser.add_argument('--grids_per_case', type=int, default=2,
+                        help="Anzahl Netze je Format, Topologie und Größe")
+    parser.add_argument('--repeat', type=int, default=3, help="Wiederholungen je Fall (Median wird verglichen)")
+    parser.add_argument('--no_memory', action='store_true',
+                        help="Keinen zusätzlichen Lauf unter tracemalloc für den Spitzenspeicher")
+    parser.add_argument('--workers', type=int, default=None, help="Worker-Prozesse für Comparer.compare")
+    parser.add_argument('--data_dir', type=str, default=DEFAULT_DATA_DIR,
+                        help="Verzeichnis für die erzeugten Netze (wird wiederverwendet)")
+    parser.add_argument('--output', type=str, default=None,
+                        help="Ergebnisdatei (JSON); Standard: .benchmarks/results/<Zeit>-<Commit>.json")
+    parser.add_argument('--compare', nargs=2, metavar=("ALT", "NEU"),
+                        help="Zwei Ergebnisdateien vergleichen statt zu messen")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_runs(*args.compare)
+        return
+
+    formats = list(dict.fromkeys(args.formats + ["npz"]))
+    environment = _environment()
+    results = run_suite(sorted(args.sizes), args.topologies, formats, args.groups, args.data_dir,
+                        args.repeat, not args.no_memory, args.grids_per_case, args.workers)
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(DEFAULT_RESULTS_DIR, f"{stamp}-{(environment['commit'] or 'nogit')[:10]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"environment": environment, "settings": vars(args), "results": results}, f, indent=1)
+    print(f"Ergebnisse gespeichert: {output}")
+
+
+if __name__ == '__main__':
+    main()
+
+# Beispielaufrufe:
+#   python benchmarks/run.py
+#   python benchmarks/run.py --sizes 100 1000 --groups metrics --repeat 5
+#   python benchmarks/run.py --compare .benchmarks/results/A.json .benchmarks/results/B.json
@@ -1,25 +1,23 @@
 import argparse
+import logging
 import os
-from real_vs_synth.data.simbench_loader import SimBenchLoader
-from real_vs_synth.data.synthetic_loader import SyntheticLoader
-from real_vs_synth.data.cvs_loader import CsvLoader
-from real_vs_synth.data.dingo_loader import DingoLoader
-from real_vs_synth.analysis.comparer import Comparer
-from real_vs_synth.viz.plt_comparison import plot_topological_comparison
-import pandapower.plotting as plot
-from real_vs_synth.data.pt_loader import PtLoader
-from real_vs_synth.viz.plt_comparison import (
-    plot_topo_hist_distributions,
-    plot_system_hist_distributions
-)
+from functools import partial
+from real_vs_synth.data.loader import get_loader
+from real_vs_synth.analysis.comparer import COMPARED_LEVELS, Comparer
+from real_vs_synth.analysis.metric_cache import MetricCache
+from real_vs_synth.data.streaming import collect_levels
+from real_vs_synth.instrumentation import configure_logging, enable_tracing, finish_tracing, progress, span
+from real_vs_synth.model.network import DEBUG_ENV, RELEASE_ENV
 
+log = logging.getLogger(__name__)
     
 def visualize_all_networks(networks, title_prefix=""):
+    import pandapower.plotting as plot
     for level, nets in networks.items():
         for i, net in enumerate(nets):
             try:
-                print(f"Plot: {title_prefix} Ebene {level}, Netz {i+1}")
-                if hasattr(net, "pp_net"):  # Pandapower Netz
+                log.info("Plot: %s Ebene %s, Netz %d", title_prefix, level, i + 1)
+                if getattr(net, "pp_net", None) is not None:  # Pandapower Netz
                     plot.simple_plot(net.pp_net)
 
                 elif hasattr(net, "edge_index") and hasattr(net, "num_nodes"):
@@ -50,40 +48,206 @@ def visualize_all_networks(networks, title_prefix=""):
                     plt.show()
 
                 else:
-                    print(f"Nicht unterstützter Netztyp für {title_prefix} {level} Netz {i+1}")
+                    log.warning("Nicht unterstützter Netztyp für %s %s Netz %d", title_prefix, level, i + 1)
 
             except Exception as e:
-                print(f"Plot nicht möglich für {title_prefix} {level} Netz {i+1}: {e}")
+                log.warning("Plot nicht möglich für %s %s Netz %d: %s", title_prefix, level, i + 1, e)
   
 
-def select_loader(path: str):
-    if path.lower().startswith("simbench"):
-        return SimBenchLoader(), True
-    if os.path.isdir(path):
-        has_bus_csv = any(
-            os.path.isdir(os.path.join(path, d)) and
-            os.path.exists(os.path.join(path, d, 'bus.csv'))
-            for d in os.listdir(path)
-        )
-        if has_bus_csv:
-            return CsvLoader(path), False
-        elif any(f.endswith(".pt") for f in os.listdir(path)):
-            return PtLoader(path), False
-        else:
-            return SyntheticLoader(path), False
-    elif path.lower().endswith('.pkl'):
-        print(f"Lade Netze aus Dingo-PKL-Datei: {path}")
-        return DingoLoader(os.path.dirname(path)), False
+def select_loader(path: str, grid_cache: str = None):
+    # Format erkennen; das zugehörige Loader-Modul wird erst jetzt importiert
+    return get_loader(path, grid_cache)
+
+def load_networks(loader, is_simbench, path, level=None, region=None, stream=False, record=None, shard=None,
+                  label="Netze"):
+    """
+    Lädt alle Netze als Dict je Ebene oder (stream=True) als Strom von (level, network).
+    Mit record berechnen die Loader-Worker die Metriken und der Strom enthält nur Datensätze.
+    Mit shard = (index, count) wird nur der entsprechende Teil der Dateien geladen.
+    Geladene Netze werden unter `label` in der Fortschrittszeile gezählt.
+    """
+    load = partial(loader.iter_load, record=record, shard=shard)
+    if is_simbench:
+        # SimBench-Filter nur falls gewünscht
+        networks = load(level_filter=level, region_filter=region)
     else:
-        return SimBenchLoader(), True
+        networks = load(path)
+    networks = progress.track(networks, label)
+    return networks if stream else collect_levels(networks)
+
+def incremental_entries(comparer, loader, is_simbench, path, level, region, manifest_dir, label):
+    # Nur neue oder geänderte Quellen laden; Loader ohne Quellenliste (SimBench) werden vollständig ausgewertet
+    if not hasattr(loader, "list_sources"):
+        log.info("%s: kein Manifest für dieses Format, alle Netze werden ausgewertet", label)
+        stream = load_networks(loader, is_simbench, path, level, region, stream=True,
+                               record=comparer.record_task(), label=label)
+        return list(comparer.worker_records(stream))
+    from real_vs_synth.analysis.manifest import CorpusManifest
+    manifest = CorpusManifest(manifest_dir, path, comparer.manifest_config(loader))
+    try:
+        return comparer.incremental_entries(loader, manifest, label)
+    finally:
+        manifest.close()
+
+def write_shard_result(comparer, shard, args):
+    # Teilergebnis (zusammenführbare Kenngrößen und Systemmetriken) für --merge ablegen
+    from real_vs_synth.analysis.shards import write_shard
+    path = write_shard(args.shard_dir, shard, comparer.stats, comparer.system_records, shard_config(args))
+    log.info("Shard %d/%d gespeichert: %s", shard[0], shard[1], path)
+
+def save_results(comparer, args):
+    # Datensätze je Netz als Long-Format-Tabellen für replot.py ablegen
+    if args.results_dir:
+        with span("stage.save"):
+            paths = comparer.write_results(args.results_dir, args.results_format)
+        if paths:
+            log.info("Ergebnisse gespeichert: %s", ", ".join(paths))
+
+def shard_config(args):
+    # Einstellungen, die bei allen Shards eines Vergleichs übereinstimmen müssen
+    return {key: getattr(args, key) for key in ('real', 'synthetic', 'real_level', 'real_region',
+                                                 'synthetic_level', 'synthetic_region',
+                                                 'approx', 'approx_error', 'approx_time')}
+
+def merge_shards(comparer, args):
+    # Shards zusammenführen: gleiche Ergebnisse wie ein Lauf über alle Netze, ohne Netze zu laden
+    from real_vs_synth.analysis.shards import read_shards
+    stats, system, config = read_shards(args.merge)
+    log.info("Shards aus %s zusammengeführt (%s vs. %s)", args.merge, config['real'], config['synthetic'])
+    df = comparer.compare_stats(stats)
+    comparer.system_records = system
+    metrics = {side: [m for lvl in COMPARED_LEVELS for _, m in system.get((lvl, side), [])]
+               for side in ('real', 'synth')}
+    log.info("Ausgewertete Netze: %d real, %d synthetisch", len(metrics['real']), len(metrics['synth']))
+    if args.results_dir:
+        # Ohne Einzelwerte je Netz enthält der Ergebnisspeicher nur die Verteilungsabstände
+        from real_vs_synth.analysis.results_store import DISTANCES_TABLE, write_table
+        log.info("Ergebnisse gespeichert: %s",
+                 write_table(args.results_dir, DISTANCES_TABLE, comparer.distance_table(), args.results_format))
+    plot_results(df, metrics['real'], metrics['synth'], args)
+    return df
+
+def plot_results(df, real_metrics, synth_metrics, args):
+    if args.no_figures:
+        return
+    if args.report_dir:
+        # Headless: alle Abbildungen parallel als Dateien schreiben
+        from real_vs_synth.viz.report import render_report
+        formats = [f.strip().lower() for f in args.report_formats.split(",") if f.strip()]
+        with span("stage.report"):
+            paths = render_report(df, real_metrics, synth_metrics, args.report_dir, formats, workers=args.workers)
+        log.info("Report mit %d Datei(en) in %s geschrieben", len(paths), args.report_dir)
+        return
+    from real_vs_synth.viz.plt_comparison import (
+        plot_topological_comparison,
+        plot_system_metrics,
+        plot_topo_hist_distributions,
+        plot_system_hist_distributions
+    )
+    # Interaktiv: die Spannen enthalten auch die Zeit, in der die Fenster geöffnet sind
+    log.info("Zeige Balkendiagramm für alle Topo-Metriken …")
+    with span("plot.plot_topological_comparison"):
+        plot_topological_comparison(df)
+
+    log.info("Zeige Balkendiagramm für System-Metriken …")
+    labels = ["Real"] * len(real_metrics) + ["Synthetic"] * len(synth_metrics)
+    with span("plot.plot_system_metrics"):
+        plot_system_metrics(real_metrics + synth_metrics, labels)
+
+    # Histogramm-Plots für Topologie und Systemmetriken
+    with span("plot.plot_topo_hist_distributions"):
+        plot_topo_hist_distributions(df)
+    with span("plot.plot_system_hist_distributions"):
+        plot_system_hist_distributions(real_metrics + synth_metrics, labels)
+
+def run(args, shard=None):
+    cache = None if args.no_cache else MetricCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 ** 2))
+    comparer = Comparer(approx=args.approx, target_error=args.approx_error, time_budget=args.approx_time,
+                        workers=args.workers, cache=cache, batched=args.batched)
+    if args.merge:
+        merge_shards(comparer, args)
+        return
+
+    real_loader, real_is_simbench = select_loader(args.real, args.grid_cache)
+    synth_loader, synth_is_simbench = select_loader(args.synthetic, args.grid_cache)
+
+    if args.incremental:
+        # Ergebnisse je Quelldatei aus dem Manifest, nur Änderungen werden geladen und ausgewertet
+        with span("stage.incremental"):
+            df, system = comparer.compare_entries(
+                incremental_entries(comparer, real_loader, real_is_simbench, args.real, args.real_level,
+                                    args.real_region, args.manifest_dir, "real"),
+                incremental_entries(comparer, synth_loader, synth_is_simbench, args.synthetic,
+                                    args.synthetic_level, args.synthetic_region, args.manifest_dir, "synth"))
+        log.info("Ausgewertete Netze: %d real, %d synthetisch", len(system['real']), len(system['synth']))
+        save_results(comparer, args)
+        plot_results(df, system['real'], system['synth'], args)
+        return
+
+    if args.stream or args.metrics_in_loader:
+        # Netze werden beim Laden ausgewertet, es bleiben nur die Metrik-Datensätze erhalten
+        record = comparer.record_task() if args.metrics_in_loader else None
+        with span("stage.compare_stream"):
+            df, system = comparer.compare_stream(
+                load_networks(real_loader, real_is_simbench, args.real, args.real_level, args.real_region,
+                              stream=True, record=record, shard=shard, label="real"),
+                load_networks(synth_loader, synth_is_simbench, args.synthetic, args.synthetic_level,
+                              args.synthetic_region, stream=True, record=record, shard=shard, label="synth"),
+                in_workers=args.metrics_in_loader)
+        log.info("Ausgewertete Netze: %d real, %d synthetisch", len(system['real']), len(system['synth']))
+        if shard is not None:
+            write_shard_result(comparer, shard, args)
+            return
+        save_results(comparer, args)
+        plot_results(df, system['real'], system['synth'], args)
+        return
+
+    # Lade reale und synthetische Netze
+    with span("stage.load", side="real"):
+        real_networks = load_networks(real_loader, real_is_simbench, args.real, args.real_level,
+                                      args.real_region, shard=shard, label="real")
+    with span("stage.load", side="synth"):
+        synthetic_networks = load_networks(synth_loader, synth_is_simbench, args.synthetic,
+                                           args.synthetic_level, args.synthetic_region, shard=shard,
+                                           label="synth")
+
+    log.info("Reale Netz-Level: %s", ", ".join(f"{lvl}: {len(nets)}" for lvl, nets in real_networks.items()))
+    log.info("Anzahl synthetischer Netze: %d", sum(len(v) for v in synthetic_networks.values()))
+
+    #Visualisierung der Netze zum Überprüfen
+    # bei Großen Daten unbedingt Deaktivieren
+
+    if not (args.report_dir or args.no_figures or args.release_pp_net or shard is not None):
+        # Visualisierung für reale Netze
+        visualize_all_networks(real_networks, title_prefix="Reales")
+
+        # Visualisierung für synthetische Netze
+        visualize_all_networks(synthetic_networks, title_prefix="Synthetisch")
+
+    # Vergleiche Real vs. Synthetic (Shards: auch Level, die nur eine Seite enthält)
+    with span("stage.compare"):
+        df = comparer.compare(real_networks, synthetic_networks, all_levels=shard is not None)
+
+    with span("stage.system_metrics"):
+        real_metrics = comparer.compare_system_metrics(real_networks, "Real")
+        synth_metrics = comparer.compare_system_metrics(synthetic_networks, "Synthetic")
+    if shard is not None:
+        write_shard_result(comparer, shard, args)
+        return
+    save_results(comparer, args)
+    plot_results(df, real_metrics, synth_metrics, args)
+
+    #if args.export_json:
+    #print("Exportiere Verteilungen als JSON …")
+    #comparer.export_statistics_to_json(real_networks, synthetic_networks, output_dir="results")
 
 def main():
     parser = argparse.ArgumentParser(
         description="Compare topological and system metrics between Real and Synthetic power networks"
     )
-    parser.add_argument('--real', required=True,
+    parser.add_argument('--real',
                         help="Pfad zu Real-Netz-Daten (simbench für SimBench, sonst Pfad)")
-    parser.add_argument('--synthetic', required=True,
+    parser.add_argument('--synthetic',
                         help="Pfad zu Synthetic-Netz-Daten (simbench für SimBench, sonst Pfad)")
     parser.add_argument('--real_level', type=str, default=None,
                         help="Filter für reale Spannungsebene: LV, MV, HV, EHV (nur für simbench)")
@@ -95,60 +259,107 @@ def main():
                         help="Region synthetic: r (rural), m (mixed), c (city/urban), s (semiurb), comm (nur für simbench)")
     parser.add_argument('--export_json', action='store_true',
                         help="Speichert statistische Verteilungen und Mittelwerte als JSON-Datei im ./results Verzeichnis")
+    parser.add_argument('--approx', action='store_true',
+                        help="Pfadlänge, Durchmesser und Betweenness über Stichproben von Quellknoten schätzen")
+    parser.add_argument('--approx_error', type=float, default=0.05,
+                        help="Relativer Zielfehler (95 %%-Konfidenzintervall) für --approx")
+    parser.add_argument('--approx_time', type=float, default=None,
+                        help="Zeitbudget in Sekunden pro Netz für --approx")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Anzahl Worker-Prozesse für die Metrikberechnung (Standard: min(CPU-Kerne, 8), 1 = seriell)")
+    parser.add_argument('--cache_dir', type=str, default=".metric_cache",
+                        help="Verzeichnis für den persistenten Metrik-Cache")
+    parser.add_argument('--cache_max_mb', type=float, default=1024,
+                        help="Maximale Größe des Metrik-Caches in MB (älteste Einträge werden entfernt)")
+    parser.add_argument('--no_cache', action='store_true',
+                        help="Metrik-Cache deaktivieren und alle Metriken neu berechnen")
+    parser.add_argument('--grid_cache', type=str, default=None,
+                        help="Verzeichnis für den kompakten Grid-Cache (.npz); JSON-, CSV- und PKL-Netze "
+                             "werden einmalig umgewandelt und danach aus dem Cache geladen")
+    parser.add_argument('--stream', action='store_true',
+                        help="Netze beim Laden direkt auswerten und danach verwerfen (begrenzter Speicher, "
+                             "ohne Netz-Visualisierung)")
+    parser.add_argument('--metrics_in_loader', action='store_true',
+                        help="Metriken direkt in den Loader-Workern berechnen und nur kompakte Datensätze "
+                             "zurückgeben (impliziert --stream)")
+    parser.add_argument('--report_dir', type=str, default=None,
+                        help="Headless-Modus: alle Abbildungen ohne Anzeige als Dateien in dieses Verzeichnis schreiben")
+    parser.add_argument('--report_formats', type=str, default="png",
+                        help="Kommagetrennte Formate für --report_dir: png, svg, html")
+    parser.add_argument('--no_figures', action='store_true',
+                        help="Keine Abbildungen erzeugen (auch keine Netz-Visualisierung)")
+    parser.add_argument('--results_dir', type=str, default="results",
+                        help="Verzeichnis für den Ergebnisspeicher (Skalare und Einzelwerte je Netz, "
+                             "leer = nicht speichern); Abbildungen daraus neu erzeugen: replot.py")
+    parser.add_argument('--results_format', choices=["parquet", "arrow"], default="parquet",
+                        help="Dateiformat des Ergebnisspeichers")
+    parser.add_argument('--shard', type=str, default=None,
+                        help="Nur den Shard INDEX/ANZAHL (Index ab 0, z. B. 3/16) der sortierten Dateilisten "
+                             "auswerten und das Teilergebnis nach --shard_dir schreiben (ohne Abbildungen)")
+    parser.add_argument('--shard_dir', type=str, default="shards",
+                        help="Verzeichnis für die Teilergebnisse von --shard")
+    parser.add_argument('--merge', type=str, default=None,
+                        help="Alle Shards aus diesem Verzeichnis zusammenführen und wie ein vollständiger "
+                             "Lauf auswerten (ohne --real/--synthetic)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ergebnisse je Quelldatei in einem Manifest je Korpus speichern und bei erneuten "
+                             "Läufen nur neue oder geänderte Netze laden und auswerten (ohne Netz-Visualisierung)")
+    parser.add_argument('--manifest_dir', type=str, default=".manifest",
+                        help="Verzeichnis für die Korpus-Manifeste von --incremental")
+    parser.add_argument('--batched', action='store_true',
+                        help="Topologische Metriken blockweise für viele Netze gemeinsam auf einem "
+                             "blockdiagonalen Graphen berechnen (schneller bei vielen kleinen Netzen)")
+    parser.add_argument('--release_pp_net', action='store_true',
+                        help="pandapower-Netze direkt nach dem Laden verwerfen und nur Topologie und "
+                             "Metrik-Arrays behalten (geringer Speicherbedarf, ohne Netz-Visualisierung)")
+    parser.add_argument('--debug_topology', action='store_true',
+                        help="Gibt beim Laden für jedes Netz eine Topologie-Zusammenfassung aus")
+    parser.add_argument('--log_level', choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
+                        help="Ausführlichkeit der Konsolenausgabe (DEBUG: u. a. erkannte Ebene je Netz)")
+    parser.add_argument('--trace', type=str, default=None,
+                        help="Zeiten je Stufe und Netz (Laden, Graphaufbau, jede Metrik, Abbildungen) sowie "
+                             "Speicher-Spitzenwerte als Trace-Datei (JSON, Chrome-Trace-Format) schreiben")
+    parser.add_argument('--no_progress', action='store_true',
+                        help="Keine Fortschrittszeile auf der Konsole ausgeben")
     args = parser.parse_args()
+    configure_logging(args.log_level)
+    if not args.merge and not (args.real and args.synthetic):
+        parser.error("--real und --synthetic sind erforderlich (außer mit --merge)")
+    if args.merge and not os.path.isdir(args.merge):
+        parser.error(f"--merge: Verzeichnis {args.merge} existiert nicht")
+    if args.incremental and (args.shard or args.merge):
+        parser.error("--incremental lässt sich nicht mit --shard oder --merge kombinieren")
+    shard = None
+    if args.shard:
+        from real_vs_synth.analysis.shards import parse_shard
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.report_dir or args.no_figures:
+        # Nicht-interaktives Backend, bevor pyplot irgendwo importiert wird
+        import matplotlib
+        matplotlib.use("Agg")
+    unknown = set(f.strip().lower() for f in args.report_formats.split(",") if f.strip()) - {"png", "svg", "html"}
+    if unknown:
+        parser.error(f"Unbekannte Report-Formate: {', '.join(sorted(unknown))}")
+    if args.debug_topology:
+        # Über die Umgebung auch an die Loader-Worker weitergeben
+        os.environ[DEBUG_ENV] = "1"
+    if args.release_pp_net:
+        os.environ[RELEASE_ENV] = "1"
 
-    # Lade reale Netze (SimBench-Filter nur falls gewünscht)
-    real_loader, real_is_simbench = select_loader(args.real)
-    if real_is_simbench:
-        real_networks = real_loader.load(level_filter=args.real_level, region_filter=args.real_region)
-    else:
-        real_networks = real_loader.load(args.real)
-
-    # Lade synthetische Netze (SimBench-Filter nur falls gewünscht)
-    synth_loader, synth_is_simbench = select_loader(args.synthetic)
-    if synth_is_simbench:
-        synthetic_networks = synth_loader.load(level_filter=args.synthetic_level, region_filter=args.synthetic_region)
-    else:
-        synthetic_networks = synth_loader.load(args.synthetic)
-
-    print(f"Reale Netz-Level: {list(real_networks.keys())}")
-    for lvl, nets in real_networks.items():
-        print(f"  -> {lvl}: {len(nets)} Netz(e)")
-
-    print(f"Anzahl synthetischer Netze: {sum(len(v) for v in synthetic_networks.values())}")
-    
-    #Visualisierung der Netze zum Überprüfen
-    # bei Großen Daten unbedingt Deaktivieren
-  
-    # Visualisierung für reale Netze
-    visualize_all_networks(real_networks, title_prefix="Reales")
-    
-    # Visualisierung für synthetische Netze
-    visualize_all_networks(synthetic_networks, title_prefix="Synthetisch")
-    
-    # Vergleiche Real vs. Synthetic
-    comparer = Comparer()
-    df = comparer.compare(real_networks, synthetic_networks)
-    print("Ergebnisse (metrische Vergleiche):")
-    #print(df.to_string(index=False))
-    
-    print("Zeige Balkendiagramm für alle Topo-Metriken …")
-    plot_topological_comparison(df)
-    
-    print("Zeige Balkendiagramm für System-Metriken …")
-    comparer.plot_system_metrics(real_networks, synthetic_networks)
-    
-    # Histogramm-Plot für Topologie
-    plot_topo_hist_distributions(df)
-    
-    # Histogramm-Plot für Systemmetriken
-    real_metrics = comparer.compare_system_metrics(real_networks, "Real")
-    synth_metrics = comparer.compare_system_metrics(synthetic_networks, "Synthetic")
-    plot_system_hist_distributions(real_metrics + synth_metrics, ["Real"] * len(real_metrics) + ["Synthetic"] * len(synth_metrics))
-    
-    #if args.export_json:
-    #print("Exportiere Verteilungen als JSON …")
-    #comparer.export_statistics_to_json(real_networks, synthetic_networks, output_dir="results")
+    if args.trace:
+        # Vor dem Start der Worker, damit sie die Einstellung erben
+        enable_tracing()
+    progress.start(enabled=False if args.no_progress else None)
+    try:
+        with span("stage.total"):
+            run(args, shard)
+    finally:
+        progress.close()
+        if args.trace:
+            finish_tracing(args.trace)
 
 if __name__ == '__main__':
     main()
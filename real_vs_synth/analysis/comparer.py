@@ -1,137 +1,474 @@
+import logging
 import pandas as pd
-import json
+import numpy as np
 import os
-from real_vs_synth.metrics.topological_characteristics import (
-    compute_node_degree_metrics,
-    compute_clustering_coefficient,
-    compute_characteristic_path_length,
-    compute_graph_diameter,
-    compute_betweenness_centrality,
-    compute_meshness,                
-    compute_degree_assortativity     
-)
-from real_vs_synth.metrics.system_characteristics import compute_system_metrics
-from real_vs_synth.viz.plt_comparison import (
-    plot_topological_comparison,
-    plot_system_metrics
-)
+from functools import partial
+from multiprocessing import Pool, cpu_count
+from real_vs_synth.metrics.network_metrics import (compute_topological_record, compute_topological_records,
+                                                   compute_network_record, metric_key)
+from real_vs_synth.metrics.system_characteristics import compute_system_metrics_batch
+from real_vs_synth.metrics.distribution_distances import DISTANCES, distribution_distances
+from real_vs_synth.data.streaming import chunked
+from real_vs_synth.instrumentation import progress, span
+
+log = logging.getLogger(__name__)
+
+# Metriken mit Werten je Knoten, deren Verteilung über alle Netze gesammelt wird
+NODE_METRICS = ('deg', 'cc', 'bw')
+# Metriken mit einem Wert je Netz
+NETWORK_METRICS = ('mesh', 'assort', 'diameter')
+# Verglichene Spannungsebenen
+COMPARED_LEVELS = ('MV', 'LV')
+# Netze je Block im Streaming-Modus (nur ein Block wird gleichzeitig im Speicher gehalten)
+STREAM_CHUNK = 64
+# Höchstzahl Netze je blockdiagonaler Aufgabe im Batch-Modus
+BATCH_SIZE = 2048
+# Beschriftungen in compare_system_metrics -> Seite im Ergebnisspeicher
+SIDES = {'Real': 'real', 'Synthetic': 'synth'}
+
+# Kenngrößen mit einem Wert je Netz, deren Mittelwert verglichen wird: (Schlüssel, Feld, Differenzspalte)
+LEVEL_FIELDS = (('deg', 'deg_mean', 'deg_diff'), ('cc', 'cc_mean', 'cc_diff'),
+                ('cpl', 'cpl_mean', 'cpl_diff'), ('diameter', 'diameter', 'diam_diff'),
+                ('bw', 'bw_mean', 'bw_diff'), ('mesh', 'mesh', 'mesh_diff'),
+                ('assort', 'assort', 'assort_diff'))
+# Metriken in der Reihenfolge der Ergebnisspalten
+TOPO_METRICS = ('deg', 'cc', 'cpl', 'bw', 'mesh', 'assort', 'diameter')
+
+def _sum_hists(hists):
+    """Summiert Hop-Histogramme unterschiedlicher Länge zu einem Array von Zählwerten."""
+    total = np.zeros(max((len(h) for h in hists), default=1), dtype=np.int64)
+    for h in hists:
+        total[:len(h)] += h
+    return total
+
+def _value_hist(values):
+    """
+    Exaktes Histogramm (sortierte eindeutige Werte, Anzahl je Wert). Es hängt
+    weder von der Reihenfolge noch von der Aufteilung der Netze ab.
+    """
+    values, counts = np.unique(np.asarray(values), return_counts=True)
+    return values, counts.astype(np.int64)
+
+def _merge_value_hists(hists):
+    """Vereinigt mehrere exakte Histogramme (Anzahlen gleicher Werte werden addiert)."""
+    values, inverse = np.unique(np.concatenate([h[0] for h in hists]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([h[1] for h in hists]), minlength=len(values))
+    return values, counts.astype(np.int64)
+
+def _approx_summary(records):
+    """
+    Fasst die Approximation der Pfadmetriken eines Levels zusammen: Anzahl
+    geschätzter Netze und größter relativer Fehler (95 %-Intervall) für CPL und BW.
+    """
+    infos = [r['approx'] for r in records if r.get('approx') and not r['approx']['exact']]
+    return {
+        'approx_nets': len(infos),
+        'cpl_rel_err': max((i['cpl_rel_err'] for i in infos), default=0.0),
+        'bw_rel_err': max((i['bw_rel_err'] for i in infos), default=0.0),
+    }
+
+def level_stats(records):
+    """
+    Reduziert die Netz-Datensätze einer Seite eines Levels auf zusammenführbare
+    Kenngrößen: Anzahl Netze, exakte Histogramme der Werte je Knoten (deg, cc,
+    bw), der Werte je Netz (Mittelwerte, mesh, assort, diameter) und das
+    aufsummierte Hop-Histogramm (cpl) sowie die Zusammenfassung der Approximation.
+    """
+    hists = {key: _value_hist(np.concatenate([r[key] for r in records] or [np.empty(0)])) for key in NODE_METRICS}
+    for _, field, _ in LEVEL_FIELDS:
+        hists[field] = _value_hist([r[field] for r in records])
+    cpl = _sum_hists([r['cpl_hist'] for r in records])
+    hists['cpl'] = (np.arange(len(cpl)), cpl)
+    return {'n': len(records), 'hists': hists, 'approx': _approx_summary(records)}
+
+def merge_stats(parts):
+    """Führt level_stats mehrerer Teilmengen (z. B. Shards) exakt zusammen."""
+    parts = [p for p in parts if p['n']]
+    if len(parts) <= 1:
+        return parts[0] if parts else level_stats([])
+    hists = {key: _merge_value_hists([p['hists'][key] for p in parts]) for key in parts[0]['hists'] if key != 'cpl'}
+    cpl = _sum_hists([_dense_hist(p['hists']['cpl']) for p in parts])
+    hists['cpl'] = (np.arange(len(cpl)), cpl)
+    approx = {'approx_nets': sum(p['approx']['approx_nets'] for p in parts)}
+    for key in ('cpl_rel_err', 'bw_rel_err'):
+        approx[key] = max(p['approx'][key] for p in parts)
+    return {'n': sum(p['n'] for p in parts), 'hists': hists, 'approx': approx}
+
+def _dense_hist(hist):
+    """Hop-Histogramm (Hops, Anzahl) als Array mit Index = Hop-Anzahl."""
+    hops, counts = hist
+    dense = np.zeros(int(hops.max()) + 1 if len(hops) else 1, dtype=np.int64)
+    dense[hops.astype(np.int64)] = counts
+    return dense
+
+def _hist_sum(hist):
+    values, counts = hist
+    return (values * counts).sum()
+
+def topo_distances(real_stats, synth_stats):
+    """
+    KS-, Wasserstein-1- und Jensen-Shannon-Abstand je topologischer Metrik
+    zwischen zwei Seiten, direkt aus den Histogrammen von level_stats.
+    """
+    result = {}
+    for key in NODE_METRICS + ('cpl',) + NETWORK_METRICS:
+        real_values, real_counts = real_stats['hists'][key]
+        synth_values, synth_counts = synth_stats['hists'][key]
+        result[key] = distribution_distances(real_values, synth_values, real_counts, synth_counts)
+    return result
+
+def system_distances(real_metrics, synth_metrics):
+    """
+    Abstände je Systemmetrik zwischen zwei Listen von Metrik-Dicts; Listen
+    (z. B. trafo_xr_values) werden über alle Netze zusammengefasst.
+    """
+    keys = list(dict.fromkeys(k for m in real_metrics + synth_metrics for k in m))
+
+    def values(metrics, key):
+        parts = [np.atleast_1d(np.asarray(m[key], dtype=np.float64)) for m in metrics if key in m]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    return {key: distribution_distances(values(real_metrics, key), values(synth_metrics, key)) for key in keys}
+
+def summarize_level(level, real_stats, synth_stats):
+    """
+    Erzeugt aus den Kenngrößen beider Seiten (level_stats) eine Ergebniszeile
+    (Mittelwerte, Differenzen, Verteilungsabstände, Verteilungen) und die
+    Abstände je Metrik ({Metrik: {ks, w1, js}}). Die Verteilungen bleiben
+    Histogramme: {side}_{key}_values / {side}_{key}_counts (verschiedene Werte
+    und ihre Häufigkeit), für cpl das Hop-Histogramm {side}_cpl_hist.
+    """
+    distances = topo_distances(real_stats, synth_stats)
+    n_real = real_stats['n']
+
+    # Approximierte Pfadmetriken kennzeichnen
+    real_approx = real_stats['approx']
+    synth_approx = synth_stats['approx']
+    approximated = real_approx['approx_nets'] or synth_approx['approx_nets']
+
+    row = {'level': level}
+    for key, field, diff_name in LEVEL_FIELDS:
+        real_sum = _hist_sum(real_stats['hists'][field])
+        synth_sum = _hist_sum(synth_stats['hists'][field])
+        row[f'real_mean_{key}'] = float(real_sum / n_real)
+        row[f'synth_mean_{key}'] = float(synth_sum / synth_stats['n'])
+        row[diff_name] = float((real_sum - synth_sum) / n_real)
+
+    # Verteilungsabstände (z. B. deg_ks, deg_w1, deg_js) zum automatischen Ranking
+    for key in TOPO_METRICS:
+        for name in DISTANCES:
+            row[f'{key}_{name}'] = distances[key][name]
+
+    # Verteilungen für Boxplots etc.
+    for key in TOPO_METRICS:
+        for side, stats in (('real', real_stats), ('synth', synth_stats)):
+            if key == 'cpl':
+                row[f'{side}_cpl_hist'] = _dense_hist(stats['hists']['cpl']).tolist()
+            else:
+                values, counts = stats['hists'][key]
+                row[f'{side}_{key}_values'] = np.asarray(values).tolist()
+                row[f'{side}_{key}_counts'] = np.asarray(counts, dtype=np.int64).tolist()
+
+    # Approximation: betroffene Metriken, Anzahl Netze, größter relativer Fehler
+    row['approx_metrics'] = 'cpl,diameter,bw' if approximated else ''
+    row.update({f'real_{k}': v for k, v in real_approx.items()})
+    row.update({f'synth_{k}': v for k, v in synth_approx.items()})
+    return row, distances
 
 class Comparer:
+    """
+    Vergleicht reale und synthetische Netze je Spannungsebene.
+    Mit approx=True werden Pfadlänge, Durchmesser und Betweenness über
+    Stichproben von Quellknoten geschätzt (Zielfehler target_error,
+    optional Zeitbudget time_budget in Sekunden pro Netz). Mit batched=True
+    werden die Netze blockweise als ein blockdiagonaler Graph ausgewertet
+    (siehe compute_topological_records), was bei vielen kleinen Netzen den
+    Aufwand je Netz und je Worker-Aufgabe spart.
+    """
 
-    def compare(self, real_nets: dict, synth_nets: dict) -> pd.DataFrame:
-        rows = []
-        distributions = {}
+    def __init__(self, approx=False, target_error=0.05, time_budget=None, workers=None, cache=None,
+                 batched=False):
+        self.approx = approx
+        self.target_error = target_error
+        self.time_budget = time_budget
+        # Anzahl Worker-Prozesse für die Metrikberechnung (1 = seriell)
+        self.workers = workers if workers is not None else min(cpu_count(), 8)
+        # Optionaler persistenter Metrik-Cache (MetricCache)
+        self.cache = cache
+        self.batched = batched
+        # Datensätze des letzten Vergleichs für den Ergebnisspeicher:
+        # {(level, side): [topologischer Datensatz]} bzw. {(level, side): [(name, Systemmetriken)]}
+        self.topo_records = {}
+        self.system_records = {}
+        # Verteilungsabstände der topologischen Metriken je Level: {level: {Metrik: {ks, w1, js}}}
+        self.topo_distances = {}
+        # Zusammenführbare Kenngrößen des letzten Vergleichs: {(level, side): level_stats}
+        self.stats = {}
+
+    def _map(self, func, items):
+        """
+        Wendet func parallel auf items an (eine Aufgabe je Netz, Reihenfolge bleibt
+        erhalten) und zählt die fertigen Netze in der Fortschrittszeile.
+        """
+        if self.workers <= 1 or len(items) <= 1:
+            return list(progress.track(map(func, items), "Metriken", total=len(items)))
+        workers = min(self.workers, len(items))
+        chunksize = max(1, len(items) // (workers * 4))
+        with Pool(workers) as pool:
+            return list(progress.track(pool.imap(func, items, chunksize=chunksize), "Metriken", total=len(items)))
+
+    def _map_batches(self, func, items):
+        """
+        Wie _map, aber func erhält Blöcke von bis zu BATCH_SIZE Netzen und
+        liefert je Block eine Ergebnisliste. Die Blöcke werden gleichmäßig auf
+        die Worker verteilt; gezählt werden weiterhin Netze.
+        """
+        workers = max(1, min(self.workers, len(items)))
+        size = max(1, min(BATCH_SIZE, -(-len(items) // workers)))
+        blocks = [items[start:start + size] for start in range(0, len(items), size)]
+        if workers <= 1 or len(blocks) <= 1:
+            results = map(func, blocks)
+            return list(progress.track((r for block in results for r in block), "Metriken", total=len(items)))
+        with Pool(workers) as pool:
+            results = pool.imap(func, blocks)
+            return list(progress.track((r for block in results for r in block), "Metriken", total=len(items)))
+
+    def _system_batch(self, nets):
+        """Systemmetriken einer Liste von Netzen spaltenweise auf einmal (siehe compute_system_metrics_batch)."""
+        with span("metric.system_batch", networks=len(nets)):
+            return compute_system_metrics_batch(nets)
+
+    def _cached_map(self, kind, compute, networks, payload):
+        """
+        Nutzt den Metrik-Cache: Nur Netze ohne gespeicherten Datensatz werden
+        berechnet, neue Ergebnisse danach abgelegt. compute(items) berechnet die
+        Ergebnisse einer Liste, payload(net) liefert das zugehörige Objekt.
+        """
+        if self.cache is None:
+            return compute([payload(n) for n in networks])
+        with span("cache.get", kind=kind.split(":")[0], networks=len(networks)):
+            keys = [metric_key(kind, n.content_hash()) for n in networks]
+            results = self.cache.get_many(keys)
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in results:
+                missing.setdefault(key, i)
+        computed = compute([payload(networks[i]) for i in missing.values()]) if missing else []
+        new = dict(zip(missing.keys(), computed))
+        with span("cache.put", kind=kind.split(":")[0], networks=len(new)):
+            self.cache.put_many(new)
+        results.update(new)
+        return [results[key] for key in keys]
+
+    def _topo_kind(self):
+        """Art der topologischen Datensätze für den Cache-Schlüssel."""
+        return f"topo:approx={self.target_error},{self.time_budget}" if self.approx else "topo"
+
+    def record_task(self):
+        """
+        Metrikfunktion für die Loader-Worker (iter_load(record=...)): Die Worker
+        berechnen die Datensätze selbst und senden nur diese zurück.
+        """
+        return partial(compute_network_record, levels=COMPARED_LEVELS, topo_kind=self._topo_kind(),
+                       approx=self.approx, target_error=self.target_error, time_budget=self.time_budget,
+                       cache_dir=os.path.dirname(self.cache.path) if self.cache is not None else None)
+
+    def network_records(self, networks: list) -> list:
+        """Berechnet die topologischen Datensätze mehrerer Netze parallel (bzw. aus dem Cache)."""
+        options = dict(approx=self.approx, target_error=self.target_error, time_budget=self.time_budget)
+        if self.batched:
+            compute = partial(self._map_batches, partial(compute_topological_records, **options))
+        else:
+            compute = partial(self._map, partial(compute_topological_record, **options))
+        # Nur die Topologie an die Worker senden, nicht das pandapower-Netz
+        records = self._cached_map(self._topo_kind(), compute, networks, lambda n: n.topology_only())
+        return [dict(r, name=n.name) for r, n in zip(records, networks)]
+
+    def compare(self, real_nets: dict, synth_nets: dict, all_levels: bool = False) -> pd.DataFrame:
+        """
+        Vergleicht die Netze je Level. Mit all_levels=True werden auch Level
+        ausgewertet, die nur eine Seite enthält (z. B. für Shards, siehe self.stats).
+        """
+        levels = [lvl for lvl in COMPARED_LEVELS if real_nets.get(lvl) and synth_nets.get(lvl)
+                  or all_levels and (real_nets.get(lvl) or synth_nets.get(lvl))]
+        # Alle Netze aller Level in einem Worker-Pool berechnen und danach je Level reduzieren
+        tasks = [(lvl, side, net) for lvl in levels
+                 for side, nets in (('real', real_nets), ('synth', synth_nets)) for net in nets[lvl]]
+        records = self.network_records([net for _, _, net in tasks])
+        grouped = {(lvl, side): [] for lvl in levels for side in ('real', 'synth')}
+        for (lvl, side, _), record in zip(tasks, records):
+            grouped[(lvl, side)].append(record)
+        return self.compare_records(grouped)
+
+    def stream_records(self, stream, system=True):
+        """
+        Verarbeitet einen Strom von (level, network) blockweise: Für jeden Block
+        werden die topologischen Datensätze (und optional die Systemmetriken)
+        berechnet, danach werden die Netze verworfen. Liefert (level, record, system).
+        """
+        compared = (item for item in stream if item[0] in COMPARED_LEVELS)
+        for chunk in chunked(compared, STREAM_CHUNK):
+            levels = [level for level, _ in chunk]
+            nets = [net for _, net in chunk]
+            del chunk
+            records = self.network_records(nets)
+            systems = self._cached_map("system", self._system_batch, nets, lambda n: n) \
+                if system else [None] * len(nets)
+            # Netze vor der Weitergabe der Datensätze freigeben
+            del nets
+            yield from zip(levels, records, systems)
 
-        for level in ['MV', 'LV']:
-            real_list = real_nets.get(level, [])
-            synth_list = synth_nets.get(level, [])
-            if not real_list or not synth_list:
+    def worker_records(self, stream):
+        """
+        Wie stream_records, aber für Ströme von (level, Ergebnis) aus Loadern mit
+        record=self.record_task(): Die Metriken wurden bereits in den Workern
+        berechnet, neue Einträge werden hier blockweise im Cache abgelegt.
+        """
+        new = {}
+        for level, result in stream:
+            if result is None or result['topo'] is None:
                 continue
+            new.update(result['new'])
+            if self.cache is not None and len(new) >= STREAM_CHUNK:
+                self.cache.put_many(new)
+                new = {}
+            yield level, dict(result['topo'], name=result['name']), result['system']
+        if self.cache is not None:
+            self.cache.put_many(new)
 
-            distributions[level] = {
-                'real': {'deg': [], 'cc': [], 'cpl': [], 'bw': [], 'mesh': [], 'assort': []},
-                'synth': {'deg': [], 'cc': [], 'cpl': [], 'bw': [], 'mesh': [], 'assort': []}
-            }
-
-            # Topologische Metriken berechnen
-            real_deg = [compute_node_degree_metrics(n) for n in real_list]
-            synth_deg = [compute_node_degree_metrics(n) for n in synth_list]
-            real_cc = [compute_clustering_coefficient(n) for n in real_list]
-            synth_cc = [compute_clustering_coefficient(n) for n in synth_list]
-            real_cpl = [compute_characteristic_path_length(n) for n in real_list]
-            synth_cpl = [compute_characteristic_path_length(n) for n in synth_list]
-            real_diams = [compute_graph_diameter(n)[0] for n in real_list]
-            synth_diams = [compute_graph_diameter(n)[0] for n in synth_list]
-            real_bw = [compute_betweenness_centrality(n) for n in real_list]
-            synth_bw = [compute_betweenness_centrality(n) for n in synth_list]
-
-            # NEU: Meshness (Vermaschtheitsgrad) & Degree Assortativity
-            real_mesh = [compute_meshness(n) for n in real_list]
-            synth_mesh = [compute_meshness(n) for n in synth_list]
-            real_assort = [compute_degree_assortativity(n) for n in real_list]
-            synth_assort = [compute_degree_assortativity(n) for n in synth_list]
-
-            # Verteilungen extrahieren
-            for d in real_deg: distributions[level]['real']['deg'].extend(d[2])
-            for d in synth_deg: distributions[level]['synth']['deg'].extend(d[2])
-            for d in real_cc: distributions[level]['real']['cc'].extend(d[2])
-            for d in synth_cc: distributions[level]['synth']['cc'].extend(d[2])
-            for d in real_cpl: distributions[level]['real']['cpl'].extend(d[2])
-            for d in synth_cpl: distributions[level]['synth']['cpl'].extend(d[2])
-            for d in real_bw: distributions[level]['real']['bw'].extend(d[2])
-            for d in synth_bw: distributions[level]['synth']['bw'].extend(d[2])
-            distributions[level]['real']['mesh'] = real_mesh
-            distributions[level]['synth']['mesh'] = synth_mesh
-            distributions[level]['real']['assort'] = real_assort
-            distributions[level]['synth']['assort'] = synth_assort
-            distributions[level]['real']['diameter'] = real_diams
-            distributions[level]['synth']['diameter'] = synth_diams
-            distributions[level]['real']['diameter'] = real_diams
-            distributions[level]['synth']['diameter'] = synth_diams
-
-            # Zeile für DataFrame (inkl. NEUER METRIKEN)
-            row = {
-                'level': level,
-                'real_mean_deg': sum(d[0] for d in real_deg) / len(real_deg),
-                'synth_mean_deg': sum(d[0] for d in synth_deg) / len(synth_deg),
-                'deg_diff': (sum(d[0] for d in real_deg) - sum(d[0] for d in synth_deg)) / len(real_deg),
-
-                'real_mean_cc': sum(d[0] for d in real_cc) / len(real_cc),
-                'synth_mean_cc': sum(d[0] for d in synth_cc) / len(synth_cc),
-                'cc_diff': (sum(d[0] for d in real_cc) - sum(d[0] for d in synth_cc)) / len(real_cc),
-
-                'real_mean_cpl': sum(d[0] for d in real_cpl) / len(real_cpl),
-                'synth_mean_cpl': sum(d[0] for d in synth_cpl) / len(synth_cpl),
-                'cpl_diff': (sum(d[0] for d in real_cpl) - sum(d[0] for d in synth_cpl)) / len(real_cpl),
-
-                'real_mean_diameter': sum(real_diams) / len(real_diams),
-                'synth_mean_diameter': sum(synth_diams) / len(synth_diams),
-                'diam_diff': (sum(real_diams) - sum(synth_diams)) / len(real_diams),
-
-                'real_mean_bw': sum(d[0] for d in real_bw) / len(real_bw),
-                'synth_mean_bw': sum(d[0] for d in synth_bw) / len(synth_bw),
-                'bw_diff': (sum(d[0] for d in real_bw) - sum(d[0] for d in synth_bw)) / len(real_bw),
-
-                'real_mean_mesh': sum(real_mesh) / len(real_mesh),
-                'synth_mean_mesh': sum(synth_mesh) / len(synth_mesh),
-                'mesh_diff': (sum(real_mesh) - sum(synth_mesh)) / len(real_mesh),
-
-                'real_mean_assort': sum(real_assort) / len(real_assort),
-                'synth_mean_assort': sum(synth_assort) / len(synth_assort),
-                'assort_diff': (sum(real_assort) - sum(synth_assort)) / len(real_assort),
-
-                # Verteilungen für Boxplots etc.
-                'real_deg_distrib': distributions[level]['real']['deg'],
-                'synth_deg_distrib': distributions[level]['synth']['deg'],
-                'real_cc_distrib': distributions[level]['real']['cc'],
-                'synth_cc_distrib': distributions[level]['synth']['cc'],
-                'real_cpl_distrib': distributions[level]['real']['cpl'],
-                'synth_cpl_distrib': distributions[level]['synth']['cpl'],
-                'real_bw_distrib': distributions[level]['real']['bw'],
-                'synth_bw_distrib': distributions[level]['synth']['bw'],
-                'real_mesh_distrib': distributions[level]['real']['mesh'],
-                'synth_mesh_distrib': distributions[level]['synth']['mesh'],
-                'real_assort_distrib': distributions[level]['real']['assort'],
-                'synth_assort_distrib': distributions[level]['synth']['assort'],
-                'real_diameter_distrib': distributions[level]['real']['diameter'],
-                'synth_diameter_distrib': distributions[level]['synth']['diameter']
-            }
-            rows.append(row)
+    def compare_stream(self, real_stream, synth_stream, in_workers=False):
+        """
+        Streaming-Variante von compare und compare_system_metrics: Netze werden
+        verarbeitet, sobald der Loader sie liefert, und nur die kompakten
+        Datensätze bleiben erhalten. Mit in_workers=True liefern die Ströme
+        bereits in den Loader-Workern berechnete Ergebnisse (siehe record_task).
+        Rückgabe: (DataFrame, Systemmetriken je Seite).
+        """
+        records = self.worker_records if in_workers else self.stream_records
+        return self.compare_entries(records(real_stream), records(synth_stream))
+
+    def compare_entries(self, real_entries, synth_entries):
+        """
+        Vergleicht bereits berechnete Einträge (level, Datensatz, Systemmetriken)
+        beider Seiten, z. B. aus compare_stream oder incremental_entries.
+        Rückgabe: (DataFrame, Systemmetriken je Seite).
+        """
+        grouped = {}
+        system = {'real': [], 'synth': []}
+        self.system_records = {}
+        for side, entries in (('real', real_entries), ('synth', synth_entries)):
+            for level, record, metrics in entries:
+                grouped.setdefault((level, side), []).append(record)
+                system[side].append(dict(metrics))
+                self.system_records.setdefault((level, side), []).append((record['name'], metrics))
+        return self.compare_records(grouped), system
+
+    def manifest_config(self, loader) -> str:
+        """Einstellungen, von denen die im Korpus-Manifest gespeicherten Einträge abhängen."""
+        return metric_key(self._topo_kind(), f"{type(loader).__name__}:{','.join(COMPARED_LEVELS)}")
+
+    def incremental_entries(self, loader, manifest, label="Netze") -> list:
+        """
+        Einträge (level, Datensatz, Systemmetriken) aller Netze eines Korpus mit
+        Hilfe des Manifests (siehe analysis/manifest.py): Nur neue oder geänderte
+        Quellen werden geladen und in den Loader-Workern ausgewertet, entfernte
+        Quellen fallen weg, alle anderen Einträge stammen aus dem Manifest.
+        Die Reihenfolge folgt der sortierten Quellenliste des Loaders.
+        """
+        sources = loader.list_sources()
+        with span("manifest.diff", networks=len(sources)):
+            known, changed, removed = manifest.diff(sources)
+        log.info("Manifest %s: %d unverändert, %d neu oder geändert, %d entfernt",
+                 label, len(known), len(changed), len(removed))
+        loaded, new = {}, {}
+        if changed:
+            stream = progress.track(loader.iter_load(record=self.record_task(), sources=changed), label)
+            for level, result in stream:
+                new.update(result['new'])
+                if self.cache is not None and len(new) >= STREAM_CHUNK:
+                    self.cache.put_many(new)
+                    new = {}
+                entries = loaded.setdefault(result['source'], [])
+                if result['topo'] is not None:
+                    entries.append((level, dict(result['topo'], name=result['name']), result['system']))
+            if self.cache is not None:
+                self.cache.put_many(new)
+        # Quellen ohne Ergebnis (Lesefehler) werden nicht eingetragen und beim nächsten Lauf erneut versucht
+        with span("manifest.update", networks=len(loaded)):
+            manifest.update(loaded, removed)
+        known.update(loaded)
+        return [entry for source in sources for entry in known.get(source, [])]
+
+    def compare_records(self, grouped: dict) -> pd.DataFrame:
+        """Reduziert bereits berechnete Datensätze {(level, side): [record, ...]} je Level."""
+        # Für den Ergebnisspeicher (write_results) aufheben statt als JSON zu schreiben
+        self.topo_records = {key: records for key, records in grouped.items() if records}
+        with span("compare.level_stats"):
+            stats = {key: level_stats(records) for key, records in self.topo_records.items()}
+        return self.compare_stats(stats)
 
-        # JSON speichern
-        with open("topological_distributions.json", "w") as f:
-            json.dump(distributions, f, indent=2)
+    def compare_stats(self, stats: dict) -> pd.DataFrame:
+        """
+        Erzeugt die Ergebnistabelle aus den Kenngrößen {(level, side): level_stats}
+        für alle Level mit Netzen auf beiden Seiten. Die Kenngrößen bleiben in
+        self.stats erhalten (z. B. für Shards, siehe analysis/shards.py).
+        Im Ergebnisspeicher bleiben nur die topologischen Datensätze dieser
+        Level, unabhängig davon, ob gestreamt, inkrementell oder auf einmal
+        verglichen wurde.
+        """
+        self.stats = stats
+        rows = []
+        self.topo_distances = {}
+        levels = [lvl for lvl in COMPARED_LEVELS if (lvl, 'real') in stats and (lvl, 'synth') in stats]
+        self.topo_records = {key: records for key, records in self.topo_records.items() if key[0] in levels}
+        for level in levels:
+            with span("compare.summarize_level", level=level):
+                row, self.topo_distances[level] = summarize_level(level, stats[(level, 'real')],
+                                                                  stats[(level, 'synth')])
+            rows.append(row)
 
         df = pd.DataFrame(rows)
         # plot_topological_comparison(df)  # Optionaler Plot
         return df
 
     def compare_system_metrics(self, networks: dict, label: str) -> list:
-        return [compute_system_metrics(net) for net in networks.get('MV', []) + networks.get('LV', [])]
+        tagged = [(lvl, net) for lvl in COMPARED_LEVELS for net in networks.get(lvl, [])]
+        nets = [net for _, net in tagged]
+        # Spaltenweise über alle Netze auf einmal, daher ohne Worker-Pool
+        metrics = self._cached_map("system", self._system_batch, nets, lambda n: n)
+        side = SIDES.get(label, label.lower())
+        for lvl in COMPARED_LEVELS:
+            self.system_records.pop((lvl, side), None)
+        for (lvl, net), m in zip(tagged, metrics):
+            self.system_records.setdefault((lvl, side), []).append((net.name, m))
+        return [dict(m) for m in metrics]
+
+    def distance_table(self) -> pd.DataFrame:
+        """
+        KS-, Wasserstein-1- und Jensen-Shannon-Abstand zwischen real und synthetisch
+        für jede topologische und jede Systemmetrik je Level (eine Zeile je
+        Level und Metrik), z. B. um mehrere Generatorläufe zu vergleichen.
+        """
+        rows = []
+        for level, distances in self.topo_distances.items():
+            rows.extend({'level': level, 'group': 'topo', 'metric': key, **d} for key, d in distances.items())
+        for level in COMPARED_LEVELS:
+            real = [m for _, m in self.system_records.get((level, 'real'), [])]
+            synth = [m for _, m in self.system_records.get((level, 'synth'), [])]
+            if real and synth:
+                rows.extend({'level': level, 'group': 'system', 'metric': key, **d}
+                            for key, d in system_distances(real, synth).items())
+        return pd.DataFrame(rows, columns=['level', 'group', 'metric', *DISTANCES])
+
+    def write_results(self, output_dir: str, fmt: str = "parquet") -> list:
+        """Schreibt die Datensätze des letzten Vergleichs in den Ergebnisspeicher (siehe results_store)."""
+        from real_vs_synth.analysis.results_store import write_results
+        return write_results(output_dir, self.topo_records, self.system_records, fmt, self.distance_table())
 
     def plot_system_metrics(self, real_nets: dict, synth_nets: dict):
         real_metrics = self.compare_system_metrics(real_nets, "Real")
         synth_metrics = self.compare_system_metrics(synth_nets, "Synthetic")
         labels = ["Real"] * len(real_metrics) + ["Synthetic"] * len(synth_metrics)
         metrics = real_metrics + synth_metrics
+        from real_vs_synth.viz.plt_comparison import plot_system_metrics
         plot_system_metrics(metrics, labels)
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+
+# Blockgröße beim Hashen von Quelldateien
+HASH_BLOCK = 1 << 20
+
+
+def _source_files(path: str) -> list:
+    """Dateien einer Quelle: die Datei selbst bzw. alle Dateien eines Netzordners (CSV)."""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if os.path.isfile(os.path.join(path, f)))
+    return [path]
+
+
+def source_stat(path: str):
+    """(Größe in Byte, jüngste Änderungszeit in ns) einer Quelle."""
+    stats = [os.stat(f) for f in _source_files(path)]
+    return sum(s.st_size for s in stats), max((s.st_mtime_ns for s in stats), default=0)
+
+
+def source_hash(path: str) -> str:
+    """SHA-1 über Namen und Inhalt aller Dateien einer Quelle."""
+    digest = hashlib.sha1()
+    for file in _source_files(path):
+        digest.update(os.path.basename(file).encode("utf-8"))
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class CorpusManifest:
+    """
+    Manifest eines Eingabekorpus (SQLite im Verzeichnis `manifest_dir`): je
+    Quelle (Datei bzw. CSV-Ordner) Pfad, Größe, Änderungszeit und Inhalts-Hash
+    sowie die daraus berechneten Einträge [(level, Datensatz, Systemmetriken)].
+    Bei einem erneuten Lauf müssen so nur neue oder geänderte Quellen geladen
+    werden. Ändert sich `config` (Metrik-Version, Näherung, Loader), werden
+    alle gespeicherten Einträge verworfen. Pfade werden relativ zum Korpus
+    gespeichert, damit das Arbeitsverzeichnis keine Rolle spielt.
+    """
+
+    def __init__(self, manifest_dir: str, corpus: str, config: str):
+        os.makedirs(manifest_dir, exist_ok=True)
+        self.corpus = os.path.abspath(corpus)
+        digest = hashlib.sha1(self.corpus.encode("utf-8")).hexdigest()[:12]
+        self.path = os.path.join(manifest_dir, f"{os.path.basename(self.corpus)}-{digest}.sqlite")
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, hash TEXT NOT NULL, "
+            "entries BLOB NOT NULL)"
+        )
+        stored = self._conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        if stored is None or stored[0] != config:
+            self._conn.execute("DELETE FROM sources")
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('config', ?)", (config,))
+        self._conn.commit()
+        # Größe, Änderungszeit und Hash der zuletzt als geändert erkannten Quellen (vor dem Laden erfasst)
+        self._pending = {}
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.corpus)
+
+    def diff(self, sources: list):
+        """
+        Vergleicht die aktuelle Quellenliste mit dem Manifest. Quellen mit
+        unveränderter Größe und Änderungszeit gelten als unverändert; sonst
+        entscheidet der Inhalts-Hash (z. B. nur berührte Dateien).
+        Rückgabe: (unverändert {Quelle: Einträge}, geänderte bzw. neue Quellen,
+        entfernte Quellen als Schlüssel relativ zum Korpus).
+        """
+        rows = {key: (size, mtime, digest) for key, size, mtime, digest
+                in self._conn.execute("SELECT path, size, mtime_ns, hash FROM sources")}
+        unchanged, changed, touched = {}, [], []
+        self._pending = {}
+        for path in sources:
+            key = self._key(path)
+            stat = source_stat(path)
+            row = rows.get(key)
+            if row is not None and row[:2] == stat:
+                unchanged[key] = path
+                continue
+            digest = source_hash(path)
+            if row is not None and row[2] == digest:
+                unchanged[key] = path
+                touched.append((*stat, key))
+            else:
+                changed.append(path)
+                self._pending[key] = (*stat, digest)
+        if touched:
+            self._conn.executemany("UPDATE sources SET size = ?, mtime_ns = ? WHERE path = ?", touched)
+            self._conn.commit()
+        removed = sorted(set(rows) - {self._key(path) for path in sources})
+        return self._entries(unchanged), changed, removed
+
+    def _entries(self, paths: dict) -> dict:
+        """Gespeicherte Einträge für {Schlüssel: Pfad}, zurück als {Pfad: Einträge}."""
+        found = {}
+        keys = list(paths)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(f"SELECT path, entries FROM sources WHERE path IN ({marks})", chunk)
+            found.update((paths[key], pickle.loads(blob)) for key, blob in rows)
+        return found
+
+    def update(self, entries: dict, removed=()):
+        """Speichert die Einträge neu geladener Quellen {Quelle: [...]} und entfernt gelöschte Quellen."""
+        rows = []
+        for path, items in entries.items():
+            key = self._key(path)
+            size, mtime, digest = self._pending.get(key) or (*source_stat(path), source_hash(path))
+            rows.append((key, size, mtime, digest, pickle.dumps(items, protocol=pickle.HIGHEST_PROTOCOL)))
+        self._conn.executemany("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)", rows)
+        self._conn.executemany("DELETE FROM sources WHERE path = ?", [(path,) for path in removed])
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
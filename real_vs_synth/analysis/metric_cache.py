@@ -0,0 +1,75 @@
+import os
+import pickle
+import sqlite3
+import time
+
+
+class MetricCache:
+    """
+    Persistenter Metrik-Cache (SQLite) im Verzeichnis `cache_dir`.
+    Schlüssel bestehen aus Metrik-Version, Art des Datensatzes und dem
+    Inhalts-Hash der Netztabellen (siehe Network.content_hash), Werte sind
+    die gepickelten Metrik-Datensätze. Überschreitet der Cache `max_bytes`,
+    werden die am längsten nicht genutzten Einträge entfernt.
+    """
+
+    def __init__(self, cache_dir: str = ".metric_cache", max_bytes: int = 1024 ** 3):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "metrics.sqlite")
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS metrics_access ON metrics(last_access)")
+        self._conn.commit()
+
+    def get_many(self, keys: list) -> dict:
+        """Liefert alle vorhandenen Einträge zu `keys` als Dict und aktualisiert deren Zugriffszeit."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(f"SELECT key, value FROM metrics WHERE key IN ({marks})", chunk)
+            found.update((key, pickle.loads(value)) for key, value in rows)
+        if found:
+            now = time.time()
+            self._conn.executemany("UPDATE metrics SET last_access = ? WHERE key = ?",
+                                   [(now, key) for key in found])
+            self._conn.commit()
+        return found
+
+    def put_many(self, items: dict):
+        """Speichert Einträge und entfernt danach bei Bedarf alte Einträge."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, blob, len(blob), now))
+        self._conn.executemany("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?)", rows)
+        self._conn.commit()
+        self._evict()
+
+    def size(self) -> int:
+        return int(self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM metrics").fetchone()[0])
+
+    def _evict(self):
+        """Entfernt die am längsten nicht genutzten Einträge, bis der Cache unter max_bytes liegt."""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        doomed, freed = [], 0
+        for key, size in self._conn.execute("SELECT key, size FROM metrics ORDER BY last_access"):
+            if freed >= excess:
+                break
+            doomed.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM metrics WHERE key = ?", doomed)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,208 @@
+import logging
+import os
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+# Dateiformate des Ergebnisspeichers: Name -> Dateiendung
+RESULT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+# Tabelle der Skalare je Netz und Tabelle der Einzelwerte je Knoten bzw. Hop-Distanz
+SCALARS_TABLE = "networks"
+VALUES_TABLE = "values"
+# Verteilungsabstände real/synthetisch je Level und Metrik (Comparer.distance_table)
+DISTANCES_TABLE = "distances"
+# Arrays der topologischen Datensätze (cpl_hist: Anzahl Knotenpaare je Hop-Distanz)
+TOPO_ARRAYS = {"deg": np.int32, "cc": np.float64, "bw": np.float64, "cpl_hist": np.int64}
+# Ganzzahlige Skalare, die beim Einlesen wieder zu int werden
+INT_METRICS = ("mesh", "diameter", "trafo_count", "sources")
+
+log = logging.getLogger(__name__)
+
+
+def _table_path(output_dir, table, fmt):
+    return os.path.join(output_dir, table + RESULT_FORMATS[fmt])
+
+
+def _network_ids(topo, system):
+    """
+    Vergibt je (level, side, Position) eine Netz-ID. Topologische Datensätze und
+    Systemmetriken liegen je (level, side) in derselben Reihenfolge vor.
+    """
+    keys = list(dict.fromkeys(list(topo) + list(system)))
+    ids, next_id = {}, 0
+    for key in keys:
+        count = max(len(topo.get(key, [])), len(system.get(key, [])))
+        ids[key] = range(next_id, next_id + count)
+        next_id += count
+    return ids
+
+
+def _long_tables(topo, system):
+    """Baut die beiden Long-Format-Tabellen (Skalare, Einzelwerte) aus den Datensätzen."""
+    scalars = {"network_id": [], "side": [], "level": [], "name": [], "kind": [], "metric": [], "value": []}
+    values = {"network_id": [], "metric": [], "index": [], "value": []}
+
+    def scalar(net_id, level, side, name, kind, metric, value):
+        for col, v in zip(scalars, (net_id, side, level, name, kind, metric, value)):
+            scalars[col].append(v)
+
+    def array(net_id, metric, arr, sparse=False):
+        arr = np.asarray(arr, dtype=np.float64)
+        index = np.flatnonzero(arr) if sparse else np.arange(len(arr))
+        values["network_id"].append(np.full(len(index), net_id, dtype=np.int32))
+        values["metric"].append(np.full(len(index), metric, dtype=object))
+        values["index"].append(index.astype(np.int32))
+        values["value"].append(arr[index])
+
+    for (level, side), net_ids in _network_ids(topo, system).items():
+        records = topo.get((level, side), [])
+        systems = system.get((level, side), [])
+        for i, net_id in enumerate(net_ids):
+            record = records[i] if i < len(records) else None
+            sys_name, metrics = systems[i] if i < len(systems) else (None, None)
+            name = str((record.get("name") if record is not None else sys_name) or "")
+            if record is not None:
+                for key, v in record.items():
+                    if key in TOPO_ARRAYS:
+                        # Hop-Histogramm dünn speichern (nur belegte Distanzen)
+                        array(net_id, key, v, sparse=(key == "cpl_hist"))
+                    elif key == "approx":
+                        for k, a in (v or {}).items():
+                            scalar(net_id, level, side, name, "approx", k, float(a))
+                    elif key != "name":
+                        scalar(net_id, level, side, name, "topo", key, float(v))
+            for key, v in (metrics or {}).items():
+                if isinstance(v, (list, tuple, np.ndarray)):
+                    # Listen als Einzelwerte; die Länge bleibt als Skalar erhalten (auch für leere Listen)
+                    array(net_id, key, v)
+                    scalar(net_id, level, side, name, "system_list", key, float(len(v)))
+                else:
+                    scalar(net_id, level, side, name, "system", key, float(v))
+
+    scalars_df = pd.DataFrame(scalars)
+    for col in ("side", "level", "kind", "metric"):
+        scalars_df[col] = scalars_df[col].astype("category")
+    scalars_df["network_id"] = scalars_df["network_id"].astype(np.int32)
+    if values["value"]:
+        values_df = pd.DataFrame({col: np.concatenate(parts) for col, parts in values.items()})
+    else:
+        values_df = pd.DataFrame({"network_id": np.empty(0, np.int32), "metric": np.empty(0, object),
+                                  "index": np.empty(0, np.int32), "value": np.empty(0)})
+    values_df["metric"] = values_df["metric"].astype("category")
+    return scalars_df, values_df
+
+
+def write_results(output_dir, topo, system, fmt="parquet", distances=None):
+    """
+    Schreibt die Netz-Datensätze als zwei Long-Format-Tabellen nach output_dir:
+        networks: network_id, side, level, name, kind (topo/approx/system/system_list), metric, value
+        values:   network_id, metric, index (Knoten bzw. Hop-Distanz), value
+    topo = {(level, side): [topologischer Datensatz, ...]},
+    system = {(level, side): [(name, Systemmetriken), ...]}.
+    Optional wird die Tabelle der Verteilungsabstände als `distances` abgelegt.
+    Gibt die Pfade zurück (leer, falls pyarrow fehlt).
+    """
+    if find_spec("pyarrow") is None:
+        log.warning("pyarrow ist nicht installiert – Ergebnisspeicher wird nicht geschrieben (pip install pyarrow)")
+        return []
+    tables = list(zip((SCALARS_TABLE, VALUES_TABLE), _long_tables(topo, system)))
+    if distances is not None:
+        tables.append((DISTANCES_TABLE, distances))
+    return [write_table(output_dir, table, df, fmt) for table, df in tables]
+
+
+def write_table(output_dir, table, df, fmt="parquet"):
+    """Schreibt eine einzelne Tabelle des Ergebnisspeichers und gibt ihren Pfad zurück."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = _table_path(output_dir, table, fmt)
+    df = df.reset_index(drop=True)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+    return path
+
+
+def _read_table(output_dir, table):
+    for fmt, suffix in RESULT_FORMATS.items():
+        path = os.path.join(output_dir, table + suffix)
+        if os.path.exists(path):
+            return pd.read_parquet(path) if fmt == "parquet" else pd.read_feather(path)
+    raise FileNotFoundError(f"Keine Ergebnistabelle '{table}' in {output_dir}")
+
+
+def _pivot(scalars, *kinds):
+    """
+    Skalare der Arten `kinds` je Netz-ID als Dict {Metrik: Wert} in gespeicherter
+    Reihenfolge. Enthält nur die Metriken, die für das Netz geschrieben wurden
+    (gespeicherte nan-Werte bleiben erhalten).
+    """
+    part = scalars[scalars["kind"].isin(kinds)]
+    rows = {}
+    for net_id, metric, value in zip(part["network_id"].tolist(), part["metric"].astype(str), part["value"].tolist()):
+        rows.setdefault(net_id, {})[metric] = value
+    return rows
+
+
+def _row_dict(row):
+    return {k: int(v) if k in INT_METRICS and not pd.isna(v) else float(v) for k, v in row.items()}
+
+
+def _split_values(values):
+    """{network_id: {metric: Array}} aus der Werte-Tabelle (Gruppen über sortierte Schlüssel)."""
+    if values.empty:
+        return {}
+    values = values.sort_values(["network_id", "metric", "index"], kind="stable")
+    net_ids = values["network_id"].to_numpy()
+    metrics = values["metric"].astype(str).to_numpy()
+    starts = np.flatnonzero(np.r_[True, (net_ids[1:] != net_ids[:-1]) | (metrics[1:] != metrics[:-1])])
+    ends = np.r_[starts[1:], len(values)]
+    index, value = values["index"].to_numpy(), values["value"].to_numpy()
+    result = {}
+    for s, e in zip(starts, ends):
+        result.setdefault(int(net_ids[s]), {})[metrics[s]] = (index[s:e], value[s:e])
+    return result
+
+
+def read_distances(output_dir):
+    """Liest die Tabelle der Verteilungsabstände (level, group, metric, ks, w1, js)."""
+    return _read_table(output_dir, DISTANCES_TABLE)
+
+
+def read_results(output_dir):
+    """
+    Liest den Ergebnisspeicher und baut die Datensätze wieder auf.
+    Rückgabe: (topo, system) in derselben Form wie bei write_results.
+    """
+    scalars = _read_table(output_dir, SCALARS_TABLE)
+    arrays = _split_values(_read_table(output_dir, VALUES_TABLE))
+    meta = scalars.drop_duplicates("network_id").sort_values("network_id")
+    topo_rows, approx_rows = _pivot(scalars, "topo"), _pivot(scalars, "approx")
+    system_rows = _pivot(scalars, "system", "system_list")
+    list_metrics = set(scalars.loc[scalars["kind"] == "system_list", "metric"].astype(str))
+
+    topo, system = {}, {}
+    for net_id, level, side, name in zip(meta["network_id"].tolist(), meta["level"].astype(str),
+                                         meta["side"].astype(str), meta["name"]):
+        key = (level, side)
+        net_arrays = arrays.get(net_id, {})
+        if net_id in topo_rows:
+            record = {"name": name, **_row_dict(topo_rows[net_id])}
+            for metric, dtype in TOPO_ARRAYS.items():
+                index, value = net_arrays.get(metric, (np.empty(0, np.int32), np.empty(0)))
+                size = int(index.max()) + 1 if len(index) else 0
+                arr = np.zeros(size, dtype=dtype)
+                arr[index] = value
+                record[metric] = arr
+            approx = _row_dict(approx_rows.get(net_id, {}))
+            if approx:
+                approx["exact"] = bool(approx["exact"])
+            record["approx"] = approx or None
+            topo.setdefault(key, []).append(record)
+        if net_id in system_rows:
+            metrics = _row_dict(system_rows[net_id])
+            for metric in list_metrics & set(metrics):
+                metrics[metric] = net_arrays[metric][1].tolist() if metric in net_arrays else []
+            system.setdefault(key, []).append((name, metrics))
+    return topo, system
@@ -0,0 +1,75 @@
+import os
+import pickle
+
+from real_vs_synth.analysis.comparer import merge_stats
+
+# Version des Shard-Formats; Shards unterschiedlicher Versionen werden nicht zusammengeführt
+SHARD_VERSION = 1
+
+
+def parse_shard(text: str):
+    """'INDEX/COUNT' (Index ab 0, z. B. '3/16') -> (index, count)."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Ungültige Shard-Angabe '{text}', erwartet INDEX/ANZAHL, z. B. 0/8")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Ungültige Shard-Angabe '{text}': Index muss zwischen 0 und {count - 1} liegen")
+    return index, count
+
+
+def shard_path(shard_dir: str, shard) -> str:
+    index, count = shard
+    return os.path.join(shard_dir, f"shard-{index:05d}-of-{count:05d}.pkl")
+
+
+def write_shard(shard_dir: str, shard, stats: dict, system: dict, config: dict) -> str:
+    """
+    Schreibt das Teilergebnis eines Shards: die zusammenführbaren Kenngrößen
+    {(level, side): level_stats}, die Systemmetriken {(level, side): [(name, Metriken)]}
+    und die Einstellungen des Laufs (müssen bei allen Shards übereinstimmen).
+    Die Datei wird erst unter einem temporären Namen geschrieben und dann umbenannt.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    path = shard_path(shard_dir, shard)
+    payload = {"version": SHARD_VERSION, "shard": tuple(shard), "config": config,
+               "stats": stats, "system": system}
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return path
+
+
+def read_shards(shard_dir: str):
+    """
+    Liest alle Shards aus shard_dir, prüft Vollständigkeit und Einstellungen
+    und führt sie zusammen. Rückgabe: (stats, system, config) wie bei einem
+    Lauf über alle Netze; die Systemmetriken folgen der Reihenfolge der Shards.
+    """
+    files = sorted(f for f in os.listdir(shard_dir) if f.startswith("shard-") and f.endswith(".pkl"))
+    if not files:
+        raise FileNotFoundError(f"Keine Shards in {shard_dir}")
+    shards = []
+    for file in files:
+        with open(os.path.join(shard_dir, file), "rb") as f:
+            shards.append(pickle.load(f))
+
+    counts = {s["shard"][1] for s in shards}
+    if len(counts) != 1 or any(s["version"] != SHARD_VERSION for s in shards):
+        raise ValueError(f"Shards in {shard_dir} stammen aus unterschiedlichen Aufteilungen oder Versionen")
+    count = counts.pop()
+    missing = sorted(set(range(count)) - {s["shard"][0] for s in shards})
+    if missing:
+        raise ValueError(f"Es fehlen {len(missing)} von {count} Shards, z. B. Index {missing[0]}")
+    config = shards[0]["config"]
+    if any(s["config"] != config for s in shards):
+        raise ValueError("Shards wurden mit unterschiedlichen Einstellungen berechnet")
+
+    shards.sort(key=lambda s: s["shard"][0])
+    keys = list(dict.fromkeys(key for s in shards for key in list(s["stats"]) + list(s["system"])))
+    stats = {key: merge_stats([s["stats"][key] for s in shards if key in s["stats"]])
+             for key in keys if any(key in s["stats"] for s in shards)}
+    system = {key: [entry for s in shards for entry in s["system"].get(key, [])]
+              for key in keys if any(key in s["system"] for s in shards)}
+    return stats, system, config
@@ -1,25 +1,34 @@
+import logging
 import os
 import pandapower as pp
-from multiprocessing import Pool, cpu_count
+from real_vs_synth.instrumentation import span
 from real_vs_synth.model.network import Network
+from real_vs_synth.data.streaming import stream_map, apply_record, collect_levels, select_shard
 
-def process_csv_folder(folder_path):
-    try:
-        pp_net = pp.from_csv_folder(folder_path)
-    except Exception as e:
-        return (None, None, folder_path, None, None, str(e))
-    vn_values = pp_net.bus["vn_kv"].tolist()
-    mean_vn = sum(vn_values) / len(vn_values) if vn_values else 0.0
-    if mean_vn > 50:
-        level = "EHV"
-    elif mean_vn > 20:
-        level = "HV"
-    elif mean_vn > 5:
-        level = "MV"
-    else:
-        level = "LV"
-    net_obj = Network.from_pandapower(pp_net)
-    return (level, net_obj, folder_path, mean_vn, vn_values, None)
+log = logging.getLogger(__name__)
+
+def process_csv_folder(args):
+    folder_path, record = args
+    name = os.path.basename(os.path.normpath(folder_path))
+    with span("load", network=name):
+        try:
+            with span("load.read"):
+                pp_net = pp.from_csv_folder(folder_path)
+        except Exception as e:
+            return (None, None, folder_path, None, str(e))
+        vn_values = pp_net.bus["vn_kv"].tolist()
+        mean_vn = sum(vn_values) / len(vn_values) if vn_values else 0.0
+        if mean_vn > 50:
+            level = "EHV"
+        elif mean_vn > 20:
+            level = "HV"
+        elif mean_vn > 5:
+            level = "MV"
+        else:
+            level = "LV"
+        net_obj = Network.from_pandapower(pp_net)
+    net_obj.name, net_obj.source = name, folder_path
+    return (level, apply_record(record, level, net_obj), folder_path, mean_vn, None)
 
 class CsvLoader:
     """
@@ -31,21 +40,31 @@ class CsvLoader:
         self.base_folder = base_folder
 
     def load(self, path: str = None) -> dict:
-        result = {"EHV": [], "HV": [], "MV": [], "LV": []}
-        folder_args = []
+        return collect_levels(self.iter_load(path))
+
+    def list_sources(self) -> list:
+        """Sortierte Pfade aller Netzordner (mit bus.csv) unterhalb von base_folder."""
+        folders = []
         for root, dirs, files in os.walk(self.base_folder):
             if "bus.csv" in files:
-                folder_args.append(root)
+                folders.append(root)
+        return sorted(folders)
+
+    def iter_load(self, path: str = None, record=None, shard=None, sources=None):
+        """
+        Liefert die Netze nacheinander als (level, network), ohne alle gleichzeitig zu halten.
+        Mit record (siehe Comparer.record_task) berechnen die Worker die Metriken selbst
+        und es werden stattdessen (level, Datensatz) geliefert. Mit shard = (index, count)
+        wird nur der entsprechende Teil der (sortierten) Dateiliste geladen, mit sources
+        nur die angegebenen Quellen (siehe list_sources).
+        """
+        sources = self.list_sources() if sources is None else sources
+        folder_args = [(root, record) for root in select_shard(sources, shard)]
 
-        with Pool(min(cpu_count(), 8)) as pool:
-            loaded = pool.map(process_csv_folder, folder_args)
-        for level, net_obj, folder_path, mean_vn, vn_values, error in loaded:
-            print(f"Lade CSV-Netz aus Ordner: {folder_path}")
+        loaded = stream_map(process_csv_folder, folder_args, compact=record is not None)
+        for level, net_obj, folder_path, mean_vn, error in loaded:
             if error is not None:
-                print(f"  Fehler beim Laden von {folder_path}: {error}")
+                log.warning("Fehler beim Laden von %s: %s", folder_path, error)
                 continue
-            print(f"  gefundene vn_kv-Werte = {vn_values}")
-            print(f"  ⇒ mittlerer vn_kv = {mean_vn:.3f}")
-            print(f"  ⇒ erkannt als {level} (mean vn_kv = {mean_vn:.3f})")
-            result[level].append(net_obj)
-        return result
+            log.debug("%s wird als %s erkannt (mittlere vn_kv = %.3f)", folder_path, level, mean_vn)
+            yield level, net_obj
@@ -1,59 +1,86 @@
+import logging
 import os
 import pickle
-from multiprocessing import Pool, cpu_count
+from real_vs_synth.instrumentation import span
 from real_vs_synth.model.network import Network
+from real_vs_synth.data.streaming import stream_map, apply_record, collect_levels, select_shard
 
-def process_pkl_file(args):
-    file, root = args
-    full_path = os.path.join(root, file)
+log = logging.getLogger(__name__)
+
+def pp_nets_from_pkl(full_path):
+    """Liest eine DINGO-PKL-Datei und gibt die enthaltenen pandapower-Netze zurück."""
     with open(full_path, "rb") as f:
         dingo_net = pickle.load(f)
     nets = dingo_net if isinstance(dingo_net, list) else [dingo_net]
-    results = []
-    for net_idx, d_net in enumerate(nets):
+    pp_nets = []
+    for d_net in nets:
         if hasattr(d_net, "bus") and hasattr(d_net, "line"):
-            pp_net = d_net
+            pp_nets.append(d_net)
         elif isinstance(d_net, dict) and "pp_net" in d_net:
-            pp_net = d_net["pp_net"]
+            pp_nets.append(d_net["pp_net"])
         elif hasattr(d_net, "to_pandapower"):
-            pp_net = d_net.to_pandapower()
-        else:
-            continue
-        vn_values = pp_net.bus["vn_kv"].tolist()
-        mean_vn = sum(vn_values) / len(vn_values) if vn_values else 0.0
-        if mean_vn > 50:
-            level = "EHV"
-        elif mean_vn > 20:
-            level = "HV"
-        elif mean_vn > 5:
-            level = "MV"
-        else:
-            level = "LV"
-        net_obj = Network.from_pandapower(pp_net)
+            pp_nets.append(d_net.to_pandapower())
+    return pp_nets
+
+def process_pkl_file(args):
+    file, root, record = args
+    full_path = os.path.join(root, file)
+    results = []
+    base = os.path.splitext(file)[0]
+    with span("load.read", network=base):
+        pp_nets = pp_nets_from_pkl(full_path)
+    for net_idx, pp_net in enumerate(pp_nets):
+        name = base if len(pp_nets) == 1 else f"{base}_{net_idx + 1}"
+        with span("load", network=name):
+            vn_values = pp_net.bus["vn_kv"].tolist()
+            mean_vn = sum(vn_values) / len(vn_values) if vn_values else 0.0
+            if mean_vn > 50:
+                level = "EHV"
+            elif mean_vn > 20:
+                level = "HV"
+            elif mean_vn > 5:
+                level = "MV"
+            else:
+                level = "LV"
+            net_obj = Network.from_pandapower(pp_net)
+        net_obj.name, net_obj.source = name, full_path
         # Ergebnis als Tupel mit allen Infos zurückgeben!
-        results.append((level, net_obj, file, net_idx+1, mean_vn))
+        results.append((level, apply_record(record, level, net_obj), file, net_idx+1, mean_vn))
     return results
 
 class DingoLoader:
     """
-    Paralleles Laden von Dingo-PKL-Netzen. Gibt Datei, Spannungsebene und Mittelwert vn_kv aus.
+    Paralleles Laden von Dingo-PKL-Netzen. Datei, Spannungsebene und Mittelwert vn_kv
+    werden auf Stufe DEBUG protokolliert.
     """
     def __init__(self, base_folder: str):
         self.base_folder = base_folder
 
     def load(self, path: str = None) -> dict:
-        result = {"EHV": [], "HV": [], "MV": [], "LV": []}
-        file_args = []
+        return collect_levels(self.iter_load(path))
+
+    def list_sources(self) -> list:
+        """Sortierte Pfade aller PKL-Dateien unterhalb von base_folder."""
+        paths = []
         for root, _, files in os.walk(self.base_folder):
             for file in files:
                 if file.lower().endswith(".pkl"):
-                    file_args.append((file, root))
+                    paths.append((root, file))
+        return [os.path.join(root, file) for root, file in sorted(paths)]
+
+    def iter_load(self, path: str = None, record=None, shard=None, sources=None):
+        """
+        Liefert die Netze nacheinander als (level, network), ohne alle gleichzeitig zu halten.
+        Mit record (siehe Comparer.record_task) berechnen die Worker die Metriken selbst
+        und es werden stattdessen (level, Datensatz) geliefert. Mit shard = (index, count)
+        wird nur der entsprechende Teil der (sortierten) Dateiliste geladen, mit sources
+        nur die angegebenen Quellen (siehe list_sources).
+        """
+        sources = self.list_sources() if sources is None else sources
+        file_args = [(os.path.basename(p), os.path.dirname(p), record) for p in select_shard(sources, shard)]
 
-        with Pool(min(cpu_count(), 8)) as pool:
-            results_nested = pool.map(process_pkl_file, file_args)
-        for res in results_nested:
+        for res in stream_map(process_pkl_file, file_args, compact=record is not None):
             for level, net_obj, file, net_idx, mean_vn in res:
-                result[level].append(net_obj)
                 # Ausgabe im Hauptprozess!
-                print(f"  ⇒ {file} [Netz {net_idx}] wird als {level} erkannt (mean vn_kv = {mean_vn:.3f})")
-        return result
\ No newline at end of file
+                log.debug("%s [Netz %d] wird als %s erkannt (mittlere vn_kv = %.3f)", file, net_idx, level, mean_vn)
+                yield level, net_obj
\ No newline at end of file
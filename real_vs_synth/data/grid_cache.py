@@ -0,0 +1,246 @@
+import hashlib
+import logging
+import os
+import re
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool, cpu_count
+from real_vs_synth.instrumentation import span
+from real_vs_synth.model.arrays import GRID_COLUMNS, grid_columns
+from real_vs_synth.model.network import Network
+from real_vs_synth.data.streaming import stream_map, apply_record, collect_levels, select_shard
+
+INDEX_KEY = "__index__"
+# Schlüssel für den Anzeigenamen des Netzes (wie bei den direkten Loadern, ohne Dateiendung)
+NAME_KEY = "__name__"
+
+log = logging.getLogger(__name__)
+
+
+class GridTables(dict):
+    """
+    Schlanker Ersatz für ein pandapowerNet: enthält nur die Tabellen aus
+    GRID_COLUMNS als DataFrames und erlaubt wie pandapower Attributzugriff (net.bus).
+    """
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def write_grid(pp_net, path: str, name: str = None):
+    """
+    Schreibt die metrikrelevanten Tabellen eines pandapower-Netzes spaltenweise
+    als .npz, optional mit dem Anzeigenamen des Netzes.
+    """
+    arrays = {} if name is None else {NAME_KEY: np.array(name)}
+    for table, index, columns in grid_columns(pp_net):
+        arrays[f"{table}/{INDEX_KEY}"] = index
+        for col, values in columns.items():
+            arrays[f"{table}/{col}"] = values
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def read_grid(path: str) -> GridTables:
+    """
+    Liest eine mit write_grid erzeugte Datei als GridTables ein. Ein
+    gespeicherter Anzeigename steht danach unter .name (sonst None).
+    """
+    columns = {table: {} for table in GRID_COLUMNS}
+    index = {}
+    name = None
+    with np.load(path, allow_pickle=False) as data:
+        for key in data.files:
+            if key == NAME_KEY:
+                name = str(data[key])
+                continue
+            table, col = key.split("/", 1)
+            if col == INDEX_KEY:
+                index[table] = data[key]
+            else:
+                columns.setdefault(table, {})[col] = data[key]
+    tables = GridTables({table: pd.DataFrame(cols, index=pd.Index(index.get(table, []), dtype=np.int64))
+                         for table, cols in columns.items()})
+    tables.name = name
+    return tables
+
+
+def _cache_name(rel_path: str) -> str:
+    """Eindeutiger Dateiname für einen relativen Pfad: '%' und Pfadtrenner werden kodiert (a/b -> a%2Fb)."""
+    return rel_path.replace("%", "%25").replace(os.sep, "%2F").replace("/", "%2F")
+
+
+def _read_source(kind, path):
+    """Liest eine Quelle (json, csv, pkl) und gibt eine Liste von pandapower-Netzen zurück."""
+    import pandapower as pp
+    if kind == "json":
+        return [pp.from_json(path)]
+    if kind == "csv":
+        return [pp.from_csv_folder(path)]
+    from real_vs_synth.data.dingo_loader import pp_nets_from_pkl
+    return pp_nets_from_pkl(path)
+
+
+def _outputs(target: str, files) -> list:
+    """Dateien aus files, die zur Zieldatei target gehören: target selbst bzw. <base>__k.npz (PKL mit k Netzen)."""
+    base = os.path.basename(target)[:-len(".npz")]
+    pattern = re.compile(re.escape(base) + r"(__\d+)?\.npz")
+    return [f for f in files if pattern.fullmatch(f)]
+
+
+def _display_name(kind, src):
+    """Anzeigename wie bei den direkten Loadern: Dateiname ohne Endung bzw. Ordnername (CSV)."""
+    return os.path.basename(os.path.normpath(src)) if kind == "csv" else os.path.splitext(os.path.basename(src))[0]
+
+
+def _convert_one(args):
+    kind, src, target = args
+    try:
+        nets = _read_source(kind, src)
+    except Exception as e:
+        return (src, 0, str(e))
+    # Alte Ausgaben der Quelle entfernen (z. B. <name>.npz, wenn die PKL jetzt mehrere Netze enthält)
+    folder = os.path.dirname(target)
+    for f in _outputs(target, os.listdir(folder)):
+        os.remove(os.path.join(folder, f))
+    base, name = target[:-len(".npz")], _display_name(kind, src)
+    for i, net in enumerate(nets):
+        if len(nets) == 1:
+            write_grid(net, target, name)
+        else:
+            # Namen wie DingoLoader: <name>_<k>
+            write_grid(net, f"{base}__{i + 1}.npz", f"{name}_{i + 1}")
+    return (src, len(nets), None)
+
+
+def _find_sources(source_folder):
+    """Findet alle Netzquellen (JSON-Dateien, CSV-Ordner, PKL-Dateien) unterhalb von source_folder."""
+    sources = []
+    for root, _, files in os.walk(source_folder):
+        if "bus.csv" in files:
+            sources.append(("csv", root))
+            continue
+        for file in files:
+            lower = file.lower()
+            if lower.endswith(".json"):
+                sources.append(("json", os.path.join(root, file)))
+            elif lower.endswith(".pkl"):
+                sources.append(("pkl", os.path.join(root, file)))
+    return sources
+
+
+def _source_mtime(kind, path):
+    if kind == "csv":
+        return max(os.path.getmtime(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getmtime(path)
+
+
+def convert_folder(source_folder: str, cache_folder: str) -> int:
+    """
+    Wandelt alle Netze unter source_folder einmalig in .npz-Dateien im cache_folder um.
+    Bereits umgewandelte Netze, deren Quelle nicht neuer ist, werden übersprungen.
+    .npz-Dateien ohne zugehörige Quelle (gelöschte Quellen) werden entfernt.
+    Gibt die Anzahl neu umgewandelter Quellen zurück.
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    cached = [f for f in os.listdir(cache_folder) if f.endswith(".npz")]
+    tasks, expected = [], set()
+    for kind, src in _find_sources(source_folder):
+        target = os.path.join(cache_folder, _cache_name(os.path.relpath(src, source_folder)) + ".npz")
+        outputs = _outputs(target, cached)
+        expected.update(outputs)
+        existing = [os.path.join(cache_folder, f) for f in outputs]
+        if existing and min(os.path.getmtime(p) for p in existing) >= _source_mtime(kind, src):
+            continue
+        tasks.append((kind, src, target))
+    for f in set(cached) - expected:
+        log.debug("%s ohne Quelle, wird aus dem Grid-Cache entfernt", f)
+        os.remove(os.path.join(cache_folder, f))
+    if not tasks:
+        return 0
+    with Pool(min(cpu_count(), 8)) as pool:
+        results = pool.map(_convert_one, tasks)
+    for src, count, error in results:
+        if error is not None:
+            log.warning("Fehler beim Umwandeln von %s: %s", src, error)
+        else:
+            log.debug("%s ⇒ %d Netz(e) im Grid-Cache", src, count)
+    return len(tasks)
+
+
+def process_npz_file(args):
+    path, record = args
+    # Vorläufiger Name aus dem Dateinamen, bis der gespeicherte Anzeigename gelesen ist
+    name = os.path.splitext(os.path.basename(path)[:-len(".npz")])[0]
+    with span("load", network=name):
+        with span("load.read"):
+            tables = read_grid(path)
+        name = tables.name or name
+        vn_values = tables.bus["vn_kv"].tolist() if "vn_kv" in tables.bus.columns else []
+        mean_vn = sum(vn_values) / len(vn_values) if vn_values else 0.0
+        if mean_vn > 50:
+            level = "EHV"
+        elif mean_vn > 20:
+            level = "HV"
+        elif mean_vn > 5:
+            level = "MV"
+        else:
+            level = "LV"
+        net_obj = Network.from_pandapower(tables)
+    net_obj.name, net_obj.source = name, path
+    return (level, apply_record(record, level, net_obj), path, mean_vn)
+
+
+class NpzLoader:
+    """
+    Lädt Netze aus dem kompakten Grid-Cache (.npz-Dateien, siehe convert_folder) parallel.
+    Die Netze enthalten statt des vollständigen pandapower-Netzes nur GridTables.
+    """
+    def __init__(self, base_folder: str):
+        self.base_folder = base_folder
+
+    def load(self, path: str = None) -> dict:
+        return collect_levels(self.iter_load(path))
+
+    def list_sources(self) -> list:
+        """Sortierte Pfade aller .npz-Dateien in base_folder."""
+        return sorted(os.path.join(self.base_folder, f) for f in os.listdir(self.base_folder)
+                      if f.endswith(".npz"))
+
+    def iter_load(self, path: str = None, record=None, shard=None, sources=None):
+        """
+        Liefert die Netze nacheinander als (level, network), ohne alle gleichzeitig zu halten.
+        Mit record (siehe Comparer.record_task) berechnen die Worker die Metriken selbst
+        und es werden stattdessen (level, Datensatz) geliefert. Mit shard = (index, count)
+        wird nur der entsprechende Teil der (sortierten) Dateiliste geladen, mit sources
+        nur die angegebenen Quellen (siehe list_sources).
+        """
+        files = select_shard(self.list_sources() if sources is None else sources, shard)
+        tasks = [(file, record) for file in files]
+        for level, net_obj, file, mean_vn in stream_map(process_npz_file, tasks, compact=record is not None):
+            log.debug("%s wird als %s erkannt (mittlere vn_kv = %.3f)", file, level, mean_vn)
+            yield level, net_obj
+        log.info("%d Netz(e) aus dem Grid-Cache %s geladen", len(files), self.base_folder)
+
+
+def grid_cache_loader(path: str, cache_root: str):
+    """
+    Wandelt die Netze unter `path` (Ordner oder DINGO-PKL-Datei) bei Bedarf in den
+    Grid-Cache unter `cache_root` um und gibt einen NpzLoader dafür zurück.
+    Gibt None zurück, wenn unter `path` keine umwandelbaren Netze liegen (z. B. .pt-Ordner).
+    """
+    source = os.path.dirname(path) if path.lower().endswith(".pkl") else path
+    if not os.path.isdir(source) or not _find_sources(source):
+        return None
+    source = os.path.abspath(source)
+    digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+    folder = os.path.join(cache_root, f"{os.path.basename(source)}-{digest}")
+    converted = convert_folder(source, folder)
+    log.info("Grid-Cache %s: %d Quelle(n) neu umgewandelt", folder, converted)
+    return NpzLoader(folder)
@@ -1,37 +1,74 @@
+import logging
 import os
-from typing import List, Callable
-
-from synthetic_loader import load_synthetic_folder
-from simbench_loader import load_simbench_folder
-from dingo_loader import load_dingo_folder
-from cvs_loader import load_cvs_folder
-from pt_loader import load_pt_folder
-
+from importlib import import_module
 
+# Registrierte Loader: Formatname -> (Modul, Klasse). Die Module (und damit
+# pandapower, simbench, torch, ...) werden erst importiert, wenn das Format
+# tatsächlich verwendet wird.
 LOADERS = {
-    "synthetic": load_synthetic_folder,
-    "simbench": load_simbench_folder,
-    "dingo": load_dingo_folder,
-    "cvs": load_cvs_folder,
-    "pt": load_pt_folder
+    "simbench": ("real_vs_synth.data.simbench_loader", "SimBenchLoader"),
+    "csv": ("real_vs_synth.data.cvs_loader", "CsvLoader"),
+    "npz": ("real_vs_synth.data.grid_cache", "NpzLoader"),
+    "pt": ("real_vs_synth.data.pt_loader", "PtLoader"),
+    "json": ("real_vs_synth.data.synthetic_loader", "SyntheticLoader"),
+    "dingo": ("real_vs_synth.data.dingo_loader", "DingoLoader"),
 }
 
-def get_loader(name_or_path: str) -> Callable[[str], List]:
-    name_or_path = name_or_path.lower()
-
-    if os.path.isdir(name_or_path):
-        has_bus_csv = any(
-            os.path.isdir(os.path.join(name_or_path, d)) and
-            os.path.exists(os.path.join(name_or_path, d, "bus.csv"))
-            for d in os.listdir(name_or_path)
-        )
-        if has_bus_csv:
-            return load_cvs_folder
-        elif any(file.endswith(".pt") for file in os.listdir(name_or_path)):
-            return load_pt_folder
-        else:
-            return load_synthetic_folder
-    elif name_or_path.endswith(".pkl"):
-        return lambda _: load_dingo_folder(os.path.dirname(name_or_path))
-    else:
-        return load_simbench_folder
+log = logging.getLogger(__name__)
+
+# Formate, die in den kompakten Grid-Cache umgewandelt werden können
+CACHEABLE_FORMATS = ("csv", "json", "dingo")
+
+
+def register_loader(name: str, module: str, class_name: str):
+    """Registriert einen zusätzlichen Loader (Klasse mit load/iter_load) unter `name`."""
+    LOADERS[name] = (module, class_name)
+
+
+def loader_class(name: str):
+    """Importiert das Loader-Modul für `name` und gibt die Loader-Klasse zurück."""
+    module, class_name = LOADERS[name]
+    return getattr(import_module(module), class_name)
+
+
+def sniff_format(path: str) -> str:
+    """
+    Erkennt das Format anhand des Pfads bzw. der Dateien im Ordner:
+    simbench, csv (Unterordner mit bus.csv), npz, pt, json oder dingo (.pkl).
+    Pfade, die weder Ordner noch PKL-Datei sind, werden als SimBench behandelt.
+    """
+    if path.lower().startswith("simbench"):
+        return "simbench"
+    if os.path.isdir(path):
+        entries = os.listdir(path)
+        if any(os.path.exists(os.path.join(path, d, "bus.csv")) for d in entries):
+            return "csv"
+        suffixes = {os.path.splitext(f)[1].lower() for f in entries}
+        for suffix, name in ((".npz", "npz"), (".pt", "pt"), (".json", "json"), (".pkl", "dingo")):
+            if suffix in suffixes:
+                return name
+        return "json"
+    if path.lower().endswith(".pkl"):
+        return "dingo"
+    return "simbench"
+
+
+def get_loader(path: str, grid_cache: str = None):
+    """
+    Wählt und erzeugt den Loader für `path`. Rückgabe: (loader, is_simbench).
+    Mit grid_cache werden SimBench-Netze dort abgelegt und JSON-, CSV- und
+    PKL-Netze vorab in den kompakten Grid-Cache umgewandelt.
+    """
+    fmt = sniff_format(path)
+    if fmt == "simbench":
+        cls = loader_class(fmt)
+        return (cls(os.path.join(grid_cache, "simbench")) if grid_cache else cls()), True
+    if grid_cache is not None and fmt in CACHEABLE_FORMATS:
+        from real_vs_synth.data.grid_cache import grid_cache_loader
+        loader = grid_cache_loader(path, grid_cache)
+        if loader is not None:
+            return loader, False
+    if fmt == "dingo" and not os.path.isdir(path):
+        log.info("Lade Netze aus Dingo-PKL-Datei: %s", path)
+        path = os.path.dirname(path)
+    return loader_class(fmt)(path), False
@@ -1,6 +1,10 @@
 import torch
+import logging
 import os
+import numpy as np
+from real_vs_synth.instrumentation import span
 from real_vs_synth.model.network import Network
+from real_vs_synth.data.streaming import stream_map, apply_record, select_shard
 import pandapower as pp
 
 # Sicherheitsfreigabe für torch_geometric Data-Objekte
@@ -12,64 +16,149 @@ if DataEdgeAttr is not None:
     torch.serialization.add_safe_globals([DataEdgeAttr])
 torch.serialization.add_safe_globals([Data])
 
-def load_pt_file(path):
-    data = torch.load(path, map_location=torch.device("cpu"), weights_only=False)
+log = logging.getLogger(__name__)
 
-    # === Variante 1: Wenn data ein dict ist mit passenden Keys ===
+# Standard-Leitungstyp für Kanten aus Graphdaten
+PT_LINE_TYPE = {
+    "c_nf_per_km": 210,
+    "r_ohm_per_km": 0.876,
+    "x_ohm_per_km": 0.115,
+    "max_i_ka": 0.142,
+    "type": "cs",
+    "q_mm2": 240,
+    "g_us_per_km": 0
+}
+
+def _to_numpy(value):
+    return value.numpy() if hasattr(value, "numpy") else np.asarray(value)
+
+def _collated_value(collated, key):
+    """Eintrag `key` des zusammengefassten Graphen (dict oder Data-Objekt), sonst None."""
+    if isinstance(collated, dict):
+        return collated.get(key)
+    return getattr(collated, key, None)
+
+def _node_counts(collated, slices, edge_index, edge_slices, path):
+    """
+    Knotenanzahl je Graph im InMemoryDataset-Format: aus den Slices von x/pos,
+    aus num_nodes je Graph, aus den Slices bzw. _num_nodes oder, ohne diese
+    Angaben, aus dem größten Knotenindex der Kanten je Graph. PyG speichert
+    num_nodes ohne x/pos oft nur als Summe über alle Graphen.
+    """
+    n_graphs = len(edge_slices) - 1
+    node_key = "x" if "x" in slices else "pos" if "pos" in slices else None
+    if node_key is not None:
+        return np.diff(_to_numpy(slices[node_key]))
+    num_nodes = _collated_value(collated, "num_nodes")
+    if num_nodes is not None and np.ndim(_to_numpy(num_nodes)) == 1 and len(num_nodes) == n_graphs:
+        return _to_numpy(num_nodes)
+    if "num_nodes" in slices:
+        bounds = _to_numpy(slices["num_nodes"])
+        # Kumulierte Knotenzahlen (bei Slices über die Graphen wäre num_nodes oben schon je Graph)
+        if len(bounds) == n_graphs + 1 and (num_nodes is None or bounds[-1] == int(num_nodes)):
+            return np.diff(bounds)
+    per_graph = _collated_value(collated, "_num_nodes")
+    if per_graph is not None and len(per_graph) == n_graphs:
+        return np.asarray(per_graph)
+    if edge_index.size:
+        log.debug("%s: Knotenanzahl je Graph aus dem größten Knotenindex der Kanten", path)
+        return np.array([int(edge_index[:, s:e].max()) + 1 if e > s else 0
+                         for s, e in zip(edge_slices[:-1], edge_slices[1:])])
+    raise ValueError(f"Knotenanzahl je Graph in {path} nicht bestimmbar (weder x/pos noch num_nodes je Graph)")
+
+def iter_pt_graphs(data, path=""):
+    """
+    Liefert (edge_index, num_nodes) für jeden Graphen in einer .pt-Datei:
+    dict mit edge_index/num_nodes, einzelnes Data-Objekt, Liste von Graphen,
+    zusammengefasster Batch (ptr/batch) oder InMemoryDataset-Speicherformat (data, slices).
+    """
+    # === Variante 1: dict mit passenden Keys ===
     if isinstance(data, dict) and "edge_index" in data and "num_nodes" in data:
-        edge_index = data["edge_index"]
-        num_nodes = data["num_nodes"]
+        yield _to_numpy(data["edge_index"]), int(data["num_nodes"])
+
+    # === Variante 2: InMemoryDataset (data, slices[, ...]) mit lokalen Knotenindizes je Graph ===
+    elif isinstance(data, tuple) and len(data) >= 2 and isinstance(data[1], dict) and "edge_index" in data[1]:
+        collated, slices = data[0], data[1]
+        if isinstance(collated, dict):
+            edge_index = _to_numpy(collated["edge_index"])
+        else:
+            edge_index = _to_numpy(collated.edge_index)
+        edge_slices = _to_numpy(slices["edge_index"])
+        node_counts = _node_counts(collated, slices, edge_index, edge_slices, path)
+        for i in range(len(edge_slices) - 1):
+            yield edge_index[:, edge_slices[i]:edge_slices[i + 1]], int(node_counts[i])
 
-    # === Variante 2: Wenn data ein Data-Objekt oder Liste davon ===
-    elif isinstance(data, list) and len(data) > 0 and hasattr(data[0], "edge_index") and hasattr(data[0], "num_nodes"):
-        data = data[0]
-        edge_index = data.edge_index
-        num_nodes = data.num_nodes
+    # === Variante 3: Batch mit fortlaufenden Knotenindizes (ptr) ===
+    elif hasattr(data, "edge_index") and getattr(data, "ptr", None) is not None:
+        edge_index = _to_numpy(data.edge_index)
+        ptr = _to_numpy(data.ptr)
+        graph_of_edge = np.searchsorted(ptr, edge_index[0], side="right") - 1
+        order = np.argsort(graph_of_edge, kind="stable")
+        bounds = np.searchsorted(graph_of_edge[order], np.arange(len(ptr)))
+        for i in range(len(ptr) - 1):
+            edges = order[bounds[i]:bounds[i + 1]]
+            yield edge_index[:, edges] - ptr[i], int(ptr[i + 1] - ptr[i])
 
+    # === Variante 4: einzelnes Data-Objekt ===
     elif hasattr(data, "edge_index") and hasattr(data, "num_nodes"):
-        edge_index = data.edge_index
-        num_nodes = data.num_nodes
+        yield _to_numpy(data.edge_index), int(data.num_nodes)
+
+    # === Variante 5: Liste von Graphen (alle werden verwendet) ===
+    elif isinstance(data, (list, tuple)) and len(data) > 0:
+        for item in data:
+            yield from iter_pt_graphs(item, path)
 
     else:
-        print(f"DEBUG: Dateiinhalt von {path}:")
-        print(f"Typ: {type(data)}")
-        print(f"Attribute: {dir(data)}")
+        log.debug("Dateiinhalt von %s: Typ %s, Attribute %s", path, type(data), dir(data))
         raise ValueError(f"Unerwartetes Datenformat in Datei: {path}")
 
+def pp_net_from_edges(edge_index, num_nodes):
+    """Erzeugt ein pandapower-Netz aus einer Kantenliste, Busse und Leitungen in einem Schritt."""
     net = pp.create_empty_network()
+    pp.create_buses(net, nr_buses=num_nodes, vn_kv=20.0)
+    if "my_line" not in net.std_types["line"]:
+        pp.create_std_type(net, PT_LINE_TYPE, name="my_line", element="line")
+    edge_index = np.asarray(edge_index, dtype=np.int64)
+    keep = edge_index[0] != edge_index[1]
+    if keep.any():
+        pp.create_lines(net, edge_index[0, keep], edge_index[1, keep], length_km=1.0, std_type="my_line")
+    return net
 
-    for _ in range(num_nodes):
-        pp.create_bus(net, vn_kv=20.0)
+def load_pt_file(path, record=None):
+    """Lädt alle Graphen einer .pt-Datei als Liste von Network-Objekten (bzw. Datensätzen mit record)."""
+    base = os.path.basename(path).replace(".pt", "")
+    with span("load.read", network=base):
+        data = torch.load(path, map_location=torch.device("cpu"), weights_only=False)
+        graphs = list(iter_pt_graphs(data, path))
+    networks = []
+    for i, (edge_index, num_nodes) in enumerate(graphs):
+        # Namen wie DingoLoader: <name>_<k>
+        name = base if len(graphs) == 1 else f"{base}_{i + 1}"
+        with span("load", network=name):
+            network = Network.from_pandapower(pp_net_from_edges(edge_index, num_nodes))
+        network.name, network.source = name, path
+        networks.append(apply_record(record, "LV", network))
+    return networks
 
-    if "my_line" not in net.std_types["line"]:
-        pp.create_std_type(net, {
-            "c_nf_per_km": 210,
-            "r_ohm_per_km": 0.876,
-            "x_ohm_per_km": 0.115,
-            "max_i_ka": 0.142,
-            "type": "cs",
-            "q_mm2": 240,
-            "g_us_per_km": 0
-        }, name="my_line", element="line")
-
-    edge_index_np = edge_index.numpy()
-    for i in range(edge_index_np.shape[1]):
-        from_bus = int(edge_index_np[0, i])
-        to_bus = int(edge_index_np[1, i])
-        if from_bus != to_bus:
-            pp.create_line(net, from_bus, to_bus, length_km=1.0, std_type="my_line")
-
-    network = Network.from_pandapower(net)
-    network.name = os.path.basename(path).replace(".pt", "")
-    return network
+def _load_pt_task(args):
+    path, record = args
+    return load_pt_file(path, record)
+
+def pt_files(folder):
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".pt"))
+
+def iter_pt_folder(folder, record=None, shard=None, sources=None):
+    """
+    Verteilt die .pt-Dateien auf Worker-Prozesse und liefert die Netze nacheinander
+    (mit shard = (index, count) nur den entsprechenden Teil der Dateien, mit
+    sources nur die angegebenen Dateien).
+    """
+    files = select_shard(pt_files(folder) if sources is None else sources, shard)
+    for networks in stream_map(_load_pt_task, [(f, record) for f in files], compact=record is not None):
+        yield from networks
 
 def load_pt_folder(folder):
-    nets = []
-    for file in os.listdir(folder):
-        if file.endswith(".pt"):
-            full_path = os.path.join(folder, file)
-            nets.append(load_pt_file(full_path))
-    return nets
+    return list(iter_pt_folder(folder))
 
 class PtLoader:
     def __init__(self, folder: str):
@@ -77,3 +166,10 @@ class PtLoader:
 
     def load(self, _):
         return {"LV": load_pt_folder(self.folder)}
+
+    def list_sources(self) -> list:
+        return pt_files(self.folder)
+
+    def iter_load(self, _=None, record=None, shard=None, sources=None):
+        for network in iter_pt_folder(self.folder, record, shard, sources):
+            yield "LV", network
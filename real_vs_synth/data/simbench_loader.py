@@ -1,6 +1,15 @@
-import simbench as sb
-from multiprocessing import Pool, cpu_count
+import logging
+import os
+from importlib.metadata import version, PackageNotFoundError
+from real_vs_synth.instrumentation import span
 from real_vs_synth.model.network import Network
+from real_vs_synth.data.grid_cache import read_grid, write_grid
+from real_vs_synth.data.streaming import stream_map, apply_record, collect_levels, select_shard
+
+# Standardverzeichnis für materialisierte SimBench-Netze (je simbench-Version ein Unterordner)
+SIMBENCH_CACHE_DIR = os.path.join(".grid_cache", "simbench")
+
+log = logging.getLogger(__name__)
 
 # Mappings für Regionen
 REGION_MAP = {"r": "rural", "m": "mixed", "c": "urban", "u": "urban", "s": "semiurb", "comm": "comm"}
@@ -28,24 +37,59 @@ SIMBENCH_CODES = {
     ]
 }
 
-def load_simbench_net(code_level_tuple):
-    code, level = code_level_tuple
-    net = sb.get_simbench_net(code)
-    net_obj = Network.from_pandapower(net)
-    return (level, net_obj, code)
+def simbench_version() -> str:
+    """Installierte simbench-Version, ohne das Paket zu importieren."""
+    try:
+        return version("simbench")
+    except PackageNotFoundError:
+        return "unknown"
+
+def load_simbench_net(args):
+    """
+    Lädt ein SimBench-Netz. Mit cache_dir wird es aus dem lokalen Cache
+    (cache_dir/<simbench-Version>/<code>.npz) gelesen und nur beim ersten Mal
+    über simbench erzeugt; simbench wird dann gar nicht erst importiert.
+    """
+    code, level, cache_dir, record = args
+    path = os.path.join(cache_dir, simbench_version(), f"{code}.npz") if cache_dir else None
+    with span("load", network=code):
+        with span("load.read"):
+            if path is not None and os.path.exists(path):
+                net, cached = read_grid(path), True
+            else:
+                import simbench as sb
+                net, cached = sb.get_simbench_net(code), False
+                if path is not None:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    write_grid(net, path)
+        net_obj = Network.from_pandapower(net)
+    net_obj.name = code
+    return (level, apply_record(record, level, net_obj), code, cached)
 
 class SimBenchLoader:
     """
     Lädt SimBench-Netze für alle Spannungsebenen, optional gefiltert nach Region/Level.
-    Gibt Konsolenausgabe für jeden geladenen Code.
+    Jeder geladene Code wird protokolliert.
+    Mit cache_dir (Standard: SIMBENCH_CACHE_DIR, None = kein Cache) werden die
+    Netze einmalig lokal abgelegt und bei späteren Läufen von dort geladen.
     """
 
+    def __init__(self, cache_dir: str = SIMBENCH_CACHE_DIR):
+        self.cache_dir = cache_dir
+
     def load(self, path: str = None, level_filter=None, region_filter=None) -> dict:
         """
         Optional: level_filter = 'LV'/'MV'/'HV'/'EHV' (str oder Liste)
                   region_filter = 'r'/'m'/'c'/... (siehe REGION_MAP, str oder Liste)
         """
-        result = {"EHV": [], "HV": [], "MV": [], "LV": []}
+        return collect_levels(self.iter_load(path, level_filter, region_filter))
+
+    def iter_load(self, path: str = None, level_filter=None, region_filter=None, record=None, shard=None):
+        """
+        Wie load, liefert die Netze aber nacheinander als (level, network).
+        Mit record (siehe Comparer.record_task) liefern die Worker (level, Datensatz),
+        mit shard = (index, count) wird nur der entsprechende Teil der Codes geladen.
+        """
         code_level = []
 
         # Filter auflisten:
@@ -62,11 +106,10 @@ class SimBenchLoader:
                     region_long = [REGION_MAP.get(r, r) for r in region_filter]
                     if region not in region_long:
                         continue
-                code_level.append((code, level))
+                code_level.append((code, level, self.cache_dir, record))
 
-        with Pool(min(cpu_count(), 8)) as pool:
-            loaded = pool.map(load_simbench_net, code_level)
-        for level, net_obj, code in loaded:
-            result[level].append(net_obj)
-            print(f"  ⇒ SimBench-Code {code} wird als {level} geladen.")
-        return result
\ No newline at end of file
+        loaded = stream_map(load_simbench_net, select_shard(code_level, shard), compact=record is not None)
+        for level, net_obj, code, cached in loaded:
+            source = " (aus dem Cache)" if cached else ""
+            log.info("SimBench-Code %s wird als %s geladen%s", code, level, source)
+            yield level, net_obj
\ No newline at end of file
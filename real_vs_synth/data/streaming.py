@@ -0,0 +1,78 @@
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+
+# Maximale Anzahl gleichzeitig offener Aufgaben je Worker beim Streaming
+STREAM_WINDOW_PER_WORKER = 2
+
+
+def bounded_imap(func, items, processes=None, window=None):
+    """
+    Wie Pool.imap, hält aber höchstens `window` Aufgaben gleichzeitig offen:
+    Neue Aufgaben werden erst abgeschickt, wenn ältere Ergebnisse abgeholt
+    wurden. So wachsen unverarbeitete Ergebnisse (z. B. ganze Netze) nicht
+    mit der Größe des Datensatzes. Die Reihenfolge der Ergebnisse bleibt erhalten.
+    """
+    processes = processes or min(cpu_count(), 8)
+    window = window or processes * STREAM_WINDOW_PER_WORKER
+    with Pool(processes) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.apply_async(func, (item,)))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def stream_map(func, items, compact=False, processes=None):
+    """
+    Wendet func parallel auf items an. Liefern die Worker ganze Netze, wird
+    bounded_imap verwendet (Reihenfolge bleibt, begrenzter Speicher). Liefern
+    sie nur kompakte Datensätze (compact=True), werden die Ergebnisse per
+    imap_unordered in Blöcken abgeholt, sobald sie fertig sind.
+    """
+    processes = processes or min(cpu_count(), 8)
+    if not compact:
+        yield from bounded_imap(func, items, processes)
+        return
+    items = list(items)
+    chunksize = max(1, len(items) // (processes * 8))
+    with Pool(processes) as pool:
+        yield from pool.imap_unordered(func, items, chunksize=chunksize)
+
+
+def select_shard(items, shard=None):
+    """
+    Deterministischer Ausschnitt einer (sortierten) Aufgabenliste für
+    shard = (index, count): der index-te von count zusammenhängenden Blöcken.
+    Ohne shard werden alle Aufgaben zurückgegeben.
+    """
+    items = list(items)
+    if shard is None:
+        return items
+    index, count = shard
+    return items[len(items) * index // count:len(items) * (index + 1) // count]
+
+
+def apply_record(record, level, net_obj):
+    """Im Worker: ersetzt das Netz durch record(level, net_obj), falls eine Metrikfunktion übergeben wurde."""
+    return record(level, net_obj) if record is not None else net_obj
+
+
+def chunked(iterable, size):
+    """Teilt einen (Netz-)Strom in Listen mit höchstens `size` Elementen."""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def collect_levels(stream) -> dict:
+    """Sammelt einen Strom von (level, network) in das übliche Dict je Spannungsebene."""
+    result = {"EHV": [], "HV": [], "MV": [], "LV": []}
+    for level, net_obj in stream:
+        result.setdefault(level, []).append(net_obj)
+    return result
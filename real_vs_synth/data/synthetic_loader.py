@@ -1,48 +1,67 @@
+import logging
 import os
 import pandapower as pp
-from multiprocessing import Pool, cpu_count
+from real_vs_synth.instrumentation import span
 from real_vs_synth.model.network import Network
+from real_vs_synth.data.streaming import stream_map, apply_record, collect_levels, select_shard
+
+log = logging.getLogger(__name__)
 
 def process_json_file(args):
-    file, root = args
+    file, root, record = args
     full_path = os.path.join(root, file)
-    pp_net = pp.from_json(full_path)
-    vn_values = pp_net.bus["vn_kv"].tolist()
-    mean_vn = sum(vn_values) / len(vn_values) if vn_values else 0.0
-    if mean_vn > 50:
-        level = "EHV"
-    elif mean_vn > 20:
-        level = "HV"
-    elif mean_vn > 5:
-        level = "MV"
-    else:
-        level = "LV"
-    net_obj = Network.from_pandapower(pp_net)
-    return (level, net_obj, file, mean_vn, vn_values)
+    name = os.path.splitext(file)[0]
+    with span("load", network=name):
+        with span("load.read"):
+            pp_net = pp.from_json(full_path)
+        vn_values = pp_net.bus["vn_kv"].tolist()
+        mean_vn = sum(vn_values) / len(vn_values) if vn_values else 0.0
+        if mean_vn > 50:
+            level = "EHV"
+        elif mean_vn > 20:
+            level = "HV"
+        elif mean_vn > 5:
+            level = "MV"
+        else:
+            level = "LV"
+        net_obj = Network.from_pandapower(pp_net)
+    net_obj.name, net_obj.source = name, full_path
+    return (level, apply_record(record, level, net_obj), file, mean_vn)
 
 class SyntheticLoader:
     """
     Lädt ein Verzeichnis von Pandapower-JSON-Netzen parallel.
     Jede JSON-Datei wird eingelesen, als pandapower-Netz erzeugt
-    und anschließend in Network konvertiert. Konsolenausgabe wie gewohnt.
+    und anschließend in Network konvertiert. Die erkannte Ebene je Datei wird
+    auf Stufe DEBUG protokolliert.
     """
     def __init__(self, base_folder: str):
         self.base_folder = base_folder
 
     def load(self, path: str = None) -> dict:
-        result = {"EHV": [], "HV": [], "MV": [], "LV": []}
-        file_args = []
+        return collect_levels(self.iter_load(path))
+
+    def list_sources(self) -> list:
+        """Sortierte Pfade aller JSON-Dateien unterhalb von base_folder."""
+        paths = []
         for root, _, files in os.walk(self.base_folder):
             for file in files:
                 if file.lower().endswith(".json"):
-                    file_args.append((file, root))
+                    paths.append((root, file))
+        return [os.path.join(root, file) for root, file in sorted(paths)]
+
+    def iter_load(self, path: str = None, record=None, shard=None, sources=None):
+        """
+        Liefert die Netze nacheinander als (level, network), ohne alle gleichzeitig zu halten.
+        Mit record (siehe Comparer.record_task) berechnen die Worker die Metriken selbst
+        und es werden stattdessen (level, Datensatz) geliefert. Mit shard = (index, count)
+        wird nur der entsprechende Teil der (sortierten) Dateiliste geladen, mit sources
+        nur die angegebenen Quellen (siehe list_sources).
+        """
+        sources = self.list_sources() if sources is None else sources
+        file_args = [(os.path.basename(p), os.path.dirname(p), record) for p in select_shard(sources, shard)]
 
-        with Pool(min(cpu_count(), 8)) as pool:
-            loaded = pool.map(process_json_file, file_args)
-        for level, net_obj, file, mean_vn, vn_values in loaded:
-            result[level].append(net_obj)
-            print(f"Lade {file}: Datei einlesen…")
-            print(f"  gefundene vn_kv-Werte = {vn_values}")
-            print(f"  ⇒ mittlerer vn_kv = {mean_vn:.3f}")
-            print(f"  ⇒ {file} wird als {level} erkannt (mean vn_kv = {mean_vn:.3f})")
-        return result
+        loaded = stream_map(process_json_file, file_args, compact=record is not None)
+        for level, net_obj, file, mean_vn in loaded:
+            log.debug("%s wird als %s erkannt (mittlere vn_kv = %.3f)", file, level, mean_vn)
+            yield level, net_obj
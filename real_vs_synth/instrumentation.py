@@ -0,0 +1,272 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+# Umgebungsvariable mit dem Verzeichnis der Ereignisdateien (wird an Worker-Prozesse vererbt)
+TRACE_ENV = "RVS_TRACE_DIR"
+# Mindestabstand zwischen zwei Aktualisierungen der Fortschrittszeile in Sekunden
+PROGRESS_INTERVAL = 0.2
+# Anzahl der langsamsten Netze je Stufe in der Zusammenfassung
+STRAGGLERS = 5
+
+# Netz, dem verschachtelte Spannen ohne eigene Angabe zugeordnet werden
+_network_stack = []
+# Ereignisdatei des aktuellen Prozesses: (pid, Datei)
+_writer = None
+
+
+def _peak_rss_mb():
+    """Bisheriger Spitzenwert des residenten Speichers dieses Prozesses in MB (None ohne resource)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: Byte
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _write_event(event):
+    global _writer
+    pid = os.getpid()
+    if _writer is None or _writer[0] != pid:
+        # Nach fork erbt der Worker die Datei des Elternprozesses: je Prozess eine eigene Datei öffnen
+        path = os.path.join(os.environ[TRACE_ENV], f"events-{pid}.jsonl")
+        _writer = (pid, open(path, "a", buffering=1))
+    _writer[1].write(json.dumps(event) + "\n")
+
+
+@contextmanager
+def span(stage: str, network=None, **attrs):
+    """
+    Misst die Dauer eines Abschnitts (z. B. 'load', 'metric.paths', 'plot.system')
+    und schreibt sie mit dem Speicher-Spitzenwert des Prozesses als Ereignis,
+    sofern das Tracing aktiv ist (enable_tracing). Verschachtelte Abschnitte
+    ohne eigenes `network` werden dem Netz des umgebenden Abschnitts zugeordnet.
+    Ohne aktives Tracing kostet ein Abschnitt nur eine Abfrage der Umgebung.
+    """
+    if not os.environ.get(TRACE_ENV):
+        yield
+        return
+    if network is None and _network_stack:
+        network = _network_stack[-1]
+    _network_stack.append(network)
+    ts = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        dur = time.perf_counter() - start
+        _network_stack.pop()
+        _write_event({"stage": stage, "network": network, "pid": os.getpid(), "ts": ts, "dur": dur,
+                      "rss_mb": _peak_rss_mb(), **attrs})
+
+
+def enable_tracing() -> str:
+    """
+    Aktiviert das Tracing für diesen Prozess und alle danach gestarteten
+    Worker: Jeder Prozess schreibt seine Ereignisse in eine eigene Datei
+    eines temporären Verzeichnisses. Rückgabe: das Verzeichnis.
+    """
+    trace_dir = tempfile.mkdtemp(prefix="rvs-trace-")
+    os.environ[TRACE_ENV] = trace_dir
+    return trace_dir
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(events) -> dict:
+    """
+    Fasst Ereignisse je Stufe zusammen: Anzahl, Summe, Median, p95 und
+    Maximum der Dauer, Speicher-Spitzenwert sowie die langsamsten Netze.
+    """
+    stages = {}
+    for event in events:
+        stages.setdefault(event["stage"], []).append(event)
+    summary = {}
+    for stage, items in stages.items():
+        durations = sorted(e["dur"] for e in items)
+        rss = [e["rss_mb"] for e in items if e.get("rss_mb") is not None]
+        slowest = sorted((e for e in items if e.get("network") is not None), key=lambda e: -e["dur"])
+        summary[stage] = {
+            "count": len(items), "total_s": sum(durations), "median_s": _percentile(durations, 0.5),
+            "p95_s": _percentile(durations, 0.95), "max_s": durations[-1],
+            "peak_rss_mb": max(rss) if rss else None,
+            "slowest": [{"network": e["network"], "dur_s": e["dur"]} for e in slowest[:STRAGGLERS]],
+        }
+    return summary
+
+
+def finish_tracing(output: str) -> dict:
+    """
+    Beendet das Tracing: sammelt die Ereignisse aller Prozesse, schreibt sie
+    als Trace-Datei im Chrome-Trace-Format (chrome://tracing, Perfetto) mit der
+    Zusammenfassung unter 'summary' und den Speicher-Spitzenwerten je Prozess
+    nach `output` und protokolliert die aufwendigsten Stufen. Rückgabe: die
+    Zusammenfassung.
+    """
+    global _writer
+    trace_dir = os.environ.pop(TRACE_ENV, None)
+    if trace_dir is None:
+        return {}
+    if _writer is not None:
+        _writer[1].close()
+        _writer = None
+    events = []
+    for path in sorted(glob.glob(os.path.join(trace_dir, "events-*.jsonl"))):
+        with open(path) as f:
+            # Eine unvollständige letzte Zeile (abgebrochener Worker) wird übersprungen
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+    shutil.rmtree(trace_dir, ignore_errors=True)
+
+    summary = summarize(events)
+    origin = min((e["ts"] for e in events), default=0.0)
+    trace = [{"name": e["stage"], "cat": e["stage"].split(".")[0], "ph": "X", "pid": e["pid"], "tid": e["pid"],
+              "ts": round((e["ts"] - origin) * 1e6, 1), "dur": round(e["dur"] * 1e6, 1),
+              "args": {k: v for k, v in e.items() if k not in ("stage", "pid", "ts", "dur")}}
+             for e in sorted(events, key=lambda e: e["ts"])]
+    # Speicher-Spitzenwert je Prozess (Hauptprozess und Worker)
+    processes = {}
+    for e in events:
+        if e.get("rss_mb") is not None:
+            processes[e["pid"]] = max(processes.get(e["pid"], 0.0), e["rss_mb"])
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms", "summary": summary,
+                   "peak_rss_mb": {str(pid): peak for pid, peak in processes.items()}}, f)
+
+    log.info("Trace mit %d Ereignis(sen) gespeichert: %s", len(events), output)
+    if processes:
+        log.info("  Speicher-Spitzenwert: %.1f MB im Hauptprozess, %.1f MB max. je Worker (%d Worker)",
+                 processes.get(os.getpid(), 0.0),
+                 max((v for pid, v in processes.items() if pid != os.getpid()), default=0.0), len(processes) - 1)
+    for stage, s in sorted(summary.items(), key=lambda item: -item[1]["total_s"]):
+        slowest = f", langsamstes Netz: {s['slowest'][0]['network']}" if s["slowest"] else ""
+        log.info("  %-22s %6d x  Summe %9.3f s  Median %8.4f s  p95 %8.4f s  max %8.4f s%s",
+                 stage, s["count"], s["total_s"], s["median_s"], s["p95_s"], s["max_s"], slowest)
+    return summary
+
+
+class Progress:
+    """
+    Eine einzelne, laufend überschriebene Fortschrittszeile auf stderr mit
+    Zählern je Kategorie (z. B. geladene reale/synthetische Netze, berechnete
+    Metriken) und dem Durchsatz. Wird nur im startenden Prozess und nur bei
+    aktivem start() ausgegeben; Worker-Prozesse bleiben still.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.counts = {}
+        self.totals = {}
+        self._pid = None
+        self._start = None
+        self._last = 0.0
+        self._shown = False
+
+    def start(self, enabled: bool = None):
+        """Aktiviert die Zeile (Standard: nur wenn stderr ein Terminal ist)."""
+        self.enabled = sys.stderr.isatty() if enabled is None else enabled
+        self._pid = os.getpid()
+        self._start = time.perf_counter()
+
+    def _active(self):
+        return self.enabled and self._pid == os.getpid()
+
+    def update(self, key: str, n: int = 1, total: int = None):
+        self.counts[key] = self.counts.get(key, 0) + n
+        if total is not None:
+            self.totals[key] = total
+        now = time.perf_counter()
+        if self._active() and now - self._last >= PROGRESS_INTERVAL:
+            self._last = now
+            self.redraw()
+
+    def track(self, iterable, key: str, total: int = None):
+        """Reicht die Elemente von iterable durch und zählt sie unter key."""
+        if total is not None:
+            self.totals[key] = self.counts.get(key, 0) + total
+        for item in iterable:
+            self.update(key)
+            yield item
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - (self._start or time.perf_counter())
+        parts = [f"{key} {n}/{self.totals[key]}" if key in self.totals else f"{key} {n}"
+                 for key, n in self.counts.items()]
+        done = sum(self.counts.values())
+        rate = f"{done / elapsed:.1f}/s" if elapsed >= 1 else "–"
+        return f"{' | '.join(parts)} | {rate} | {int(elapsed) // 60:02d}:{int(elapsed) % 60:02d}"
+
+    def redraw(self):
+        if self._active() and self.counts:
+            sys.stderr.write("\r" + self.line() + "\x1b[K")
+            sys.stderr.flush()
+            self._shown = True
+
+    def clear(self):
+        if self._active() and self._shown:
+            sys.stderr.write("\r\x1b[K")
+            sys.stderr.flush()
+            self._shown = False
+
+    def close(self):
+        """Letzten Stand ausgeben und die Zeile abschließen."""
+        if self._active() and self.counts:
+            self.redraw()
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+        self.enabled = False
+        self._shown = False
+
+
+# Gemeinsame Fortschrittszeile des Laufs
+progress = Progress()
+
+
+class _ConsoleFormatter(logging.Formatter):
+    """Meldungen ab WARNING mit Stufe, alle anderen unverändert (bei DEBUG mit Modulname)."""
+
+    def __init__(self, verbose=False):
+        super().__init__("%(levelname)s %(name)s: %(message)s" if verbose else "%(message)s")
+        self.verbose = verbose
+
+    def format(self, record):
+        text = super().format(record)
+        return f"{record.levelname}: {text}" if record.levelno >= logging.WARNING and not self.verbose else text
+
+
+class _ProgressAwareHandler(logging.StreamHandler):
+    """Log-Ausgabe, die die Fortschrittszeile vorher löscht und danach neu zeichnet."""
+
+    def emit(self, record):
+        progress.clear()
+        super().emit(record)
+        progress.redraw()
+
+
+def configure_logging(level: str = "INFO"):
+    """Richtet die Konsolenausgabe ein (Stufen: DEBUG, INFO, WARNING, ERROR)."""
+    handler = _ProgressAwareHandler()
+    handler.setFormatter(_ConsoleFormatter(verbose=level.upper() == "DEBUG"))
+    logging.basicConfig(level=level.upper(), handlers=[handler], force=True)
+    # Meldungen der verwendeten Bibliotheken nur ab WARNING
+    for name in ("matplotlib", "PIL", "numba", "pandapower"):
+        logging.getLogger(name).setLevel(max(logging.WARNING, logging.getLogger().level))
@@ -0,0 +1,81 @@
+import numpy as np
+
+# Verteilungsabstände je Metrik: Kolmogorow-Smirnow, Wasserstein-1, Jensen-Shannon
+DISTANCES = ('ks', 'w1', 'js')
+# Anzahl gemeinsamer Klassen für Jensen-Shannon bei kontinuierlichen Werten
+JS_BINS = 64
+
+
+def _prepare(values, weights=None):
+    """Sortierte endliche Werte und zugehörige Gewichte (gleiche Werte zusammengefasst)."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if weights is None:
+        values = np.sort(values[np.isfinite(values)])
+        weights = np.ones(len(values))
+    else:
+        weights = np.asarray(weights, dtype=np.float64).ravel()
+        keep = np.isfinite(values) & (weights > 0)
+        order = np.argsort(values[keep], kind='stable')
+        values, weights = values[keep][order], weights[keep][order]
+    if len(values) == 0:
+        return values, weights
+    start = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    return values[start], np.add.reduceat(weights, start)
+
+
+def _cdf(values, weights, support):
+    """Gewichtete empirische Verteilungsfunktion von (values, weights) an den Stellen `support`."""
+    cum = np.concatenate(([0.0], np.cumsum(weights))) / weights.sum()
+    return cum[np.searchsorted(values, support, side='right')]
+
+
+def _shared_edges(support, bins):
+    """
+    Gemeinsame Klassengrenzen beider Seiten: ganzzahlige Werte (Grad, Hops,
+    Maschen) erhalten je Wert eine eigene Klasse, sonst `bins` gleich breite Klassen.
+    """
+    lo, hi = support[0], support[-1]
+    if np.all(support == np.round(support)) and hi - lo <= 4 * bins:
+        return np.arange(lo, hi + 2) - 0.5
+    if hi == lo:
+        return np.array([lo - 0.5, hi + 0.5])
+    return np.linspace(lo, hi, bins + 1)
+
+
+def _js_distance(p, q):
+    """Jensen-Shannon-Abstand (Wurzel der Divergenz, Basis 2, Wertebereich 0..1)."""
+    p, q = p / p.sum(), q / q.sum()
+    m = (p + q) / 2
+
+    def kl(a):
+        nz = a > 0
+        return np.sum(a[nz] * np.log2(a[nz] / m[nz]))
+
+    return float(np.sqrt(max(0.5 * (kl(p) + kl(q)), 0.0)))
+
+
+def distribution_distances(real, synth, real_weights=None, synth_weights=None, bins=JS_BINS):
+    """
+    Abstände zwischen zwei (gewichteten) Stichproben:
+        ks: größte Differenz der Verteilungsfunktionen
+        w1: Wasserstein-1 (Fläche zwischen den Verteilungsfunktionen)
+        js: Jensen-Shannon-Abstand auf gemeinsamen Klassen
+    Mit Gewichten können Histogramme (z. B. Hop-Histogramme, Wert = Index)
+    direkt übergeben werden, ohne sie zu Einzelwerten zu expandieren.
+    Ist eine Seite leer, sind alle Abstände NaN.
+    """
+    real_v, real_w = _prepare(real, real_weights)
+    synth_v, synth_w = _prepare(synth, synth_weights)
+    if len(real_v) == 0 or len(synth_v) == 0:
+        return {d: float('nan') for d in DISTANCES}
+
+    support = np.union1d(real_v, synth_v)
+    gap = np.abs(_cdf(real_v, real_w, support) - _cdf(synth_v, synth_w, support))
+    edges = _shared_edges(support, bins)
+    real_hist, _ = np.histogram(real_v, bins=edges, weights=real_w)
+    synth_hist, _ = np.histogram(synth_v, bins=edges, weights=synth_w)
+    return {
+        'ks': float(gap.max()),
+        'w1': float(np.sum(gap[:-1] * np.diff(support))),
+        'js': _js_distance(real_hist, synth_hist),
+    }
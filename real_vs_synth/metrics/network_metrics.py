@@ -0,0 +1,136 @@
+import numpy as np
+from real_vs_synth.instrumentation import span
+from real_vs_synth.metrics.system_characteristics import compute_system_metrics
+from real_vs_synth.model.batch import NetworkBatch
+from real_vs_synth.metrics.shortest_paths import path_sweep_batch
+from real_vs_synth.metrics.topological_characteristics import (
+    compute_node_degree_metrics,
+    compute_node_degree_metrics_batch,
+    compute_clustering_coefficient,
+    compute_clustering_coefficients,
+    compute_path_metrics,
+    compute_meshness,
+    compute_degree_assortativity
+)
+
+# Bei Änderungen an Metrikdefinitionen erhöhen, damit zwischengespeicherte Werte verfallen
+METRIC_VERSION = 1
+
+# Je Worker-Prozess geöffnete Metrik-Caches (Pfad -> MetricCache)
+_WORKER_CACHES = {}
+
+
+def metric_key(kind: str, content_hash: str) -> str:
+    """Cache-Schlüssel eines Metrik-Datensatzes."""
+    return f"v{METRIC_VERSION}:{kind}:{content_hash}"
+
+
+def compute_topological_record(network, approx=False, target_error=0.05, time_budget=None):
+    """
+    Berechnet alle topologischen Metriken eines Netzes in einem Aufruf und gibt
+    einen kompakten Datensatz zurück (Skalare und NumPy-Arrays statt Listen),
+    der sich günstig zwischen Prozessen übertragen lässt:
+        deg/cc/bw: *_mean, *_std und Einzelwerte je Knoten
+        cpl: cpl_mean, cpl_std und cpl_hist (Hop-Histogramm)
+        diameter, mesh, assort, approx (None oder Angaben zur Schätzung)
+    """
+    name = getattr(network, 'name', None)
+    with span("metric.topo", network=name):
+        with span("metric.deg"):
+            deg = compute_node_degree_metrics(network)
+        with span("metric.cc"):
+            cc = compute_clustering_coefficient(network)
+        with span("metric.paths", approx=approx):
+            paths = compute_path_metrics(network, approx=approx, target_error=target_error, time_budget=time_budget)
+        with span("metric.mesh"):
+            mesh = int(compute_meshness(network))
+        with span("metric.assort"):
+            assort = float(compute_degree_assortativity(network))
+    return _topological_record(name, deg, cc, paths, mesh, assort)
+
+
+def _topological_record(name, deg, cc, paths, mesh, assort):
+    cpl, bw = paths['cpl'], paths['bw']
+    return {
+        'name': name,
+        'deg_mean': deg[0], 'deg_std': deg[1], 'deg': np.asarray(deg[2], dtype=np.int32),
+        'cc_mean': cc[0], 'cc_std': cc[1], 'cc': np.asarray(cc[2], dtype=np.float64),
+        'cpl_mean': cpl[0], 'cpl_std': cpl[1], 'cpl_hist': np.asarray(cpl[2], dtype=np.int64),
+        'diameter': paths['diameter'][0],
+        'bw_mean': bw[0], 'bw_std': bw[1], 'bw': np.asarray(bw[2], dtype=np.float64),
+        'mesh': mesh,
+        'assort': assort,
+        'approx': paths['approx'],
+    }
+
+
+def compute_topological_records(networks, approx=False, target_error=0.05, time_budget=None):
+    """
+    Wie compute_topological_record für eine Liste von Netzen: Grad, Clustering,
+    Vermaschtheit und Assortativität werden für alle Netze gemeinsam auf einem
+    blockdiagonalen Graphen berechnet (NetworkBatch), die exakten Pfadmetriken
+    kleiner Netze gruppenweise (path_sweep_batch). Geschätzte Pfadmetriken
+    (approx) bleiben je Netz. Die Datensätze entsprechen denen der Einzelberechnung.
+    """
+    if not networks:
+        return []
+    with span("metric.topo_batch", networks=len(networks)):
+        batch = NetworkBatch(networks)
+        with span("metric.deg"):
+            deg = compute_node_degree_metrics_batch(batch)
+        with span("metric.cc"):
+            cc = compute_clustering_coefficients(batch)
+        with span("metric.mesh"):
+            mesh = batch.meshness.tolist()
+        with span("metric.assort"):
+            assort = batch.assortativity.tolist()
+        del batch
+        if not approx:
+            with span("metric.paths_batch"):
+                sweeps = path_sweep_batch([net.adjacency for net in networks])
+            for net, sweep in zip(networks, sweeps):
+                net.summary.seed(sweep=sweep)
+    records = []
+    for i, network in enumerate(networks):
+        name = getattr(network, 'name', None)
+        with span("metric.paths", network=name, approx=approx):
+            paths = compute_path_metrics(network, approx=approx, target_error=target_error, time_budget=time_budget)
+        records.append(_topological_record(name, deg[i], cc[i], paths, mesh[i], assort[i]))
+    return records
+
+
+def compute_network_record(level, network, levels=None, topo_kind="topo", approx=False, target_error=0.05,
+                           time_budget=None, cache_dir=None):
+    """
+    Berechnet im Loader-Worker den topologischen Datensatz und die Systemmetriken
+    eines Netzes, damit statt des Netzes nur kompakte Datensätze an den
+    Hauptprozess gehen. Netze anderer Ebenen als `levels` ergeben einen Eintrag
+    ohne Metriken (topo und system None), damit ihre Quelle bekannt bleibt.
+    Mit cache_dir werden vorhandene Einträge aus dem Metrik-Cache gelesen; neu
+    berechnete Einträge liegen unter 'new' und werden vom Hauptprozess gespeichert.
+    """
+    if levels is not None and level not in levels:
+        return {'name': network.name, 'source': network.source, 'topo': None, 'system': None, 'new': {}}
+    keys = {'topo': metric_key(topo_kind, network.content_hash()),
+            'system': metric_key("system", network.content_hash())}
+    found = {}
+    if cache_dir is not None:
+        if cache_dir not in _WORKER_CACHES:
+            from real_vs_synth.analysis.metric_cache import MetricCache
+            _WORKER_CACHES[cache_dir] = MetricCache(cache_dir)
+        found = _WORKER_CACHES[cache_dir].get_many(list(keys.values()))
+    new = {}
+    if keys['topo'] not in found:
+        new[keys['topo']] = compute_topological_record(network, approx=approx, target_error=target_error,
+                                                       time_budget=time_budget)
+    if keys['system'] not in found:
+        with span("metric.system", network=network.name):
+            new[keys['system']] = compute_system_metrics(network)
+    values = dict(found, **new)
+    return {
+        'name': network.name,
+        'source': network.source,
+        'topo': values[keys['topo']],
+        'system': values[keys['system']],
+        'new': new,
+    }
@@ -0,0 +1,296 @@
+import time
+import numpy as np
+from real_vs_synth.model import topology
+from real_vs_synth.metrics.tree_paths import tree_sweep
+
+# Obergrenze für die Größe der (Knoten × Quellen)-Blöcke (dist, sigma, delta) pro Sweep
+BLOCK_ELEMENTS = 2 ** 21
+# path_sweep_batch: Netze bis zu dieser Knotenzahl werden gemeinsam ausgewertet, größere einzeln
+# (darüber sind Baumalgorithmen bzw. Einzel-Sweeps schneller als die gemeinsame BFS)
+BATCH_MAX_NODES = 100
+# path_sweep_batch: Obergrenze für Knoten × größtes Netz je Gruppe (kleiner als BLOCK_ELEMENTS, cache-freundlich)
+BATCH_ELEMENTS = 2 ** 18
+# Approximation: Quellen pro Iteration, Mindestanzahl Quellen und z-Wert (95 %-Intervall)
+APPROX_BATCH = 32
+APPROX_MIN_SOURCES = 64
+APPROX_Z = 1.96
+
+
+def _neighbours(adj, flat, s):
+    """
+    Nachbarn der (Knoten, Spalte)-Paare flat = Knoten * s + Spalte über die
+    CSR-Struktur. Rückgabe: (Index in flat, Nachbarpaar, Kantengewicht) je Kante.
+    """
+    v = flat // s
+    start, count = adj.indptr[v], adj.indptr[v + 1] - adj.indptr[v]
+    owner = np.repeat(np.arange(len(flat)), count)
+    pos = np.arange(len(owner)) - np.repeat(np.cumsum(count) - count, count) + start[owner]
+    return owner, adj.indices[pos] * np.int64(s) + flat[owner] % s, adj.data[pos]
+
+
+def _bfs_block(adj, sources, betweenness, cols=None):
+    """
+    Ebenenweise BFS von mehreren Quellen gleichzeitig (eine Spalte pro Quelle).
+    Je Ebene werden nur die Kanten der aktuellen Front (Paare aus Knoten und
+    Spalte) über die CSR-Struktur besucht, sodass der Aufwand insgesamt
+    O(Quellen · Kanten) beträgt; die Anzahl kürzester Pfade (sigma) wird dabei
+    mitgeführt. Mit `betweenness=True` folgt die Rückwärtsakkumulation nach
+    Brandes über dieselben Fronten.
+    Mit cols teilen sich mehrere Quellen eine Spalte; das ist nur für Quellen
+    in verschiedenen Komponenten zulässig (z. B. Blöcke einer blockdiagonalen Matrix).
+    Rückgabe: (dist, delta) mit dist = -1 für nicht erreichbare Knoten.
+    """
+    if cols is None:
+        cols = np.arange(len(sources))
+    n, s = adj.shape[0], int(cols.max()) + 1 if len(cols) else 0
+    dist = np.full(n * s, -1, dtype=np.int32)
+    sigma = np.zeros(n * s, dtype=np.float64)
+    frontier = np.asarray(sources, dtype=np.int64) * s + cols
+    dist[frontier] = 0
+    sigma[frontier] = 1.0
+
+    levels = [frontier]
+    while True:
+        owner, reached, weight = _neighbours(adj, frontier, s)
+        new = dist[reached] < 0
+        frontier, inverse = np.unique(reached[new], return_inverse=True)
+        if not len(frontier):
+            break
+        dist[frontier] = len(levels)
+        sigma[frontier] = np.bincount(inverse, weights=sigma[levels[-1]][owner[new]] * weight[new],
+                                      minlength=len(frontier))
+        levels.append(frontier)
+
+    if not betweenness:
+        return dist.reshape(n, s), None
+
+    delta = np.zeros(n * s, dtype=np.float64)
+    for level in range(len(levels) - 1, 0, -1):
+        at = levels[level]
+        owner, prev, weight = _neighbours(adj, at, s)
+        keep = dist[prev] == level - 1
+        coef = (1.0 + delta[at]) / sigma[at]
+        np.add.at(delta, prev[keep], sigma[prev[keep]] * coef[owner[keep]] * weight[keep])
+    delta[levels[0]] = 0.0
+    return dist.reshape(n, s), delta.reshape(n, s)
+
+
+def _bc_scale(n):
+    return 1.0 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+
+
+def _half_width(samples, population):
+    """Halbe Breite des Konfidenzintervalls eines Stichprobenmittels (ohne Zurücklegen)."""
+    k = len(samples)
+    if k < 2 or k >= population:
+        return 0.0
+    fpc = (population - k) / (population - 1)
+    return float(APPROX_Z * np.std(samples, ddof=1) / np.sqrt(k) * np.sqrt(fpc))
+
+
+def _rel(half_width, estimate):
+    return half_width / abs(estimate) if estimate else 0.0
+
+
+def approx_path_sweep(adj, betweenness=True, target_error=0.05, time_budget=None, seed=None):
+    """
+    Schätzt Pfadlänge und Betweenness aus zufällig gezogenen Quellknoten
+    (Brandes & Pich 2007). Es werden so lange Blöcke von Quellen ausgewertet,
+    bis der relative Fehler (halbe Breite des 95 %-Konfidenzintervalls /
+    Schätzwert) für mittlere Pfadlänge und mittlere Betweenness unter
+    `target_error` liegt, das Zeitbudget `time_budget` (Sekunden) aufgebraucht
+    ist oder alle Knoten Quelle waren (dann ist das Ergebnis exakt).
+    Liefert die Schlüssel von path_sweep plus 'approx' mit Stichprobengröße und
+    Konfidenzintervallen; 'diameter' ist dann eine untere Schranke.
+    """
+    if topology.meshness(adj) == 0:
+        result = tree_sweep(adj, betweenness=betweenness)
+        result['approx'] = {'exact': True, 'sources': adj.shape[0], 'cpl_ci': 0.0, 'bw_ci': 0.0,
+                            'cpl_rel_err': 0.0, 'bw_rel_err': 0.0}
+        return result
+
+    start_time = time.perf_counter()
+    n = adj.shape[0]
+    lcc = np.zeros(n, dtype=bool)
+    lcc[topology.largest_component(adj)] = True
+    n_lcc = int(lcc.sum())
+    a = adj.astype(np.float64)
+    order = np.random.default_rng(seed).permutation(n)
+    block = max(1, min(APPROX_BATCH, BLOCK_ELEMENTS // max(n, 1)))
+
+    hist = np.zeros(1, dtype=np.int64)
+    diameter = None
+    bc = np.zeros(n, dtype=np.float64)
+    source_mean_dist, source_dependency = [], []
+    used = 0
+    while used < n:
+        src = order[used:used + block]
+        used += len(src)
+        dist, delta = _bfs_block(a, src, betweenness)
+        in_lcc = lcc[src]
+        if in_lcc.any():
+            d = dist[:, in_lcc]
+            counts = np.bincount(d[d > 0])
+            if len(counts) > len(hist):
+                hist = np.pad(hist, (0, len(counts) - len(hist)))
+            hist[:len(counts)] += counts
+            diameter = max(diameter or 0, int(d.max()))
+            if n_lcc > 1:
+                source_mean_dist.extend((np.where(d > 0, d, 0).sum(axis=0) / (n_lcc - 1)).tolist())
+        if delta is not None:
+            bc += delta.sum(axis=1)
+            source_dependency.extend((delta.sum(axis=0) * _bc_scale(n)).tolist())
+
+        cpl = float(np.mean(source_mean_dist)) if source_mean_dist else 0.0
+        cpl_ci = _half_width(source_mean_dist, n_lcc)
+        bw = float(np.mean(source_dependency)) if source_dependency else 0.0
+        bw_ci = _half_width(source_dependency, n)
+        if used >= min(n, APPROX_MIN_SOURCES) and max(_rel(cpl_ci, cpl), _rel(bw_ci, bw)) <= target_error:
+            break
+        if time_budget is not None and time.perf_counter() - start_time >= time_budget:
+            break
+
+    exact = used >= n
+    sampled_lcc = max(int(lcc[order[:used]].sum()), 1)
+    if not exact:
+        # Hochrechnen auf alle Quellen der größten Komponente bzw. des Netzes
+        hist = np.rint(hist * (n_lcc / sampled_lcc)).astype(np.int64)
+        bc *= n / used
+    if betweenness:
+        bc *= _bc_scale(n)
+    return {
+        'hist': hist,
+        'diameter': diameter,
+        'betweenness': bc if betweenness else None,
+        'approx': {
+            'exact': exact, 'sources': used,
+            'cpl_ci': 0.0 if exact else cpl_ci, 'bw_ci': 0.0 if exact else bw_ci,
+            'cpl_rel_err': 0.0 if exact else _rel(cpl_ci, cpl),
+            'bw_rel_err': 0.0 if exact else _rel(bw_ci, bw),
+        },
+    }
+
+
+def path_sweep(adj, betweenness=True, sources=None):
+    """
+    Ein einziger BFS-Durchlauf pro Quelle liefert gleichzeitig:
+        'hist'         – Häufigkeit jeder Hop-Distanz (geordnete Paare, größte Komponente)
+        'diameter'     – größte Exzentrizität in der größten Komponente (None ohne Knoten)
+        'betweenness'  – Betweenness Centrality (normiert wie nx.betweenness_centrality)
+    Betweenness wird wie bisher über alle Komponenten berechnet, Pfadlängen und
+    Durchmesser nur auf der größten Komponente.
+    Radiale Netze (Meshness 0) werden mit den exakten Baumalgorithmen aus
+    tree_paths berechnet.
+    """
+    if sources is None and topology.meshness(adj) == 0:
+        return tree_sweep(adj, betweenness=betweenness)
+    n = adj.shape[0]
+    lcc = np.zeros(n, dtype=bool)
+    lcc[topology.largest_component(adj)] = True
+    if sources is None:
+        sources = np.arange(n) if betweenness else np.flatnonzero(lcc)
+
+    a = adj.astype(np.float64)
+    hist = np.zeros(1, dtype=np.int64)
+    diameter = None
+    bc = np.zeros(n, dtype=np.float64)
+    block = max(1, BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, len(sources), block):
+        src = sources[start:start + block]
+        dist, delta = _bfs_block(a, src, betweenness)
+        in_lcc = lcc[src]
+        if in_lcc.any():
+            d = dist[:, in_lcc]
+            counts = np.bincount(d[d > 0])
+            if len(counts) > len(hist):
+                hist = np.pad(hist, (0, len(counts) - len(hist)))
+            hist[:len(counts)] += counts
+            diameter = max(diameter or 0, int(d.max()))
+        if delta is not None:
+            bc += delta.sum(axis=1)
+
+    if betweenness and n > 2:
+        bc *= 1.0 / ((n - 1) * (n - 2))
+    return {
+        'hist': hist,
+        'diameter': diameter,
+        'betweenness': bc if betweenness else None,
+    }
+
+
+def _sweep_group(adjs, betweenness):
+    """
+    Pfad-Sweep für eine Gruppe kleiner Netze auf ihrer blockdiagonalen Matrix:
+    Spalte j enthält gleichzeitig die BFS von Knoten j jedes Netzes, da sich
+    die Blöcke nicht berühren. Rückgabe: je Netz ein Dict wie path_sweep.
+    """
+    adj, offsets = topology.block_diagonal(adjs)
+    k = len(adjs)
+    sizes = np.diff(offsets)
+    ids = np.repeat(np.arange(k), sizes)
+    local = np.arange(offsets[-1]) - offsets[ids]
+
+    # Größte Komponente je Netz (bei Gleichstand die mit dem ersten Knoten, wie largest_component)
+    _, labels = topology.component_labels(adj)
+    comp_size = np.bincount(labels)
+    _, first = np.unique(labels, return_index=True)
+    comp_net = ids[first]
+    ranked = np.lexsort((np.arange(len(comp_size)), -comp_size, comp_net))
+    nets, head = np.unique(comp_net[ranked], return_index=True)
+    best = np.full(k, -1, dtype=np.int64)
+    best[nets] = ranked[head]
+    lcc = labels == best[ids]
+
+    dist, delta = _bfs_block(adj.astype(np.float64), np.arange(offsets[-1]), betweenness, cols=local)
+    # Nur Quellen der größten Komponente zählen für Histogramm und Durchmesser
+    width = dist.shape[1]
+    source = offsets[ids][:, None] + np.arange(width)[None, :]
+    valid = np.arange(width)[None, :] < sizes[ids][:, None]
+    in_lcc = valid & lcc[np.where(valid, source, 0)]
+    d = np.where(in_lcc, dist, -1)
+    diameter = np.full(k, -1, dtype=np.int64)
+    np.maximum.at(diameter, ids, d.max(axis=1) if width else np.full(len(ids), -1))
+    pairs = d > 0
+    n_bins = int(d.max(initial=0)) + 1
+    hist = np.bincount((ids[:, None] * n_bins + d)[pairs], minlength=k * n_bins).reshape(k, n_bins)
+
+    if betweenness:
+        bc = delta.sum(axis=1) if width else np.zeros(0)
+        scale = np.where(sizes > 2, 1.0 / np.maximum((sizes - 1) * (sizes - 2), 1), 1.0)
+        bc = bc * scale[ids]
+    results = []
+    for i in range(k):
+        lo, hi = offsets[i], offsets[i + 1]
+        results.append({
+            'hist': hist[i, :max(int(diameter[i]), 0) + 1].copy(),
+            'diameter': int(diameter[i]) if hi > lo else None,
+            'betweenness': bc[lo:hi].copy() if betweenness else None,
+        })
+    return results
+
+
+def path_sweep_batch(adjs, betweenness=True):
+    """
+    Exakter Pfad-Sweep (wie path_sweep) für viele Netze: Netze bis
+    BATCH_MAX_NODES Knoten werden nach Größe sortiert und gruppenweise auf
+    einer blockdiagonalen Matrix ausgewertet, sodass je Gruppe nur eine BFS
+    über alle Netze läuft. Jede Gruppe bleibt unter BATCH_ELEMENTS
+    (Knoten × größtes Netz). Größere Netze laufen einzeln über path_sweep.
+    Rückgabe: je Netz ein Dict wie path_sweep, in der Reihenfolge von adjs.
+    """
+    sizes = np.array([a.shape[0] for a in adjs], dtype=np.int64)
+    results = [None] * len(adjs)
+    small = [i for i in np.argsort(sizes, kind="stable") if sizes[i] <= BATCH_MAX_NODES]
+    for i in np.flatnonzero(sizes > BATCH_MAX_NODES):
+        results[i] = path_sweep(adjs[i], betweenness=betweenness)
+    group, nodes = [], 0
+    for i in small + [None]:
+        # Aufsteigend sortiert: das zuletzt hinzugefügte Netz bestimmt die Blockbreite
+        if group and (i is None or (nodes + sizes[i]) * max(sizes[i], 1) > BATCH_ELEMENTS):
+            for j, sweep in zip(group, _sweep_group([adjs[j] for j in group], betweenness)):
+                results[j] = sweep
+            group, nodes = [], 0
+        if i is not None:
+            group.append(i)
+            nodes += sizes[i]
+    return results
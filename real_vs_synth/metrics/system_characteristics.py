@@ -1,118 +1,201 @@
 import numpy as np
-import networkx as nx
+
+from real_vs_synth.model.arrays import GEN_PV, GEN_WIND, LINE_OVERHEAD, LINE_UNDERGROUND
+
+
+# --- Gruppierte Kenngrößen (ids = Netznummer je Zeile) ---
+def _group_sum(ids, values, n):
+    # Ohne Zeilen liefert bincount Ganzzahlen, daher immer float
+    return np.bincount(ids, weights=values, minlength=n).astype(np.float64, copy=False)
+
+def _group_mean_std(ids, values, n, empty=0.0):
+    """Mittelwert und Standardabweichung (ddof=0) je Netz; leere Gruppen erhalten `empty` bzw. 0."""
+    count = np.bincount(ids, minlength=n)
+    safe = np.maximum(count, 1)
+    mean = _group_sum(ids, values, n) / safe
+    var = _group_sum(ids, (values - mean[ids]) ** 2, n) / safe
+    return np.where(count > 0, mean, empty), np.sqrt(var), count
+
+def _stack(networks, fields):
+    """
+    Hängt die Felder `fields` (siehe GridArrays) aller Netze aneinander.
+    Alle Felder müssen zur selben Tabelle gehören. Rückgabe: (ids, {Feld: Array}).
+    """
+    arrays = [net.arrays for net in networks]
+    ids = np.repeat(np.arange(len(arrays)), [len(getattr(a, fields[0])) for a in arrays])
+    return ids, {field: np.concatenate([getattr(a, field) for a in arrays]) for field in fields}
+
 
 # --- Systemmetriken ---
 def total_line_length(network):
     """
     Berechnet die gesamte Leitungslänge des Netzwerks in Kilometern.
     """
-    return sum(line.length_km for line in network.lines)
+    return float(network.arrays.line_length_km.sum())
 
 def line_length_per_customer(network):
     """
     Leitungslänge pro Kunde. Fallback: Anzahl Loads als Kunden.
     """
-    num_customers = network.num_customers or len(list(network.loads))
+    num_customers = network.arrays.customers
     return total_line_length(network) / num_customers if num_customers > 0 else 0.0
 
 def line_length_per_area(network):
     """
     Leitungslänge pro Quadratkilometer Netzfläche, anhand Buskoordinaten.
     """
-    coords = [(getattr(bus, 'x', 0.0), getattr(bus, 'y', 0.0)) for bus in network.buses]
-    if not coords:
-        return 0.0
-    min_x, max_x = min(p[0] for p in coords), max(p[0] for p in coords)
-    min_y, max_y = min(p[1] for p in coords), max(p[1] for p in coords)
-    area = (max_x - min_x) * (max_y - min_y)
-    return total_line_length(network) / area if area > 0 else 0.0
+    total, _, _ = _line_columns([network])
+    area = _areas([network])
+    return _per_area(total, area, 0)
 
 def overhead_underground_share(network):
     """
     Anteil oberirdischer und unterirdischer Leitungen in Prozent.
     """
-    overhead = sum(line.length_km for line in network.lines if getattr(line, 'type', '').lower() in ['overhead', 'ohl'])
-    underground = sum(line.length_km for line in network.lines if getattr(line, 'type', '').lower() in ['underground', 'uhl', 'cable'])
-    total = overhead + underground
-    return (overhead / total * 100 if total else 0.0,
-            underground / total * 100 if total else 0.0)
+    _, overhead, underground = _line_columns([network])
+    return _shares(overhead, underground, 0)
 
 def transformer_stats(network):
     """
     Anzahl, mittlere Leistung (kVA) und mittleres X/R-Verhältnis von Transformatoren.
     """
-    trafos = list(network.transformers)
-    count = len(trafos)
-    kva = [getattr(t, 'rating_kva', 0.0) for t in trafos]
-    xr = [(getattr(t, 'x_ohm', 0.0) / getattr(t, 'r_ohm', 1e-6)) for t in trafos if getattr(t, 'r_ohm', 0.0) > 0]
-    return {
-        'count': count,
-        'avg_kva': np.mean(kva) if kva else 0.0,
-        'std_kva': np.std(kva) if kva else 0.0,
-        'xr_values': xr,
-        'avg_xr': np.mean(xr) if xr else 0.0,
-        'std_xr': np.std(xr) if xr else 0.0
-    }
+    return _row(_trafo_columns([network]), 0)
 
 def load_stats(network):
     """
     Gesamtleistung (P, Q), mittlere Last pro Kunde, Leistungsfaktor.
     """
-    loads = list(network.loads)
-    p_values = [getattr(l, 'p_kw', getattr(l, 'p_mw', 0.0) * 1000) for l in loads]
-    q_values = [getattr(l, 'q_kvar', getattr(l, 'q_mvar', 0.0) * 1000) for l in loads]
-    total_p, total_q = sum(p_values), sum(q_values)
-    avg_p = np.mean(p_values) if p_values else 0.0
-    s_values = [(p ** 2 + q ** 2) ** 0.5 for p, q in zip(p_values, q_values)]
-    power_factors = [p / s if s > 1e-6 else 1.0 for p, s in zip(p_values, s_values)]
-    return {
-        'total_p_kw': total_p,
-        'total_q_kvar': total_q,
-        'avg_p_kw': avg_p,
-        'std_p_kw': np.std(p_values) if p_values else 0.0,
-        'power_factor_mean': np.mean(power_factors) if power_factors else 1.0,
-        'power_factor_std': np.std(power_factors) if power_factors else 0.0
-    }
+    return _row(_load_columns([network]), 0)
 
 def generation_stats(network):
     """
     PV/Wind/Andere Einspeisung in kW, jeweils aufsummiert und verteilt.
     """
-    gen = list(network.generators)
-    pv = [getattr(g, 'p_kw', 0.0) for g in gen if 'pv' in getattr(g, 'type', '').lower()]
-    wind = [getattr(g, 'p_kw', 0.0) for g in gen if 'wind' in getattr(g, 'type', '').lower()]
-    other = [getattr(g, 'p_kw', 0.0) for g in gen if 'pv' not in getattr(g, 'type', '').lower() and 'wind' not in getattr(g, 'type', '').lower()]
-    return {
-        'total_pv_kw': sum(pv), 'std_pv_kw': np.std(pv) if pv else 0.0,
-        'total_wind_kw': sum(wind), 'std_wind_kw': np.std(wind) if wind else 0.0,
-        'total_other_kw': sum(other), 'std_other_kw': np.std(other) if other else 0.0
-    }
+    return _row(_gen_columns([network]), 0)
+
+
+# --- Spalten je Tabelle (ein Wert bzw. eine Liste je Netz) ---
+def _line_columns(networks):
+    """Gesamte, oberirdische und unterirdische Leitungslänge je Netz."""
+    n = len(networks)
+    line_ids, line = _stack(networks, ('line_length_km', 'line_kind'))
+    length = line['line_length_km']
+    total = _group_sum(line_ids, length, n)
+    overhead = _group_sum(line_ids, np.where(line['line_kind'] == LINE_OVERHEAD, length, 0.0), n)
+    underground = _group_sum(line_ids, np.where(line['line_kind'] == LINE_UNDERGROUND, length, 0.0), n)
+    return total, overhead, underground
+
+def _areas(networks):
+    """Fläche aus der Ausdehnung der Buskoordinaten je Netz (fehlende Koordinaten zählen als 0)."""
+    n = len(networks)
+    bus_ids, bus = _stack(networks, ('bus_x', 'bus_y'))
+    extent = np.ones(n)
+    for values in (bus['bus_x'], bus['bus_y']):
+        # fmin/fmax überspringen nan wie pandas; Netze ohne gültige Koordinate erhalten nan
+        lo, hi = np.full(n, np.inf), np.full(n, -np.inf)
+        np.fmin.at(lo, bus_ids, values)
+        np.fmax.at(hi, bus_ids, values)
+        extent *= np.where(np.isfinite(lo), hi - lo, np.nan)
+    return np.where(np.bincount(bus_ids, minlength=n) > 0, extent, 0.0)
+
+def _per_area(total, area, i):
+    return float(total[i] / area[i]) if area[i] > 0 else 0.0
+
+def _shares(overhead, underground, i):
+    typed = overhead[i] + underground[i]
+    return (float(overhead[i] / typed * 100) if typed else 0.0,
+            float(underground[i] / typed * 100) if typed else 0.0)
+
+def _trafo_columns(networks):
+    """Anzahl, Leistung (kVA) und X/R-Verhältnis der Transformatoren je Netz."""
+    n = len(networks)
+    trafo_ids, trafo = _stack(networks, ('trafo_kva', 'trafo_x_ohm', 'trafo_r_ohm'))
+    kva_mean, kva_std, count = _group_mean_std(trafo_ids, trafo['trafo_kva'], n)
+    with_r = trafo['trafo_r_ohm'] > 0
+    xr_ids = trafo_ids[with_r]
+    xr = trafo['trafo_x_ohm'][with_r] / trafo['trafo_r_ohm'][with_r]
+    xr_mean, xr_std, _ = _group_mean_std(xr_ids, xr, n)
+    xr_split = np.split(xr, np.cumsum(np.bincount(xr_ids, minlength=n))[:-1])
+    return {'count': count, 'avg_kva': kva_mean, 'std_kva': kva_std,
+            'xr_values': xr_split, 'avg_xr': xr_mean, 'std_xr': xr_std}
+
+def _load_columns(networks):
+    """Gesamt- und mittlere Last sowie Leistungsfaktor je Netz."""
+    n = len(networks)
+    load_ids, load = _stack(networks, ('load_p_kw', 'load_q_kvar'))
+    p, q = load['load_p_kw'], load['load_q_kvar']
+    p_mean, p_std, _ = _group_mean_std(load_ids, p, n)
+    s = np.hypot(p, q)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pf = np.where(s > 1e-6, p / s, 1.0)
+    pf_mean, pf_std, _ = _group_mean_std(load_ids, pf, n, empty=1.0)
+    return {'total_p_kw': _group_sum(load_ids, p, n), 'total_q_kvar': _group_sum(load_ids, q, n),
+            'avg_p_kw': p_mean, 'std_p_kw': p_std, 'power_factor_mean': pf_mean, 'power_factor_std': pf_std}
+
+def _gen_columns(networks):
+    """Erzeugung nach Typ (PV, Wind, Andere) je Netz: Summe und Standardabweichung in kW."""
+    n = len(networks)
+    gen_ids, gen = _stack(networks, ('gen_p_kw', 'gen_kind'))
+    is_pv = (gen['gen_kind'] & GEN_PV) != 0
+    is_wind = (gen['gen_kind'] & GEN_WIND) != 0
+    columns = {}
+    for name, mask in (('pv', is_pv), ('wind', is_wind), ('other', ~is_pv & ~is_wind)):
+        _, std, _ = _group_mean_std(gen_ids[mask], gen['gen_p_kw'][mask], n)
+        columns[f'total_{name}_kw'] = _group_sum(gen_ids[mask], gen['gen_p_kw'][mask], n)
+        columns[f'std_{name}_kw'] = std
+    return columns
+
+def _row(columns, i, prefix=''):
+    """Werte des Netzes i aus Spalten wie _trafo_columns (Listen als list, Anzahlen als int)."""
+    row = {}
+    for key, values in columns.items():
+        v = values[i]
+        if isinstance(values, list):
+            v = v.tolist()
+        else:
+            v = int(v) if values.dtype.kind in 'iu' else float(v)
+        row[prefix + key] = v
+    return row
+
 
 def compute_system_metrics(network):
     """
     Ermittelt alle Systemmetriken inkl. Verteilungen und statistischer Kenngrößen.
     """
-    metrics = {
-        'total_line_length_km': total_line_length(network),
-        'line_length_per_customer_km': line_length_per_customer(network),
-        'line_length_per_area_km2': line_length_per_area(network),
-    }
-    oh, uh = overhead_underground_share(network)
-    metrics['overhead_share_percent'] = oh
-    metrics['underground_share_percent'] = uh
-
-    # Transformatorenmetriken
-    metrics.update({f"trafo_{k}": v for k, v in transformer_stats(network).items()})
-
-    # Lastmetriken
-    metrics.update({f"load_{k}": v for k, v in load_stats(network).items()})
+    return compute_system_metrics_batch([network])[0]
 
-    # Erzeugungsmetriken
-    metrics.update({f"gen_{k}": v for k, v in generation_stats(network).items()})
+def compute_system_metrics_batch(networks):
+    """
+    Berechnet die Systemmetriken vieler Netze auf einmal: Die Arrays aller
+    Netze (Network.arrays) werden aneinandergehängt und je Netznummer ausgewertet.
+    Gibt je Netz ein Dict in derselben Form wie compute_system_metrics zurück.
+    """
+    n = len(networks)
+    if n == 0:
+        return []
 
-    # Kunden pro Trafo
-    num_customers = network.num_customers or len(list(network.loads))
-    trafo_count = metrics.get('trafo_count', 1)
-    metrics['customers_per_transformer'] = num_customers / trafo_count if trafo_count > 0 else 0.0
+    total_length, overhead, underground = _line_columns(networks)
+    area = _areas(networks)
+    trafo = _trafo_columns(networks)
+    load = _load_columns(networks)
+    gen = _gen_columns(networks)
+    customers = np.array([net.arrays.customers for net in networks])
 
-    return metrics
+    results = []
+    for i in range(n):
+        overhead_share, underground_share = _shares(overhead, underground, i)
+        metrics = {
+            'total_line_length_km': float(total_length[i]),
+            'line_length_per_customer_km': float(total_length[i] / customers[i]) if customers[i] > 0 else 0.0,
+            'line_length_per_area_km2': _per_area(total_length, area, i),
+            'overhead_share_percent': overhead_share,
+            'underground_share_percent': underground_share,
+        }
+        metrics.update(_row(trafo, i, 'trafo_'))
+        metrics.update(_row(load, i, 'load_'))
+        metrics.update(_row(gen, i, 'gen_'))
+        # Kunden pro Trafo
+        count = trafo['count'][i]
+        metrics['customers_per_transformer'] = float(customers[i] / count) if count > 0 else 0.0
+        results.append(metrics)
+    return results
@@ -1,60 +1,108 @@
 import numpy as np
-import networkx as nx
+from real_vs_synth.model import topology
+from real_vs_synth.model.batch import NetworkBatch
+from real_vs_synth.metrics.shortest_paths import approx_path_sweep
 
 def compute_node_degree_metrics(network):
     """
     Berechnet die Knotengradmetriken (mean, std, Verteilung) eines Netzwerks.
     """
-    G = nx.Graph(network.graph)
-    degrees = np.array([deg for _, deg in G.degree()])
+    degrees = network.summary.degrees
     return float(np.mean(degrees)), float(np.std(degrees)), degrees.tolist()
 
 def compute_clustering_coefficient(network):
     """
     Berechnet den lokalen Clustering-Koeffizienten für jeden Knoten und gibt
     Mittelwert, Standardabweichung sowie alle Einzelwerte zurück.
+    Wie bisher zählen nur Knoten mit mindestens einer Kante.
     """
-    mg = network.graph
-    unique_edges = set((min(u, v), max(u, v)) for u, v in mg.edges())
-    G_simple = nx.Graph()
-    G_simple.add_edges_from(unique_edges)
-    clustering_dict = nx.clustering(G_simple)
-    values = np.array(list(clustering_dict.values()))
+    summary = network.summary
+    values = summary.clustering[summary.degrees > 0]
     return float(np.mean(values)), float(np.std(values)), values.tolist()
 
-def compute_characteristic_path_length(network):
-    """
-    Berechnet durchschnittliche Pfadlänge (mean) auf der größten Komponente.
-    """
-    G = nx.Graph(network.graph)
-    if not nx.is_connected(G):
-        largest = max(nx.connected_components(G), key=len)
-        G = G.subgraph(largest)
-    path_len_dict = dict(nx.all_pairs_shortest_path_length(G))
-    path_lengths = [d for lengths in path_len_dict.values() for d in lengths.values() if d > 0]
-    avg = float(np.mean(path_lengths)) if path_lengths else 0.0
-    return avg, 0.0, path_lengths  # stddev bleibt 0.0
+def compute_clustering_coefficients(networks):
+    """
+    Clustering-Koeffizienten vieler Netze in einem Aufruf: Die Adjazenzen
+    werden blockdiagonal zusammengefasst (NetworkBatch), Dreiecke und lokale
+    Werte mit einer einzigen dünnbesetzten Matrixmultiplikation berechnet und
+    Mittelwert und Standardabweichung je Netz gruppiert bestimmt. Dreiecke und
+    Werte landen zusätzlich in der TopologySummary jedes Netzes.
+    Rückgabe je Netz wie compute_clustering_coefficient.
+    """
+    if not networks:
+        return []
+    batch = networks if isinstance(networks, NetworkBatch) else NetworkBatch(networks)
+    # Wie compute_clustering_coefficient nur Knoten mit mindestens einer Kante
+    mean, std, values = batch.mean_std(batch.clustering, mask=batch.degrees > 0)
+    batch.seed_summaries()
+    return [(float(m), float(s), v.tolist()) for m, s, v in zip(mean, std, values)]
+
+def compute_node_degree_metrics_batch(batch):
+    """Knotengradmetriken aller Netze eines NetworkBatch, je Netz wie compute_node_degree_metrics."""
+    mean, std, values = batch.mean_std(batch.degrees)
+    return [(float(m), float(s), v.tolist()) for m, s, v in zip(mean, std, values)]
+
+def hist_mean_std(hist):
+    """Mittelwert und Standardabweichung aus einem Hop-Histogramm (Index = Hop-Anzahl)."""
+    hist = np.asarray(hist, dtype=np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 0.0, 0.0
+    hops = np.arange(len(hist))
+    mean = float((hops * hist).sum() / total)
+    var = float((((hops - mean) ** 2) * hist).sum() / total)
+    return mean, var ** 0.5
+
+def compute_path_metrics(network, betweenness=True, approx=False, target_error=0.05, time_budget=None, seed=None):
+    """
+    Berechnet Pfadlänge, Durchmesser und Betweenness Centrality in einem
+    einzigen BFS-Durchlauf pro Quelle (siehe shortest_paths.path_sweep).
+    Gibt ein Dict mit denselben Rückgabewerten wie die Einzelfunktionen zurück:
+        'cpl': (mean, std, Hop-Histogramm), 'diameter': (d, [d]), 'bw': (mean, std, Einzelwerte)
+    Mit approx=True werden nur zufällige Quellknoten ausgewertet, bis der relative
+    Fehler unter target_error liegt oder time_budget (Sekunden) erreicht ist
+    (siehe shortest_paths.approx_path_sweep). 'approx' enthält dann Stichprobengröße
+    und Konfidenzintervalle, sonst None.
+    """
+    if approx:
+        sweep = approx_path_sweep(network.adjacency, betweenness=betweenness, target_error=target_error,
+                                  time_budget=time_budget, seed=seed)
+    else:
+        sweep = network.summary.path_sweep(betweenness=betweenness)
+    hist = sweep['hist']
+    avg, std = hist_mean_std(hist)
+    d = sweep['diameter']
+    result = {
+        'cpl': (avg, std, hist.tolist()),
+        'diameter': (float(d), [float(d)]) if d is not None else (0.0, []),
+        'approx': sweep.get('approx'),
+    }
+    if betweenness:
+        values = sweep['betweenness']
+        result['bw'] = (float(np.mean(values)), float(np.std(values)), values.tolist())
+    return result
+
+def compute_characteristic_path_length(network, approx=False, target_error=0.05, time_budget=None):
+    """
+    Berechnet durchschnittliche Pfadlänge (mean, std) auf der größten Komponente.
+    Die Verteilung wird als Hop-Histogramm zurückgegeben: Eintrag h zählt die
+    (geordneten) Knotenpaare im Abstand h, der Speicherbedarf wächst also nur
+    mit dem Durchmesser statt mit N².
+    """
+    return compute_path_metrics(network, betweenness=False, approx=approx, target_error=target_error,
+                                time_budget=time_budget)['cpl']
 
 def compute_graph_diameter(network):
-    G = nx.Graph(network.graph)
-    if not nx.is_connected(G):
-        largest = max(nx.connected_components(G), key=len)
-        G = G.subgraph(largest)
-    try:
-        d = float(nx.diameter(G))
-        return d, [d]  # <== füge den Wert als "Verteilung" hinzu
-    except Exception:
-        return 0.0, []
+    return compute_path_metrics(network, betweenness=False)['diameter']
 
-def compute_betweenness_centrality(network):
+def compute_betweenness_centrality(network, approx=False, target_error=0.05, time_budget=None):
     """
     Berechnet die Betweenness Centrality aller Knoten
     und gibt Mittelwert, Standardabweichung sowie Einzelwerte zurück.
+    Mit approx=True als Stichprobenschätzung (siehe compute_path_metrics).
     """
-    G = nx.Graph(network.graph)
-    bc_dict = nx.betweenness_centrality(G)
-    values = np.array(list(bc_dict.values()))
-    return float(np.mean(values)), float(np.std(values)), values.tolist()
+    return compute_path_metrics(network, approx=approx, target_error=target_error,
+                                time_budget=time_budget)['bw']
 
 def compute_degree_assortativity(network):
     """
@@ -67,10 +115,9 @@ def compute_degree_assortativity(network):
     In städtischen MV-Netzen kann ρ ≈ 0.5 (moderat positiv) auftreten.
     Quelle: siehe Literaturhinweis im Chat.
     """
-    G = nx.Graph(network.graph)
-    if G.number_of_edges() == 0:
+    if network.summary.n_edges == 0:
         return 0.0  # Nicht definiert, Standardwert 0
-    return nx.degree_assortativity_coefficient(G)
+    return topology.degree_assortativity(network.adjacency)
 
 def compute_meshness(network):
     """
@@ -81,11 +128,6 @@ def compute_meshness(network):
     μ > 0: vermascht
     Quelle: Albert et al., Science 2004.
     """
-    G = nx.Graph(network.graph)
-    n_nodes = G.number_of_nodes()
-    n_edges = G.number_of_edges()
-    n_components = nx.number_connected_components(G)
-    meshness = n_edges - n_nodes + n_components
-    return meshness
+    return network.summary.meshness
 
 # Die Funktion für Meshness (Vermaschtheit) kannst du ebenfalls ergänzen (siehe voriger Post).
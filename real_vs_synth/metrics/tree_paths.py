@@ -0,0 +1,164 @@
+import numpy as np
+from scipy.sparse import bmat, csr_matrix
+from scipy.sparse.csgraph import breadth_first_order, shortest_path
+from real_vs_synth.model import topology
+
+
+def _bfs_depth(adj, root):
+    """Hop-Abstände von `root` (-1 für nicht erreichbare Knoten)."""
+    d = shortest_path(adj, indices=root, unweighted=True, directed=False)
+    return np.where(np.isfinite(d), d, -1).astype(np.int64)
+
+
+def _rooted_forest(adj, roots):
+    """
+    Wurzelt jeden Baum an der jeweiligen Wurzel. Rückgabe: (order, pred, depth)
+    mit der BFS-Reihenfolge aller erreichten Knoten, Vorgänger (-1 für Wurzeln)
+    und Tiefe je Knoten (-1 für nicht erreichte Knoten).
+    Alle Bäume werden über einen virtuellen Wurzelknoten in einer BFS erfasst.
+    """
+    n = adj.shape[0]
+    roots = np.asarray(roots, dtype=np.int64)
+    link = csr_matrix((np.ones(len(roots), dtype=adj.dtype), (roots, np.zeros(len(roots), dtype=np.int64))),
+                      shape=(n, 1))
+    ext = bmat([[adj, link], [link.T, None]], format="csr")
+    order, p = breadth_first_order(ext, n, directed=False, return_predecessors=True)
+    order = order[1:]
+    pred = np.full(n, -1, dtype=np.int64)
+    pred[order] = p[order]
+    pred[pred == n] = -1
+    depth = np.full(n, -1, dtype=np.int64)
+    depth[order] = _bfs_depth(ext, n)[order] - 1
+    return order, pred, depth
+
+
+def _levels(nodes, depth):
+    """Gruppiert `nodes` nach Tiefe, tiefste Ebene zuerst."""
+    if len(nodes) == 0:
+        return []
+    nodes = nodes[np.argsort(-depth[nodes], kind="stable")]
+    _, starts = np.unique(-depth[nodes], return_index=True)
+    return np.split(nodes, starts[1:])
+
+
+def _trim(hist):
+    """Entfernt leere Einträge am Ende, behält aber mindestens den Eintrag für Abstand 0."""
+    return hist[:max(len(np.trim_zeros(hist, "b")), 1)]
+
+
+def tree_betweenness(adj, labels, n_total):
+    """
+    Exakte Betweenness für Wälder über Teilbaumgrößen: Ein Knoten v liegt genau
+    auf den Pfaden zwischen je zwei der Teilbäume, die beim Entfernen von v
+    entstehen, also B(v) = ((n_c - 1)² - Σ s_i²) / 2.
+    Normierung wie nx.betweenness_centrality (n_total = Knoten im Gesamtgraphen).
+    """
+    n = adj.shape[0]
+    comp_size = np.bincount(labels, minlength=labels.max() + 1 if n else 0)
+    # Komponenten mit weniger als drei Knoten haben keine inneren Knoten
+    roots = [np.flatnonzero(labels == c)[0] for c in np.flatnonzero(comp_size >= 3)]
+    order, pred, depth = _rooted_forest(adj, roots)
+
+    bc = np.zeros(n, dtype=np.float64)
+    if len(order) == 0:
+        return bc
+    child = order[pred[order] >= 0]
+    size = np.zeros(n, dtype=np.int64)
+    size[order] = 1
+    for nodes in _levels(child, depth):
+        np.add.at(size, pred[nodes], size[nodes])
+
+    n_c = comp_size[labels]
+    sumsq = np.zeros(n, dtype=np.float64)
+    np.add.at(sumsq, pred[child], size[child].astype(np.float64) ** 2)
+    sumsq[child] += (n_c[child] - size[child]).astype(np.float64) ** 2
+    pairs = np.zeros(n, dtype=np.float64)
+    pairs[order] = ((n_c[order] - 1).astype(np.float64) ** 2 - sumsq[order]) / 2.0
+    if n_total > 2:
+        bc = 2.0 * pairs / ((n_total - 1) * (n_total - 2))
+    return bc
+
+
+def tree_diameter(adj, nodes):
+    """Durchmesser eines Baums per doppelter BFS."""
+    if len(nodes) == 0:
+        return None
+    d = _bfs_depth(adj, nodes[0])
+    far = int(np.argmax(d))
+    return int(_bfs_depth(adj, far).max())
+
+
+def tree_distance_hist(adj, root):
+    """
+    Histogramm aller Hop-Abstände (ungeordnete Paare) im Baum von `root`.
+    Vorfahre-Nachfahre-Paare ergeben sich direkt aus den Tiefen, alle übrigen
+    Paare per Tiefenzählung je Teilbaum (Long-Path-Zerlegung): Der höchste
+    Kindteilbaum teilt sich das Zählarray mit dem Elternknoten, nur die übrigen
+    Kinder werden per Faltung zusammengeführt.
+    """
+    order, pred, depth = _rooted_forest(adj, [root])
+    n_nodes = len(order)
+    max_depth = int(depth[order].max())
+    hist = np.zeros(2 * max_depth + 2, dtype=np.int64)
+
+    # Vorfahre-Nachfahre-Paare im Abstand d: Anzahl Knoten mit Tiefe >= d
+    at_depth = np.bincount(depth[order])
+    hist[1:max_depth + 1] = np.cumsum(at_depth[::-1])[::-1][1:]
+    if n_nodes < 3:
+        return _trim(hist)
+
+    child = order[pred[order] >= 0]
+    levels = _levels(child, depth)
+    height = np.zeros(adj.shape[0], dtype=np.int64)
+    for nodes in levels:
+        np.maximum.at(height, pred[nodes], height[nodes] + 1)
+
+    # Höchstes Kind je Elternknoten bestimmen
+    by_parent = child[np.lexsort((-height[child], pred[child]))]
+    first = np.ones(len(by_parent), dtype=bool)
+    first[1:] = pred[by_parent[1:]] != pred[by_parent[:-1]]
+    heavy = np.zeros(adj.shape[0], dtype=bool)
+    heavy[by_parent[first]] = True
+
+    # Segmente im gemeinsamen Puffer: Wurzel und leichte Kinder beginnen ein
+    # neues Segment, schwere Kinder liegen direkt hinter ihrem Elternknoten
+    heads = order[~heavy[order]]
+    offsets = np.concatenate([[0], np.cumsum(height[heads] + 1)[:-1]])
+    pos = np.zeros(adj.shape[0], dtype=np.int64)
+    pos[heads] = offsets
+    for nodes in reversed(levels):
+        h = nodes[heavy[nodes]]
+        pos[h] = pos[pred[h]] + 1
+
+    buf = np.zeros(int(offsets[-1] + height[heads[-1]] + 1), dtype=np.int64)
+    buf[pos[order]] = 1
+    for nodes in levels:
+        for c in nodes[~heavy[nodes]]:
+            v = pred[c]
+            light = buf[pos[c]:pos[c] + height[c] + 1]
+            acc = buf[pos[v] + 1:pos[v] + height[v] + 1]
+            conv = np.convolve(light, acc)
+            hist[2:2 + len(conv)] += conv
+            buf[pos[v] + 1:pos[v] + 1 + len(light)] += light
+    return _trim(hist)
+
+
+def tree_sweep(adj, betweenness=True):
+    """
+    Exakte Pfadmetriken für radiale Netze (Wälder) in nahezu linearer Zeit.
+    Liefert dieselben Schlüssel wie shortest_paths.path_sweep.
+    """
+    n = adj.shape[0]
+    n_comp, labels = topology.component_labels(adj)
+    if n_comp == 0:
+        return {'hist': np.zeros(1, dtype=np.int64), 'diameter': None,
+                'betweenness': np.zeros(0) if betweenness else None}
+    lcc = np.flatnonzero(labels == np.argmax(np.bincount(labels)))
+    # Ungeordnete Paare verdoppeln, damit die Zählung dem allgemeinen Fall entspricht
+    hist = 2 * tree_distance_hist(adj, lcc[0])
+    hist[0] = 0
+    return {
+        'hist': hist,
+        'diameter': tree_diameter(adj, lcc),
+        'betweenness': tree_betweenness(adj, labels, n) if betweenness else None,
+    }
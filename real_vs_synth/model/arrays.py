@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# Leitungstypen für die Anteile oberirdisch / unterirdisch
+OVERHEAD_TYPES = ['overhead', 'ohl']
+UNDERGROUND_TYPES = ['underground', 'uhl', 'cable']
+
+# Tabellen und Spalten, die Topologie- und Systemmetriken tatsächlich verwenden
+# (Inhalt des Grid-Caches und des Inhalts-Hashes). Fehlende Spalten werden übersprungen.
+GRID_COLUMNS = {
+    "bus": ["vn_kv", "in_service", "x", "y", "geo"],
+    "line": ["from_bus", "to_bus", "length_km", "type", "in_service"],
+    "trafo": ["hv_bus", "lv_bus", "sn_mva", "rating_kva", "x_ohm", "r_ohm", "in_service"],
+    "trafo3w": ["hv_bus", "mv_bus", "lv_bus", "in_service"],
+    "impedance": ["from_bus", "to_bus", "in_service"],
+    "dcline": ["from_bus", "to_bus", "in_service"],
+    "switch": ["bus", "element", "et", "closed"],
+    "load": ["bus", "p_mw", "q_mvar", "p_kw", "q_kvar", "num_customers", "in_service"],
+    "gen": ["bus", "p_mw", "p_kw", "type", "in_service"],
+    "ext_grid": ["bus", "in_service"],
+}
+
+# Codes für GridArrays.line_kind
+LINE_OTHER, LINE_OVERHEAD, LINE_UNDERGROUND = 0, 1, 2
+# Bitflags für GridArrays.gen_kind (ein Typ wie 'pv_wind' setzt beide)
+GEN_PV, GEN_WIND = 1, 2
+
+
+# --- Spaltenzugriff ---
+def _table(pp_net, name):
+    """Tabelle `name` eines pandapower-Netzes bzw. GridTables (leerer DataFrame, falls sie fehlt)."""
+    df = pp_net.get(name) if isinstance(pp_net, dict) else getattr(pp_net, name, None)
+    return df if df is not None else pd.DataFrame()
+
+def _column(df, col, default=0.0):
+    """Spalte als float-Array; fehlt sie, wird `default` für jede Zeile verwendet."""
+    if col in df.columns:
+        return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+    return np.full(len(df), default, dtype=np.float64)
+
+def _type_column(df, col='type'):
+    """Typ-Spalte in Kleinbuchstaben; fehlende oder nicht-textuelle Einträge werden zu ''."""
+    if col not in df.columns:
+        return np.full(len(df), '', dtype=object)
+    values = df[col].to_numpy(dtype=object)
+    return np.array([v.lower() if isinstance(v, str) else '' for v in values], dtype=object)
+
+def column_array(series):
+    """
+    Spalte als NumPy-Array ohne Objekt-Dtype (Texte als Unicode, fehlende Werte
+    als ''). Objektspalten ohne Texte werden numerisch, sodass eine gelesene
+    Spalte wieder dasselbe Array ergibt.
+    """
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        if series.notna().any() and not any(isinstance(v, str) for v in series):
+            try:
+                return pd.to_numeric(series).to_numpy()
+            except (ValueError, TypeError):
+                pass
+        return np.array(["" if v is None or v is pd.NA or (isinstance(v, float) and np.isnan(v)) else str(v)
+                         for v in series], dtype=str)
+    return series.to_numpy()
+
+def grid_columns(pp_net):
+    """
+    Liefert je Tabelle aus GRID_COLUMNS (Tabelle, Index, {Spalte: Array}) in
+    derselben Darstellung für pandapower-Netze und GridTables.
+    """
+    for table, columns in GRID_COLUMNS.items():
+        df = _table(pp_net, table)
+        yield table, df.index.to_numpy(dtype=np.int64), {col: column_array(df[col])
+                                                         for col in columns if col in df.columns}
+
+def _power_kw(df, kw, mw):
+    """Leistung in kW: Spalte `kw`, sonst `mw` * 1000 (fehlt beides: 0)."""
+    return _column(df, kw) if kw in df.columns else _column(df, mw) * 1000
+
+
+class GridArrays:
+    """
+    Kompakte Werte eines Netzes für die Systemmetriken: je Tabelle typisierte
+    NumPy-Arrays statt pandas-DataFrames (Textspalten als kleine Codes). Die
+    Topologie (Kantenliste) liegt als CSR-Adjazenz im Network selbst. Nach
+    dem Extrahieren wird das pandapower-Netz für die Systemmetriken nicht mehr
+    benötigt (Network.release_pp_net).
+    """
+
+    __slots__ = ('bus_vn_kv', 'bus_x', 'bus_y',
+                 'line_length_km', 'line_kind',
+                 'trafo_kva', 'trafo_x_ohm', 'trafo_r_ohm',
+                 'load_p_kw', 'load_q_kvar', 'customers',
+                 'gen_p_kw', 'gen_kind')
+
+    @classmethod
+    def from_tables(cls, pp_net):
+        """Extrahiert die Arrays aus einem pandapower-Netz bzw. GridTables (None: leeres Netz)."""
+        inst = cls()
+        bus = _table(pp_net, 'bus')
+        inst.bus_vn_kv = _column(bus, 'vn_kv')
+        inst.bus_x = _column(bus, 'x')
+        inst.bus_y = _column(bus, 'y')
+
+        line = _table(pp_net, 'line')
+        inst.line_length_km = _column(line, 'length_km')
+        types = _type_column(line)
+        inst.line_kind = np.select([np.isin(types, OVERHEAD_TYPES), np.isin(types, UNDERGROUND_TYPES)],
+                                   [LINE_OVERHEAD, LINE_UNDERGROUND], LINE_OTHER).astype(np.int8)
+
+        trafo = _table(pp_net, 'trafo')
+        inst.trafo_kva = _column(trafo, 'rating_kva')
+        inst.trafo_x_ohm = _column(trafo, 'x_ohm')
+        inst.trafo_r_ohm = _column(trafo, 'r_ohm')
+
+        # Kundenzahl laut load.num_customers, sonst Anzahl Lasten
+        load = _table(pp_net, 'load')
+        inst.load_p_kw = _power_kw(load, 'p_kw', 'p_mw')
+        inst.load_q_kvar = _power_kw(load, 'q_kvar', 'q_mvar')
+        customers = int(load['num_customers'].sum()) if 'num_customers' in load.columns else None
+        inst.customers = customers or len(load)
+
+        gen = _table(pp_net, 'gen')
+        inst.gen_p_kw = _column(gen, 'p_kw')
+        types = _type_column(gen)
+        inst.gen_kind = np.array([(GEN_PV if 'pv' in t else 0) | (GEN_WIND if 'wind' in t else 0)
+                                  for t in types], dtype=np.int8)
+        return inst
+
+    @property
+    def nbytes(self) -> int:
+        """Speicherbedarf der Arrays in Byte."""
+        return sum(getattr(self, name).nbytes for name in self.__slots__ if name != 'customers')
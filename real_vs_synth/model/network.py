@@ -1,97 +1,214 @@
-import pandapower as pp
-import networkx as nx
-from pandapower.topology import create_nxgraph
+import os
+import hashlib
+import logging
+import numpy as np
+from scipy.sparse.csgraph import shortest_path
+from real_vs_synth.instrumentation import span
+from real_vs_synth.model import topology
+from real_vs_synth.model.arrays import GridArrays, grid_columns
+from real_vs_synth.model.summary import TopologySummary
+
+# Umgebungsvariable für die Topologie-Debugausgabe beim Laden (wird an Worker-Prozesse vererbt)
+DEBUG_ENV = "RVS_DEBUG_TOPOLOGY"
+# Umgebungsvariable: pandapower-Netz nach dem Extrahieren der Arrays verwerfen (wird an Worker-Prozesse vererbt)
+RELEASE_ENV = "RVS_RELEASE_PP_NET"
+
+log = logging.getLogger(__name__)
 
 class Network:
     """
     Diese Klasse stellt einen Wrapper um ein pandapower-Netz dar.
-    Sie speichert intern einen NetworkX-Graphen für topologische Analysen
-    und bietet komfortablen Zugriff auf verschiedene Netzwerkmetriken.
+    Sie speichert intern eine kompakte CSR-Adjazenz für topologische Analysen
+    sowie die Werte für Systemmetriken als typisierte Arrays (GridArrays) und
+    bietet komfortablen Zugriff auf verschiedene Netzwerkmetriken. Mit
+    release_pp_net() wird das pandapower-Netz verworfen; übrig bleiben nur die
+    Arrays, sodass auch sehr viele Netze gleichzeitig im Speicher gehalten werden können.
     """
 
+    __slots__ = ("bus_index", "adjacency", "pp_net", "_arrays", "_graph", "name", "source",
+                 "_summary", "_content_hash")
+
     def __init__(self):
-        # NetworkX-Graph, abgeleitet aus pandapower-Netzwerk
-        self.graph = None
-        # Originales pandapower-Netzwerk für Systemmetriken
+        # Bus-Indizes der Knoten in Matrixreihenfolge
+        self.bus_index = None
+        # Ungerichtete CSR-Adjazenzmatrix (parallele Kanten zusammengefasst)
+        self.adjacency = None
+        # Originales pandapower-Netzwerk (None nach release_pp_net)
         self.pp_net = None
+        # Werte für Systemmetriken als Arrays, werden bei Bedarf aus pp_net extrahiert
+        self._arrays = None
+        # NetworkX-MultiGraph, wird nur bei Bedarf erzeugt
+        self._graph = None
+        # Optionaler Bezeichner (z. B. Dateiname)
+        self.name = None
+        # Quelldatei bzw. -ordner, aus dem das Netz geladen wurde (für das Korpus-Manifest)
+        self.source = None
+        # Zwischengespeicherte Topologie-Kennzahlen, werden erst bei Bedarf berechnet
+        self._summary = None
+        self._content_hash = None
 
     @classmethod
-    def from_pandapower(cls, pp_net: pp.pandapowerNet):
-        """Erzeugt eine Network-Instanz aus einem bestehenden pandapower-Netz."""
+    def from_pandapower(cls, pp_net: "pandapowerNet", debug: bool = None, release: bool = None):
+        """
+        Erzeugt eine Network-Instanz aus einem bestehenden pandapower-Netz.
+        Die Topologie-Debugausgabe erfolgt nur mit debug=True oder wenn die
+        Umgebungsvariable RVS_DEBUG_TOPOLOGY=1 gesetzt ist. Entsprechend wird
+        das pandapower-Netz mit release=True bzw. RVS_RELEASE_PP_NET=1 gleich
+        nach dem Aufbau wieder freigegeben (release_pp_net).
+        """
         inst = cls()
-        # Erzeugt NetworkX-Graph, inklusive Leitungen und Transformatoren
-        inst.graph = create_nxgraph(pp_net, include_lines=True, include_trafos=True)
+        # Topologie einmalig als Arrays aus den Leitungs-/Trafo-Tabellen aufbauen
+        with span("graph_build"):
+            inst.bus_index, inst.adjacency = topology.build_adjacency(pp_net)
         inst.pp_net = pp_net
-        inst._debug_topology()
+        if debug or (debug is None and os.environ.get(DEBUG_ENV) == "1"):
+            inst._debug_topology()
+        if release or (release is None and os.environ.get(RELEASE_ENV) == "1"):
+            inst.release_pp_net()
         return inst
 
     @classmethod
     def from_json(cls, json_file_path: str):
         """Lädt ein pandapower-Netz aus einer JSON-Datei und erzeugt daraus eine Network-Instanz."""
+        import pandapower as pp
         pp_net = pp.from_json(json_file_path)
         return cls.from_pandapower(pp_net)
 
+    @property
+    def summary(self) -> TopologySummary:
+        """Zwischengespeicherte Topologie-Kennzahlen (Komponenten, Dreiecke, Durchmesser, ...)."""
+        if self._summary is None:
+            self._summary = TopologySummary(self.adjacency)
+        return self._summary
+
+    @property
+    def arrays(self) -> GridArrays:
+        """Werte der Systemmetriken als Arrays (lazy aus dem pandapower-Netz extrahiert)."""
+        if self._arrays is None:
+            with span("arrays"):
+                self._arrays = GridArrays.from_tables(self.pp_net)
+        return self._arrays
+
+    def release_pp_net(self):
+        """
+        Extrahiert Arrays und Inhalts-Hash und verwirft danach das
+        pandapower-Netz samt NetworkX-Graph. Topologie- und Systemmetriken
+        bleiben berechenbar; Zugriffe auf pandapower-Tabellen (lines, buses,
+        graph, Plots) sind danach nicht mehr möglich.
+        """
+        if self.pp_net is not None:
+            self.arrays
+            self.content_hash()
+            self.pp_net = None
+            self._graph = None
+        return self
+
+    @property
+    def graph(self):
+        """NetworkX-MultiGraph inklusive Leitungen und Transformatoren (lazy erzeugt)."""
+        if self._graph is None and self.pp_net is not None:
+            from pandapower.topology import create_nxgraph
+            self._graph = create_nxgraph(self.pp_net, include_lines=True, include_trafos=True)
+        return self._graph
+
+    @graph.setter
+    def graph(self, value):
+        self._graph = value
+
+    def content_hash(self) -> str:
+        """
+        SHA-1 über die für die Metriken relevanten Tabellen und Spalten
+        (GRID_COLUMNS), für pandapower-Netze und GridTables aus dem Grid-Cache
+        gleich; ohne pandapower-Netz über die Topologie-Arrays. Dient als Cache-Schlüssel.
+        """
+        if self._content_hash is None:
+            h = hashlib.sha1()
+            if self.pp_net is not None:
+                for table, index, columns in grid_columns(self.pp_net):
+                    if len(index) == 0:
+                        continue
+                    h.update(table.encode())
+                    h.update(index.tobytes())
+                    for col, values in columns.items():
+                        h.update(f"{col}:{values.dtype.str}".encode())
+                        h.update(values.tobytes())
+            else:
+                for arr in (self.bus_index, self.adjacency.indptr, self.adjacency.indices):
+                    h.update(arr.tobytes())
+            self._content_hash = h.hexdigest()
+        return self._content_hash
+
+    def topology_only(self):
+        """Leichte Kopie mit Topologie, aber ohne pandapower-Netz (z. B. zur Übergabe an Worker)."""
+        inst = Network()
+        inst.bus_index, inst.adjacency, inst.name = self.bus_index, self.adjacency, self.name
+        inst.source = self.source
+        inst._summary = self._summary
+        inst._content_hash = self._content_hash
+        return inst
+
+    def to_networkx(self) -> "nx.Graph":
+        """Einfacher NetworkX-Graph (ohne Attribute) aus der CSR-Adjazenz, Knoten = Bus-Indizes."""
+        import networkx as nx
+        G = nx.Graph()
+        G.add_nodes_from(self.bus_index.tolist())
+        coo = self.adjacency.tocoo()
+        upper = coo.row < coo.col
+        G.add_edges_from(zip(self.bus_index[coo.row[upper]].tolist(),
+                             self.bus_index[coo.col[upper]].tolist()))
+        return G
+
     def get_node_degrees(self) -> list:
         """Gibt eine Liste mit Knotengraden (Anzahl der Verbindungen pro Knoten) zurück."""
-        simpleG = nx.Graph(self.graph)
-        return [deg for _, deg in simpleG.degree()]
+        return self.summary.degrees.tolist()
 
     def get_clustering_dict(self) -> dict:
         """Berechnet den Cluster-Koeffizienten jedes Knotens im Graphen."""
-        simpleG = nx.Graph(self.graph)
-        return nx.clustering(simpleG)
+        return dict(zip(self.bus_index.tolist(), self.summary.clustering.tolist()))
 
     def get_shortest_path_lengths(self) -> dict:
         """Berechnet alle kürzesten Pfadlängen zwischen allen Knotenpaaren."""
-        simpleG = nx.Graph(self.graph)
-        return dict(nx.all_pairs_shortest_path_length(simpleG))
+        dist = shortest_path(self.adjacency, unweighted=True, directed=False)
+        buses = self.bus_index.tolist()
+        result = {}
+        for i, b in enumerate(buses):
+            reach = np.flatnonzero(np.isfinite(dist[i]))
+            result[b] = {buses[j]: int(dist[i, j]) for j in reach}
+        return result
 
     def get_diameter(self) -> float:
         """Berechnet den Durchmesser (längster kürzester Pfad) des größten zusammenhängenden Teilgraphen."""
-        simpleG = nx.Graph(self.graph)
-        if not nx.is_connected(simpleG):
-            comps = nx.connected_components(simpleG)
-            largest = max(comps, key=len)
-            subG = simpleG.subgraph(largest)
-            return float(nx.diameter(subG))
-        else:
-            return float(nx.diameter(simpleG))
+        d = self.summary.diameter
+        return float(d) if d is not None else 0.0
 
     def get_betweenness(self) -> dict:
         """Berechnet die Betweenness-Centrality aller Knoten (wie oft liegt ein Knoten auf kürzesten Pfaden)."""
-        simpleG = nx.Graph(self.graph)
-        return nx.betweenness_centrality(simpleG)
+        values = self.summary.path_sweep()['betweenness']
+        return dict(zip(self.bus_index.tolist(), values.tolist()))
 
-    # Debug Topologie (wie vorher)
     def _debug_topology(self):
-        G = nx.Graph(self.graph)
-        print("--- Netz Topologie Debug ---")
-        print(f"Knoten: {G.number_of_nodes()} | Kanten: {G.number_of_edges()}")
-        comps = list(nx.connected_components(G))
-        print(f"Komponenten insgesamt: {len(comps)}")
-        for i, comp in enumerate(comps):
-            print(f"  Komponente {i+1}: {len(comp)} Knoten")
-        main_comp = max((G.subgraph(c).copy() for c in comps), key=lambda g: len(g.nodes))
-        print(f"Größe größte Komponente: {main_comp.number_of_nodes()} Knoten / {main_comp.number_of_edges()} Kanten")
-        num_triangles = sum(nx.triangles(main_comp).values()) // 3
-        print(f"Dreiecke in größter Komponente: {num_triangles}")
+        """Protokolliert die zwischengespeicherten Topologie-Kennzahlen (ausdrücklich angefordert, daher INFO)."""
+        summary = self.summary
+        lines = ["--- Netz Topologie Debug ---",
+                 f"Knoten: {summary.n_nodes} | Kanten: {summary.n_edges}",
+                 f"Komponenten insgesamt: {summary.n_components}"]
+        for i, size in enumerate(summary.component_sizes):
+            lines.append(f"  Komponente {i+1}: {size} Knoten")
+        lines.append(f"Größe größte Komponente: {len(summary.largest_component)} Knoten / "
+                     f"{summary.largest_component_edges} Kanten")
+        lines.append(f"Dreiecke in größter Komponente: {summary.largest_component_triangles}")
 
         # Teste Clustering und Durchmesser mit Output
-        try:
-            clust = nx.average_clustering(main_comp)
-            print(f"Clustering Coefficient (größte Komponente): {clust}")
-            if clust == 0:
-                print("WARNUNG: Clustering = 0 trotz urbanem Netz. Prüfe Netzstruktur auf Radialität!")
-        except Exception as e:
-            print(f"Clustering-Berechnung nicht möglich: {e}")
-        try:
-            dia = nx.diameter(main_comp)
-            print(f"Durchmesser (größte Komponente): {dia}")
-            if dia == 0:
-                print("WARNUNG: Durchmesser = 0. Netz ist trivial oder nicht verbunden.")
-        except Exception as e:
-            print(f"Durchmesser nicht berechenbar: {e}")
-        print("--- Ende Debug ---\n")
+        clust = summary.largest_component_clustering
+        lines.append(f"Clustering Coefficient (größte Komponente): {clust}")
+        dia = summary.diameter
+        lines.append(f"Durchmesser (größte Komponente): {dia}")
+        lines.append("--- Ende Debug ---")
+        log.info("\n".join(lines))
+        if clust == 0:
+            log.warning("Clustering = 0 trotz urbanem Netz. Prüfe Netzstruktur auf Radialität!")
+        if not dia:
+            log.warning("Durchmesser = 0. Netz ist trivial oder nicht verbunden.")
 
     # Zugriffshilfen für Systemmetriken basierend auf pandapower-Objekten:
     @property
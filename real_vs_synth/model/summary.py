@@ -0,0 +1,102 @@
+from functools import cached_property
+import numpy as np
+from real_vs_synth.model import topology
+from real_vs_synth.metrics.shortest_paths import path_sweep
+
+
+class TopologySummary:
+    """
+    Zwischengespeicherte Topologie-Kennzahlen eines Netzes. Jede Größe wird
+    erst beim ersten Zugriff berechnet und danach wiederverwendet, sodass
+    Debug-Ausgabe und Metriken dieselben Ergebnisse teilen.
+    """
+
+    def __init__(self, adjacency):
+        self.adjacency = adjacency
+        self._sweeps = {}
+
+    @cached_property
+    def n_nodes(self):
+        return int(self.adjacency.shape[0])
+
+    @cached_property
+    def n_edges(self):
+        return topology.number_of_edges(self.adjacency)
+
+    @cached_property
+    def degrees(self):
+        return topology.degrees(self.adjacency)
+
+    @cached_property
+    def _components(self):
+        return topology.component_labels(self.adjacency)
+
+    @property
+    def n_components(self):
+        return int(self._components[0])
+
+    @property
+    def component_labels(self):
+        return self._components[1]
+
+    @cached_property
+    def component_sizes(self):
+        return np.bincount(self.component_labels, minlength=self.n_components)
+
+    @cached_property
+    def largest_component(self):
+        """Knotenpositionen der größten Komponente."""
+        if self.n_components == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.component_labels == np.argmax(self.component_sizes))
+
+    @cached_property
+    def largest_component_edges(self):
+        return int(self.degrees[self.largest_component].sum() // 2)
+
+    @cached_property
+    def meshness(self):
+        return self.n_edges - self.n_nodes + self.n_components
+
+    @cached_property
+    def triangles(self):
+        return topology.triangle_counts(self.adjacency)
+
+    @cached_property
+    def clustering(self):
+        return topology.local_clustering(self.adjacency, self.triangles)
+
+    @cached_property
+    def largest_component_triangles(self):
+        return int(self.triangles[self.largest_component].sum() // 3)
+
+    @cached_property
+    def largest_component_clustering(self):
+        """Mittlerer Clustering-Koeffizient der größten Komponente (wie nx.average_clustering)."""
+        values = self.clustering[self.largest_component]
+        return float(values.mean()) if len(values) else 0.0
+
+    def seed(self, sweep=None, **values):
+        """
+        Übernimmt anderweitig (z. B. für viele Netze gemeinsam) berechnete
+        Kennzahlen, etwa triangles=..., sowie optional einen exakten Pfad-Sweep.
+        """
+        if sweep is not None:
+            self._sweeps[sweep['betweenness'] is not None] = sweep
+        self.__dict__.update(values)
+
+    def path_sweep(self, betweenness=True):
+        """
+        Exakter Pfad-Sweep (siehe shortest_paths.path_sweep), einmal je Netz berechnet.
+        Ein Sweep mit Betweenness deckt auch Anfragen ohne Betweenness ab.
+        """
+        if True in self._sweeps:
+            return self._sweeps[True]
+        if betweenness or False not in self._sweeps:
+            self._sweeps[betweenness] = path_sweep(self.adjacency, betweenness=betweenness)
+        return self._sweeps[betweenness]
+
+    @property
+    def diameter(self):
+        """Durchmesser der größten Komponente (None für leere Netze)."""
+        return self.path_sweep(betweenness=False)['diameter']
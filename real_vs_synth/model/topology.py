@@ -0,0 +1,215 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Zweigtabellen, die wie bei pandapower.topology.create_nxgraph als Kanten gelten:
+# (Tabelle, Spalte Von-Bus, Spalte Nach-Bus, Schalter-Elementtyp für offene Schalter)
+BRANCH_TABLES = (
+    ("line", "from_bus", "to_bus", "l"),
+    ("trafo", "hv_bus", "lv_bus", "t"),
+    ("impedance", "from_bus", "to_bus", None),
+    ("dcline", "from_bus", "to_bus", None),
+)
+TRAFO3W_SIDES = (("hv_bus", "mv_bus"), ("hv_bus", "lv_bus"), ("mv_bus", "lv_bus"))
+
+
+def _table(pp_net, name):
+    """Gibt die Tabelle `name` zurück oder None, falls sie fehlt oder leer ist."""
+    df = getattr(pp_net, name, None) if not isinstance(pp_net, dict) else pp_net.get(name)
+    if df is None or len(df) == 0:
+        return None
+    return df
+
+
+def _in_service(df):
+    if "in_service" in df.columns:
+        return df["in_service"].to_numpy(dtype=bool)
+    return np.ones(len(df), dtype=bool)
+
+
+def _open_switch_elements(switch, et):
+    """Indizes der Elemente vom Typ `et`, die über einen offenen Schalter getrennt sind."""
+    if switch is None:
+        return np.empty(0, dtype=np.int64)
+    mask = (switch["et"].to_numpy() == et) & ~switch["closed"].to_numpy(dtype=bool)
+    return switch["element"].to_numpy()[mask]
+
+
+def branch_arrays(pp_net):
+    """
+    Liest die Kanten (Von-/Nach-Bus) direkt aus den Spalten der Zweigtabellen.
+    Berücksichtigt wie create_nxgraph nur Elemente in Betrieb, offene Schalter
+    und geschlossene Bus-Bus-Schalter. Rückgabe: zwei Arrays mit Bus-Indizes.
+    """
+    switch = _table(pp_net, "switch")
+    from_parts, to_parts = [], []
+
+    for name, f_col, t_col, et in BRANCH_TABLES:
+        df = _table(pp_net, name)
+        if df is None:
+            continue
+        mask = _in_service(df)
+        if et is not None:
+            mask &= ~np.isin(df.index.to_numpy(), _open_switch_elements(switch, et))
+        from_parts.append(df[f_col].to_numpy()[mask])
+        to_parts.append(df[t_col].to_numpy()[mask])
+
+    trafo3w = _table(pp_net, "trafo3w")
+    if trafo3w is not None:
+        mask = _in_service(trafo3w)
+        if switch is not None:
+            sw_mask = (switch["et"].to_numpy() == "t3") & ~switch["closed"].to_numpy(dtype=bool)
+            open_pairs = set(zip(switch["element"].to_numpy()[sw_mask], switch["bus"].to_numpy()[sw_mask]))
+        else:
+            open_pairs = set()
+        idx = trafo3w.index.to_numpy()
+        for f_col, t_col in TRAFO3W_SIDES:
+            f, t = trafo3w[f_col].to_numpy(), trafo3w[t_col].to_numpy()
+            side_mask = mask.copy()
+            if open_pairs:
+                side_mask &= np.array([(i, a) not in open_pairs and (i, b) not in open_pairs
+                                       for i, a, b in zip(idx, f, t)], dtype=bool)
+            from_parts.append(f[side_mask])
+            to_parts.append(t[side_mask])
+
+    if switch is not None:
+        mask = (switch["et"].to_numpy() == "b") & switch["closed"].to_numpy(dtype=bool)
+        from_parts.append(switch["bus"].to_numpy()[mask])
+        to_parts.append(switch["element"].to_numpy()[mask])
+
+    if not from_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return (np.concatenate(from_parts).astype(np.int64),
+            np.concatenate(to_parts).astype(np.int64))
+
+
+def adjacency_from_edges(n_nodes, u, v):
+    """
+    Baut die symmetrische CSR-Adjazenzmatrix aus Knotenpositionen.
+    Parallele Kanten werden zusammengefasst, Eigenschleifen verworfen.
+    """
+    keep = u != v
+    u, v = u[keep], v[keep]
+    # Parallele Kanten einmalig über eindeutige (min, max)-Paare entfernen
+    lo, hi = np.minimum(u, v), np.maximum(u, v)
+    pairs = np.unique(lo * np.int64(max(n_nodes, 1)) + hi)
+    lo, hi = pairs // max(n_nodes, 1), pairs % max(n_nodes, 1)
+    rows = np.concatenate([lo, hi])
+    cols = np.concatenate([hi, lo])
+    data = np.ones(len(rows), dtype=np.int32)
+    adj = csr_matrix((data, (rows, cols)), shape=(n_nodes, n_nodes))
+    adj.sort_indices()
+    return adj
+
+
+def build_adjacency(pp_net):
+    """
+    Erzeugt die kompakte Topologie eines pandapower-Netzes.
+    Rückgabe: (bus_index, adjacency) mit den Bus-Indizes der Knoten in
+    Matrixreihenfolge und der ungerichteten CSR-Adjazenzmatrix.
+    Busse außer Betrieb werden wie bei create_nxgraph weggelassen.
+    """
+    bus = pp_net.bus if not isinstance(pp_net, dict) else pp_net["bus"]
+    bus_index = bus.index.to_numpy()[_in_service(bus)].astype(np.int64)
+    f, t = branch_arrays(pp_net)
+
+    # Bus-Indizes auf Matrixpositionen abbilden (bus_index ist nicht zwingend sortiert)
+    order = np.argsort(bus_index, kind="stable")
+    sorted_bus = bus_index[order]
+    pos_f = np.searchsorted(sorted_bus, f)
+    pos_t = np.searchsorted(sorted_bus, t)
+    pos_f = np.clip(pos_f, 0, max(len(sorted_bus) - 1, 0))
+    pos_t = np.clip(pos_t, 0, max(len(sorted_bus) - 1, 0))
+    if len(sorted_bus):
+        valid = (sorted_bus[pos_f] == f) & (sorted_bus[pos_t] == t)
+    else:
+        valid = np.zeros(len(f), dtype=bool)
+    u, v = order[pos_f[valid]], order[pos_t[valid]]
+    return bus_index, adjacency_from_edges(len(bus_index), u, v)
+
+
+# --- Kennzahlen auf der CSR-Adjazenz ---
+def degrees(adj):
+    """Knotengrade als Array (Anzahl Nachbarn pro Knoten)."""
+    return np.diff(adj.indptr)
+
+
+def number_of_edges(adj):
+    return int(adj.nnz // 2)
+
+
+def component_labels(adj):
+    """Anzahl Komponenten und Komponenten-Label pro Knoten."""
+    if adj.shape[0] == 0:
+        return 0, np.empty(0, dtype=np.int32)
+    return connected_components(adj, directed=False)
+
+
+def largest_component(adj):
+    """Knotenpositionen der größten zusammenhängenden Komponente."""
+    n_comp, labels = component_labels(adj)
+    if n_comp == 0:
+        return np.empty(0, dtype=np.int64)
+    largest = np.argmax(np.bincount(labels))
+    return np.flatnonzero(labels == largest)
+
+
+def triangle_counts(adj):
+    """
+    Anzahl Dreiecke pro Knoten: diag(A³)/2 = Zeilensumme von (A·A) ∘ A / 2.
+    Funktioniert unverändert auf blockdiagonalen Matrizen vieler Netze (block_diagonal).
+    """
+    a = adj.astype(np.int64)
+    return np.asarray((a @ a).multiply(a).sum(axis=1)).ravel() // 2
+
+
+def local_clustering(adj, tri=None):
+    """
+    Lokaler Clustering-Koeffizient 2·T / (k·(k-1)) wie nx.clustering (0 für k < 2).
+    Bereits gezählte Dreiecke je Knoten können als tri übergeben werden.
+    """
+    deg = degrees(adj).astype(np.float64)
+    tri = (triangle_counts(adj) if tri is None else tri).astype(np.float64)
+    denom = deg * (deg - 1)
+    cc = np.zeros(len(deg), dtype=np.float64)
+    np.divide(2.0 * tri, denom, out=cc, where=denom > 0)
+    return cc
+
+
+def block_diagonal(adjs):
+    """
+    Fasst die Adjazenzen vieler Netze zu einer blockdiagonalen CSR-Matrix
+    zusammen (ohne Umweg über COO). Rückgabe: (Matrix, offsets), die Knoten
+    von Netz i liegen in offsets[i]:offsets[i+1].
+    """
+    sizes = np.array([a.shape[0] for a in adjs], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    if not adjs:
+        return csr_matrix((0, 0), dtype=np.int32), offsets
+    n = int(offsets[-1])
+    row_nnz = np.concatenate([np.diff(a.indptr) for a in adjs])
+    indptr = np.concatenate([[0], np.cumsum(row_nnz)])
+    # Spaltenindizes je Block um den Knotenversatz des Netzes verschieben
+    nnz = np.array([a.nnz for a in adjs], dtype=np.int64)
+    indices = np.concatenate([a.indices for a in adjs]) + np.repeat(offsets[:-1], nnz)
+    index_dtype = np.int32 if max(n, int(indptr[-1])) < np.iinfo(np.int32).max else np.int64
+    data = np.concatenate([a.data for a in adjs])
+    return csr_matrix((data, indices.astype(index_dtype), indptr.astype(index_dtype)), shape=(n, n)), offsets
+
+
+def degree_assortativity(adj):
+    """
+    Pearson-Korrelation der Knotengrade an beiden Kantenenden, entspricht
+    nx.degree_assortativity_coefficient für ungerichtete Graphen.
+    """
+    deg = degrees(adj).astype(np.float64)
+    coo = adj.tocoo()
+    x, y = deg[coo.row], deg[coo.col]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return float(np.corrcoef(x, y)[0, 1])
+
+
+def meshness(adj):
+    """Vermaschtheitsgrad μ = E - N + P."""
+    n_comp, _ = component_labels(adj)
+    return number_of_edges(adj) - adj.shape[0] + n_comp
@@ -1,15 +1,102 @@
+import io
+import logging
+import os
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from scipy.stats import gaussian_kde
 
+# Metriken, deren Verteilung als Hop-Histogramm vorliegt (Index = Hop-Anzahl)
+HIST_METRICS = {'cpl'}
+# Unterstützte Ausgabeformate im Report-Modus (html = eingebettetes SVG)
+FIGURE_FORMATS = ('png', 'svg', 'html')
+
+log = logging.getLogger(__name__)
+
+
+def save_figure(fig, base_path, formats=('png',)):
+    """Speichert eine Abbildung unter base_path.<format> für alle formats und gibt die Pfade zurück."""
+    paths = []
+    for fmt in formats:
+        path = f"{base_path}.{fmt}"
+        if fmt == 'html':
+            buf = io.StringIO()
+            fig.savefig(buf, format='svg')
+            title = os.path.basename(base_path)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title></head>"
+                        f"<body>\n{buf.getvalue()}\n</body></html>\n")
+        else:
+            fig.savefig(path, format=fmt)
+        paths.append(path)
+    return paths
+
+
+def _finish(fig, name, output_dir=None, formats=('png',)):
+    """Zeigt die Abbildung interaktiv an oder speichert sie (mit output_dir) und schließt sie."""
+    if output_dir is None:
+        plt.show()
+        return []
+    paths = save_figure(fig, os.path.join(output_dir, name), formats)
+    plt.close(fig)
+    return paths
+
 
-def plot_topological_comparison(df):
+def _collect_distribution(df, side, key):
+    """
+    Sammelt die Verteilung einer Metrik über alle Zeilen als (Werte, Gewichte).
+    Hop-Histogramme und Werte-Histogramme werden dabei nicht zu Einzelwerten
+    expandiert; nicht endliche Werte (z. B. nan-Assortativität) entfallen.
+    """
+    if key in HIST_METRICS:
+        counts = np.zeros(1)
+        for i in range(len(df)):
+            h = np.asarray(df.iloc[i][f'{side}_{key}_hist'], dtype=float)
+            if len(h) > len(counts):
+                counts = np.pad(counts, (0, len(h) - len(counts)))
+            counts[:len(h)] += h
+        return np.arange(len(counts), dtype=float), counts
+    values, weights = [], []
+    for i in range(len(df)):
+        values.append(np.asarray(df.iloc[i][f'{side}_{key}_values'], dtype=float))
+        weights.append(np.asarray(df.iloc[i][f'{side}_{key}_counts'], dtype=float))
+    if not values:
+        return np.empty(0), np.empty(0)
+    values, weights = np.concatenate(values), np.concatenate(weights)
+    keep = np.isfinite(values)
+    return values[keep], weights[keep]
+
+
+def _weighted_box_stats(values, weights, label):
+    """Boxplot-Kennwerte für ax.bxp aus gewichteten Werten (Werte- bzw. Hop-Histogramme)."""
+    keep = weights > 0
+    values, weights = values[keep], weights[keep]
+    order = np.argsort(values)
+    values, weights = values[order], weights[order]
+    cum = np.cumsum(weights)
+
+    def quantile(p):
+        return float(values[min(np.searchsorted(cum, p * cum[-1]), len(values) - 1)])
+
+    q1, med, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    whislo = float(values[values >= q1 - 1.5 * iqr].min())
+    whishi = float(values[values <= q3 + 1.5 * iqr].max())
+    return {
+        'label': label, 'med': med, 'q1': q1, 'q3': q3,
+        'whislo': whislo, 'whishi': whishi,
+        'mean': float((values * weights).sum() / cum[-1]),
+        'fliers': values[(values < whislo) | (values > whishi)],
+    }
+
+
+def plot_topological_comparison(df, output_dir=None, formats=('png',)):
     """
     Zeigt zwei separate Visualisierungen:
     1. Balkendiagramme der Mittelwerte
     2. Boxplots der Verteilungen
     Falls eine Metrik nur Nullen enthält, wird sie ausgelassen und unten aufgeführt.
+    Mit output_dir werden die Abbildungen als Dateien gespeichert statt angezeigt.
     """
     import matplotlib.pyplot as plt
     import numpy as np
@@ -54,7 +141,7 @@ def plot_topological_comparison(df):
     fig1.suptitle('Topological Metrics - Mean Values')
     plt.tight_layout(pad=3.0)
     plt.subplots_adjust(top=0.85)
-    plt.show()
+    paths = _finish(fig1, 'topo_means', output_dir, formats)
 
     # --- 2. Boxplots der Verteilungen ---
     fig2, axs2 = plt.subplots(1, len(plot_keys), figsize=(6 * len(plot_keys), 6))
@@ -62,22 +149,11 @@ def plot_topological_comparison(df):
         axs2 = [axs2]
 
     for ax, key in zip(axs2, plot_keys):
-        real_all = []
-        synth_all = []
-        for i in range(len(df)):
-            real = df.iloc[i][f'real_{key}_distrib']
-            synth = df.iloc[i][f'synth_{key}_distrib']
-            # Prüfe auf Listen oder Skalar
-            if isinstance(real, list):
-                real_all.extend(real)
-            elif isinstance(real, (int, float)):
-                real_all.append(real)
-            if isinstance(synth, list):
-                synth_all.extend(synth)
-            elif isinstance(synth, (int, float)):
-                synth_all.append(synth)
-        if len(real_all) > 0 and len(synth_all) > 0:
-            ax.boxplot([real_all, synth_all], labels=['Real', 'Synthetic'])
+        real_all, real_w = _collect_distribution(df, 'real', key)
+        synth_all, synth_w = _collect_distribution(df, 'synth', key)
+        if real_w.sum() > 0 and synth_w.sum() > 0:
+            ax.bxp([_weighted_box_stats(real_all, real_w, 'Real'),
+                    _weighted_box_stats(synth_all, synth_w, 'Synthetic')])
             ax.set_title(f'{metric_map[key]} (Boxplot)')
         else:
             ax.set_visible(False)
@@ -86,20 +162,20 @@ def plot_topological_comparison(df):
     plt.tight_layout(pad=3.0)
     plt.subplots_adjust(top=0.85)
     if skipped_metrics:
-        print("Folgende Topo-Metriken wurden ausgelassen (nur Nullwerte):")
-        for m in skipped_metrics:
-            print(f" - {m}")
-    plt.show()
-def plot_system_metrics(metrics_list: list[dict], labels: list[str]):
+        log.info("Folgende Topo-Metriken wurden ausgelassen (nur Nullwerte): %s", ", ".join(map(str, skipped_metrics)))
+    return paths + _finish(fig2, 'topo_boxplots', output_dir, formats)
+
+def plot_system_metrics(metrics_list: list[dict], labels: list[str], output_dir=None, formats=('png',)):
     """
     Zeigt zwei Darstellungen der Systemmetriken:
     1. Balkendiagramme der Mittelwerte
     2. Boxplots der Verteilungen
     Wenn eine Metrik nur Nullen enthält, wird sie ausgelassen und unten aufgeführt.
+    Mit output_dir werden die Abbildungen als Dateien gespeichert statt angezeigt.
     """
     if not metrics_list:
-        print("Keine Systemmetriken zur Anzeige verfügbar.")
-        return
+        log.info("Keine Systemmetriken zur Anzeige verfügbar.")
+        return []
 
     df = pd.DataFrame(metrics_list)
     df['label'] = labels
@@ -126,7 +202,7 @@ def plot_system_metrics(metrics_list: list[dict], labels: list[str]):
     plt.tight_layout(pad=3.0)
     plt.suptitle('Systemmetriken: Mittelwerte', fontsize=16)
     plt.subplots_adjust(top=0.92)
-    plt.show()
+    paths = _finish(fig1, 'system_means', output_dir, formats)
 
     # --- 2. Boxplots ---
     fig2, axs2 = plt.subplots(nrows=(len(kept_cols) - 1) // 5 + 1, ncols=5, figsize=(5 * min(5, len(kept_cols)), 6))
@@ -144,14 +220,12 @@ def plot_system_metrics(metrics_list: list[dict], labels: list[str]):
     plt.suptitle('Systemmetriken: Verteilungen (Boxplots)', fontsize=16)
     plt.subplots_adjust(top=0.92)
     if skipped_metrics:
-        print("Folgende Systemmetriken wurden ausgelassen (nur Nullwerte):")
-        for m in skipped_metrics:
-            print(f" - {m}")
-    plt.show()
+        log.info("Folgende Systemmetriken wurden ausgelassen (nur Nullwerte): %s", ", ".join(map(str, skipped_metrics)))
+    return paths + _finish(fig2, 'system_boxplots', output_dir, formats)
 
 
 
-def plot_topo_hist_distributions(df, metric_keys=None):
+def plot_topo_hist_distributions(df, metric_keys=None, output_dir=None, formats=('png',)):
     if metric_keys is None:
         metric_keys = ['deg', 'cc', 'cpl', 'bw', 'mesh', 'assort', 'diameter']
 
@@ -169,17 +243,16 @@ def plot_topo_hist_distributions(df, metric_keys=None):
     valid_keys = []
 
     for key in metric_keys:
-        values = []
-        for i in range(len(df)):
-            values += df.iloc[i][f'real_{key}_distrib'] + df.iloc[i][f'synth_{key}_distrib']
-        if all(v == 0 for v in values):
+        real_all, real_w = _collect_distribution(df, 'real', key)
+        synth_all, synth_w = _collect_distribution(df, 'synth', key)
+        if all(v == 0 for v in np.concatenate([real_all[real_w > 0], synth_all[synth_w > 0]])):
             skipped.append(metric_map[key])
         else:
             valid_keys.append(key)
 
     if not valid_keys:
-        print("Keine gültigen topologischen Metriken mit Verteilungen.")
-        return
+        log.info("Keine gültigen topologischen Metriken mit Verteilungen.")
+        return []
 
     cols = min(4, len(valid_keys))
     rows = (len(valid_keys) - 1) // cols + 1
@@ -189,16 +262,14 @@ def plot_topo_hist_distributions(df, metric_keys=None):
 
     for i, key in enumerate(valid_keys):
         ax = axs[i]
-        real_all = []
-        synth_all = []
-        for idx in range(len(df)):
-            real_all += df.iloc[idx][f'real_{key}_distrib']
-            synth_all += df.iloc[idx][f'synth_{key}_distrib']
+        real_all, real_w = _collect_distribution(df, 'real', key)
+        synth_all, synth_w = _collect_distribution(df, 'synth', key)
 
         try:
-            bins = np.histogram_bin_edges(real_all + synth_all, bins=30)
-            real_hist, _ = np.histogram(real_all, bins)
-            synth_hist, _ = np.histogram(synth_all, bins)
+            support = np.concatenate([real_all[real_w > 0], synth_all[synth_w > 0]])
+            bins = np.histogram_bin_edges(support, bins=30)
+            real_hist, _ = np.histogram(real_all, bins, weights=real_w)
+            synth_hist, _ = np.histogram(synth_all, bins, weights=synth_w)
             bin_centers = 0.5 * (bins[:-1] + bins[1:])
             width = (bins[1] - bins[0]) * 0.4
 
@@ -217,12 +288,10 @@ def plot_topo_hist_distributions(df, metric_keys=None):
     plt.tight_layout(pad=3.0)
     plt.subplots_adjust(top=0.92)
     if skipped:
-        print("Ausgelassene Topo-Metriken (nur Nullwerte):")
-        for m in skipped:
-            print(f" - {m}")
-    plt.show()
+        log.info("Ausgelassene Topo-Metriken (nur Nullwerte): %s", ", ".join(map(str, skipped)))
+    return _finish(fig, 'topo_histograms', output_dir, formats)
 
-def plot_system_hist_distributions(metrics_list: list[dict], labels: list[str]):
+def plot_system_hist_distributions(metrics_list: list[dict], labels: list[str], output_dir=None, formats=('png',)):
     df = pd.DataFrame(metrics_list)
     df['label'] = labels
     numeric_cols = [col for col in df.columns if col != 'label' and pd.api.types.is_numeric_dtype(df[col])]
@@ -236,8 +305,8 @@ def plot_system_hist_distributions(metrics_list: list[dict], labels: list[str]):
             valid_cols.append(col)
 
     if not valid_cols:
-        print("Keine gültigen Systemmetriken mit Verteilungen.")
-        return
+        log.info("Keine gültigen Systemmetriken mit Verteilungen.")
+        return []
 
     cols = min(4, len(valid_cols))
     rows = (len(valid_cols) - 1) // cols + 1
@@ -271,7 +340,5 @@ def plot_system_hist_distributions(metrics_list: list[dict], labels: list[str]):
     plt.tight_layout(pad=3.0)
     plt.subplots_adjust(top=0.92)
     if skipped:
-        print("Ausgelassene Systemmetriken (nur Nullwerte):")
-        for m in skipped:
-            print(f" - {m}")
-    plt.show()
+        log.info("Ausgelassene Systemmetriken (nur Nullwerte): %s", ", ".join(map(str, skipped)))
+    return _finish(fig, 'system_histograms', output_dir, formats)
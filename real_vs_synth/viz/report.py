@@ -0,0 +1,59 @@
+import os
+from multiprocessing import Pool, cpu_count
+from real_vs_synth.instrumentation import span
+
+# Abbildungsgruppen des Reports: (Funktion in plt_comparison, Eingabe)
+REPORT_FIGURES = (
+    ("plot_topological_comparison", "topo"),
+    ("plot_system_metrics", "system"),
+    ("plot_topo_hist_distributions", "topo"),
+    ("plot_system_hist_distributions", "system"),
+)
+
+
+def _use_agg():
+    """Nicht-interaktives Backend, damit Worker ohne Display rendern können."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render(job):
+    name, args, output_dir, formats = job
+    _use_agg()
+    from real_vs_synth.viz import plt_comparison
+    with span(f"plot.{name}"):
+        return getattr(plt_comparison, name)(*args, output_dir=output_dir, formats=formats)
+
+
+def _write_index(output_dir, paths):
+    """Einfache HTML-Übersicht über alle erzeugten Abbildungen."""
+    shown = [p for p in paths if p.endswith((".png", ".svg"))]
+    items = "\n".join(f'<h2>{os.path.basename(p)}</h2>\n<img src="{os.path.basename(p)}" style="max-width:100%">'
+                      for p in shown)
+    if not shown:
+        items = "\n".join(f'<p><a href="{os.path.basename(p)}">{os.path.basename(p)}</a></p>' for p in paths)
+    path = os.path.join(output_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Real vs. Synthetic</title></head>"
+                f"<body>\n<h1>Real vs. Synthetic</h1>\n{items}\n</body></html>\n")
+    return path
+
+
+def render_report(df, real_metrics, synth_metrics, output_dir, formats=("png",), workers=None):
+    """
+    Schreibt alle Vergleichsabbildungen (Balken, Boxplots, Histogramme) ohne
+    Anzeige nach output_dir, verteilt auf Worker-Prozesse (1 = seriell), und
+    legt eine index.html an. Gibt die Pfade der erzeugten Dateien zurück.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    labels = ["Real"] * len(real_metrics) + ["Synthetic"] * len(synth_metrics)
+    inputs = {"topo": (df,), "system": (real_metrics + synth_metrics, labels)}
+    jobs = [(name, inputs[kind], output_dir, tuple(formats)) for name, kind in REPORT_FIGURES]
+    workers = min(workers if workers is not None else min(cpu_count(), 8), len(jobs))
+    if workers <= 1:
+        results = [_render(job) for job in jobs]
+    else:
+        with Pool(workers, initializer=_use_agg) as pool:
+            results = pool.map(_render, jobs)
+    paths = [p for result in results for p in (result or [])]
+    return paths + [_write_index(output_dir, paths)]
@@ -0,0 +1,55 @@
+import argparse
+import logging
+from real_vs_synth.analysis.comparer import COMPARED_LEVELS, Comparer
+from real_vs_synth.analysis.results_store import read_results
+from real_vs_synth.instrumentation import configure_logging
+from main import plot_results
+
+log = logging.getLogger(__name__)
+
+
+def load_results(results_dir: str):
+    """
+    Liest den Ergebnisspeicher eines früheren Laufs und baut daraus das
+    Vergleichs-DataFrame und die Systemmetriken je Seite wieder auf,
+    ohne eine Metrik neu zu berechnen.
+    """
+    topo, system = read_results(results_dir)
+    df = Comparer(workers=1).compare_records(topo)
+    levels = list(COMPARED_LEVELS) + sorted({lvl for lvl, _ in system} - set(COMPARED_LEVELS))
+    metrics = {side: [dict(m) for lvl in levels for _, m in system.get((lvl, side), [])]
+               for side in ('real', 'synth')}
+    return df, metrics['real'], metrics['synth']
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Regenerate all comparison figures from a stored result set (see main.py --results_dir)"
+    )
+    parser.add_argument('--results_dir', type=str, default="results",
+                        help="Verzeichnis des Ergebnisspeichers")
+    parser.add_argument('--report_dir', type=str, default=None,
+                        help="Headless-Modus: alle Abbildungen ohne Anzeige als Dateien in dieses Verzeichnis schreiben")
+    parser.add_argument('--report_formats', type=str, default="png",
+                        help="Kommagetrennte Formate für --report_dir: png, svg, html")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Anzahl Worker-Prozesse für --report_dir (1 = seriell)")
+    parser.add_argument('--log_level', choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
+                        help="Ausführlichkeit der Konsolenausgabe")
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    args.no_figures = False
+    if args.report_dir:
+        import matplotlib
+        matplotlib.use("Agg")
+
+    df, real_metrics, synth_metrics = load_results(args.results_dir)
+    log.info("Geladen: %d Ebene(n), %d reale und %d synthetische Netze", len(df), len(real_metrics), len(synth_metrics))
+    plot_results(df, real_metrics, synth_metrics, args)
+
+if __name__ == '__main__':
+    main()
+
+# Beispielaufrufe:
+#   python replot.py --results_dir results
+#   python replot.py --results_dir results --report_dir reports --report_formats png,svg
@@ -0,0 +1,44 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from real_vs_synth.analysis.comparer import Comparer
+from real_vs_synth.analysis.results_store import read_results, write_results
+from real_vs_synth.data.grid_cache import GridTables
+from real_vs_synth.metrics.network_metrics import compute_topological_record
+from real_vs_synth.model.network import Network
+
+pytest.importorskip("pyarrow")
+
+
+def _grid(n_buses, edges):
+    bus = pd.DataFrame({"vn_kv": np.full(n_buses, 0.4), "in_service": True})
+    line = pd.DataFrame({"from_bus": [u for u, _ in edges], "to_bus": [v for _, v in edges],
+                         "length_km": 0.1, "in_service": True}, index=range(len(edges)))
+    return Network.from_pandapower(GridTables(bus=bus, line=line))
+
+
+def _records(grids):
+    return [dict(compute_topological_record(net), name=name) for name, net in grids]
+
+
+def test_round_trip_keeps_nan_metrics(tmp_path):
+    # Ringe: alle Grade gleich, Assortativität nan; Netz ohne Kanten: cc_mean nan
+    ring = [(i, (i + 1) % 6) for i in range(6)]
+    real = _records([("ring_a", _grid(6, ring)), ("edgeless", _grid(3, []))])
+    synth = _records([("ring_b", _grid(6, ring))])
+    assert math.isnan(real[0]["assort"]) and math.isnan(real[1]["cc_mean"])
+
+    write_results(str(tmp_path), {("LV", "real"): real, ("LV", "synth"): synth}, {})
+    topo, _ = read_results(str(tmp_path))
+
+    for before, after in zip(real + synth, topo[("LV", "real")] + topo[("LV", "synth")]):
+        assert before.keys() == after.keys()
+        for key, value in before.items():
+            if isinstance(value, float):
+                assert after[key] == value or math.isnan(value) and math.isnan(after[key]), key
+    # Wie replot.py: erneuter Vergleich aus dem Ergebnisspeicher
+    df = Comparer(workers=1).compare_records(topo)
+    assert list(df["level"]) == ["LV"]